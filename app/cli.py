@@ -0,0 +1,148 @@
+import argparse
+import sys
+import time
+from datetime import date
+from typing import List, Optional
+
+from app.database import storage
+from app.qr.backends import available_backends
+
+
+def _render(args: argparse.Namespace) -> int:
+    from app.pdf.batch import render_invoices
+
+    invoices = storage.list_invoices(
+        number_from=args.number_from,
+        number_to=args.number_to,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        client_id=args.client,
+    )
+    if not invoices:
+        print("Aucune facture ne correspond aux critères.")
+        return 0
+    settings = storage.load_settings()
+    if args.qr_backend:
+        settings.qr_backend = args.qr_backend
+    # Workers get their invoices pickled; they never touch the database.
+    storage.close_connections()
+
+    def report(result):
+        if result.ok:
+            print(f"OK     {result.number:<20} {result.seconds:6.2f}s  {result.path}")
+        else:
+            print(f"ERREUR {result.number:<20} {result.seconds:6.2f}s  {result.error}")
+
+    start = time.perf_counter()
+    results = render_invoices(invoices, settings, workers=args.workers, on_result=report)
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for result in results if not result.ok)
+    cpu_time = sum(result.seconds for result in results)
+    print(
+        f"{len(results) - failures} PDF générés, {failures} échec(s) en {elapsed:.2f}s "
+        f"({len(results) / elapsed:.1f} factures/s, temps de rendu cumulé {cpu_time:.2f}s)"
+    )
+    return 1 if failures else 0
+
+
+def _rebuild_reports(args: argparse.Namespace) -> int:  # pylint: disable=unused-argument
+    start = time.perf_counter()
+    count = storage.rebuild_reports()
+    print(f"Rapports recalculés à partir de {count} factures en {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def _check_totals(args: argparse.Namespace) -> int:
+    mismatches = storage.check_invoice_totals(repair=args.repair)
+    for mismatch in mismatches:
+        print(f"ÉCART  {mismatch.number:<20} enregistré {mismatch.stored}  recalculé {mismatch.computed}")
+    if not mismatches:
+        print("Tous les totaux enregistrés correspondent aux lignes.")
+        return 0
+    if args.repair:
+        print(f"{len(mismatches)} facture(s) corrigée(s), rapports recalculés.")
+        return 0
+    print(f"{len(mismatches)} facture(s) incohérente(s) ; relancer avec --repair pour corriger.")
+    return 1
+
+
+def _export(args: argparse.Namespace) -> int:
+    from app.database.export import export_ledger
+
+    def report(rows: int) -> None:
+        print(f"{rows} lignes exportées...", file=sys.stderr)
+
+    start = time.perf_counter()
+    rows = export_ledger(
+        args.output,
+        fmt=args.format,
+        per=args.per,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        client_id=args.client,
+        progress=report,
+        progress_every=100000,
+    )
+    print(f"Export terminé : {rows} lignes en {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from app.service.server import serve
+
+    print(f"Service FTE Facturation sur http://{args.host}:{args.port} (Ctrl+C pour arrêter)", file=sys.stderr)
+    serve(args.host, args.port, readers=args.readers, pdf_workers=args.pdf_workers)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Outils en ligne de commande FTE Facturation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render = subparsers.add_parser("render", help="Générer les PDF d'un lot de factures")
+    render.add_argument("--from", dest="number_from", help="Premier numéro de facture (inclus)")
+    render.add_argument("--to", dest="number_to", help="Dernier numéro de facture (inclus)")
+    render.add_argument("--since", dest="date_from", type=date.fromisoformat, help="Date de début AAAA-MM-JJ (incluse)")
+    render.add_argument("--until", dest="date_to", type=date.fromisoformat, help="Date de fin AAAA-MM-JJ (incluse)")
+    render.add_argument("--client", type=int, help="Identifiant du client")
+    render.add_argument("--workers", type=int, help="Nombre de processus (défaut : nombre de cœurs)")
+    render.add_argument("--qr-backend", choices=available_backends(), help="Moteur de rendu QR (défaut : paramètres)")
+    render.set_defaults(handler=_render)
+
+    rebuild = subparsers.add_parser("rebuild-reports", help="Recalculer les agrégats de chiffre d'affaires")
+    rebuild.set_defaults(handler=_rebuild_reports)
+
+    check = subparsers.add_parser("check-totals", help="Vérifier les totaux enregistrés des factures")
+    check.add_argument("--repair", action="store_true", help="Recalculer les totaux incohérents à partir des lignes")
+    check.set_defaults(handler=_check_totals)
+
+    export = subparsers.add_parser("export", help="Exporter le grand livre des factures (CSV ou JSON Lines)")
+    export.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Format de sortie (défaut : csv)")
+    export.add_argument(
+        "--per", choices=["line", "invoice"], default="line", help="Une ligne par ligne de facture ou par facture"
+    )
+    export.add_argument("--since", dest="date_from", type=date.fromisoformat, help="Date de début AAAA-MM-JJ (incluse)")
+    export.add_argument("--until", dest="date_to", type=date.fromisoformat, help="Date de fin AAAA-MM-JJ (incluse)")
+    export.add_argument("--client", type=int, help="Identifiant du client")
+    export.add_argument("-o", "--output", help="Fichier de sortie (défaut : sortie standard)")
+    export.set_defaults(handler=_export)
+
+    serve = subparsers.add_parser("serve", help="Servir clients, articles, factures et PDF en HTTP/JSON")
+    serve.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut : 127.0.0.1 ; service sans authentification, à n'ouvrir que sur un réseau de confiance)")
+    serve.add_argument("--port", type=int, default=8765, help="Port d'écoute (défaut : 8765)")
+    serve.add_argument("--readers", type=int, default=8, help="Requêtes traitées en parallèle (défaut : 8)")
+    serve.add_argument("--pdf-workers", type=int, help="Processus de rendu PDF (défaut : nombre de cœurs)")
+    serve.set_defaults(handler=_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    storage.init_db()
+    try:
+        return args.handler(args)
+    finally:
+        storage.close_connections()
+
+
+__all__ = ["main"]
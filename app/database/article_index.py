@@ -0,0 +1,106 @@
+import threading
+from bisect import bisect_left, insort
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence
+
+from app.database import events, storage
+from app.database.cache import data_cache
+from app.logic.models import Item
+
+
+class ArticleIndex:
+    """In-memory lookup of articles by reference, for line entry.
+
+    A hash map gives exact matches and a sorted list of normalized references
+    gives prefix completion by binary search. Normalization is the one the
+    database uses for its unique reference key. The index loads the catalog
+    on first use, applies single-article saves in place, and reloads after
+    bulk imports or when the data cache sees another process write.
+    """
+
+    def __init__(self):
+        self._by_key: Dict[str, Item] = {}
+        self._keys: List[str] = []
+        self._key_by_id: Dict[int, str] = {}
+        self._stale = True
+        self._generation = 0
+        self._lock = threading.Lock()
+        events.subscribe(events.ITEMS, self._on_items_saved)
+
+    def get(self, reference: str) -> Optional[Item]:
+        key = storage.reference_key(reference.strip())
+        if not key:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            return self._by_key.get(key)
+
+    def complete(self, prefix: str, limit: int = 20) -> List[Item]:
+        """Articles whose reference starts with ``prefix``, in reference order."""
+        key = storage.reference_key(prefix.strip())
+        if not key:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            matches: List[Item] = []
+            for position in range(bisect_left(self._keys, key), len(self._keys)):
+                candidate = self._keys[position]
+                if not candidate.startswith(key) or len(matches) >= limit:
+                    break
+                matches.append(self._by_key[candidate])
+            return matches
+
+    def ready(self) -> bool:
+        """Whether lookups can be answered without reading the catalog first.
+
+        The Tk thread checks this and calls :meth:`load` on a worker when it
+        is ``False``, so that reloading a large catalog never blocks typing.
+        """
+        data_cache.check_external()
+        return not self._stale
+
+    def load(self) -> None:
+        """Read the catalog now if it is stale; safe to call off the Tk thread."""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self) -> None:
+        data_cache.check_external()
+        if not self._stale:
+            return
+        with self._lock:
+            generation = self._generation
+        items = storage.list_items()
+        with self._lock:
+            self._by_key = {storage.reference_key(item.reference): item for item in items}
+            self._keys = sorted(self._by_key)
+            self._key_by_id = {item.id: key for key, item in self._by_key.items()}
+            # A save that landed while loading may be missing from ``items``.
+            self._stale = generation != self._generation
+
+    def _on_items_saved(self, topic: str, records: Sequence[object]) -> None:  # pylint: disable=unused-argument
+        with self._lock:
+            self._generation += 1
+            if self._stale:
+                return
+            if not records:
+                self._stale = True
+                return
+            for item in records:
+                self._put(replace(item))
+
+    def _put(self, item: Item) -> None:
+        key = storage.reference_key(item.reference)
+        old_key = self._key_by_id.get(item.id)
+        if old_key is not None and old_key != key:
+            del self._by_key[old_key]
+            del self._keys[bisect_left(self._keys, old_key)]
+        if key not in self._by_key:
+            insort(self._keys, key)
+        self._by_key[key] = item
+        self._key_by_id[item.id] = key
+
+
+article_index = ArticleIndex()
+
+
+__all__ = ["ArticleIndex", "article_index"]
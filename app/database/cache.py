@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, TypeVar
+
+from app.database import events, storage
+from app.logic.models import Client, Item, Settings
+
+T = TypeVar("T")
+
+
+class DataCache:
+    """Memoized storage reads, dropped whenever their table is written.
+
+    Every topic (table) has a version number bumped by the invalidation event
+    that storage publishes after each committed write. Views remember the
+    version they rendered and skip reloading while it has not changed.
+
+    Writes from other processes publish no event here. At most once every
+    ``check_interval`` seconds, reads ask :func:`storage.changed_elsewhere`
+    and, when another connection committed, compare the per-table write
+    counters (:func:`storage.table_versions`). Only the topics whose
+    counter moved are published, so that every subscriber (this cache, the
+    article index) drops what it holds for those tables alone. Writes made
+    in this process move the counters too, so their topics may be dropped
+    once more at the next external change.
+    """
+
+    DATA_TOPICS = (events.CLIENTS, events.ITEMS, events.INVOICES)
+
+    def __init__(self, max_entries: int = 512, check_interval: float = 2.0):
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, "OrderedDict[Hashable, object]"] = {}
+        self._checked_at = 0.0
+        self._table_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for topic in self.DATA_TOPICS + (events.SETTINGS,):
+            events.subscribe(topic, self.invalidate)
+
+    def version(self, topic: str) -> int:
+        self.check_external()
+        with self._lock:
+            return self._versions.get(topic, 0)
+
+    def check_external(self) -> None:
+        """Invalidate the data topics another connection wrote to since the last check."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+        if not storage.changed_elsewhere():
+            return
+        versions = storage.table_versions()
+        with self._lock:
+            previous, self._table_versions = self._table_versions, versions
+        for topic in self.DATA_TOPICS:
+            if previous.get(topic) != versions.get(topic):
+                events.publish(topic)
+
+    def invalidate(self, topic: str, records: Sequence[object] = ()) -> None:  # pylint: disable=unused-argument
+        with self._lock:
+            self._versions[topic] = self._versions.get(topic, 0) + 1
+            self._entries.pop(topic, None)
+
+    def get(self, topic: str, key: Hashable, loader: Callable[[], T]) -> T:
+        self.check_external()
+        with self._lock:
+            entries = self._entries.setdefault(topic, OrderedDict())
+            if key in entries:
+                entries.move_to_end(key)
+                return entries[key]
+            version = self._versions.get(topic, 0)
+        value = loader()
+        with self._lock:
+            # Skip storing a value loaded while a write invalidated the topic.
+            if self._versions.get(topic, 0) == version:
+                entries = self._entries.setdefault(topic, OrderedDict())
+                entries[key] = value
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+        return value
+
+
+data_cache = DataCache()
+
+
+class SettingsCache:
+    """Process-wide snapshot of the settings.
+
+    Saves made in this process drop the snapshot through the settings event.
+    Saves made by other processes bump the database's settings version,
+    which is compared at most once every ``check_interval`` seconds, so
+    reading the settings normally costs no query at all. ``next_number`` is
+    as of the last load; :func:`storage.peek_invoice_number` is always live.
+    """
+
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self._snapshot: Optional[Settings] = None
+        self._db_version = 0
+        self._checked_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        events.subscribe(events.SETTINGS, self.invalidate)
+
+    def invalidate(self, topic: str = events.SETTINGS, records: Sequence[object] = ()) -> None:  # pylint: disable=unused-argument
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def get(self) -> Settings:
+        """A private copy of the current settings, safe to modify."""
+        with self._lock:
+            snapshot = self._snapshot
+            checked_at = self._checked_at
+            generation = self._generation
+        now = time.monotonic()
+        if snapshot is not None and now - checked_at >= self.check_interval:
+            if storage.settings_version() != self._db_version:
+                # Another process saved; drop it for everyone in this one too.
+                data_cache.invalidate(events.SETTINGS)
+                snapshot = None
+            else:
+                with self._lock:
+                    self._checked_at = now
+        if snapshot is None:
+            db_version = storage.settings_version()
+            snapshot = storage.load_settings()
+            with self._lock:
+                # A save that landed while loading must not be hidden by this snapshot.
+                if generation == self._generation:
+                    self._snapshot, self._db_version, self._checked_at = snapshot, db_version, now
+        return replace(snapshot)
+
+
+settings_cache = SettingsCache()
+
+
+def settings() -> Settings:
+    return settings_cache.get()
+
+
+def count_clients() -> int:
+    return data_cache.get(events.CLIENTS, "count", storage.count_clients)
+
+
+def list_clients(offset: int = 0, limit: Optional[int] = None) -> List[Client]:
+    return data_cache.get(events.CLIENTS, ("page", offset, limit), lambda: storage.list_clients(offset, limit))
+
+
+def count_items() -> int:
+    return data_cache.get(events.ITEMS, "count", storage.count_items)
+
+
+def list_items(offset: int = 0, limit: Optional[int] = None) -> List[Item]:
+    return data_cache.get(events.ITEMS, ("page", offset, limit), lambda: storage.list_items(offset, limit))
+
+
+__all__ = [
+    "DataCache",
+    "SettingsCache",
+    "count_clients",
+    "count_items",
+    "data_cache",
+    "list_clients",
+    "list_items",
+    "settings",
+    "settings_cache",
+]
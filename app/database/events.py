@@ -0,0 +1,41 @@
+import threading
+from typing import Callable, Dict, List, Sequence
+
+CLIENTS = "clients"
+ITEMS = "items"
+INVOICES = "invoices"
+SETTINGS = "settings"
+
+Callback = Callable[[str, Sequence[object]], None]
+
+_subscribers: Dict[str, List[Callback]] = {}
+_lock = threading.Lock()
+
+
+def subscribe(topic: str, callback: Callback) -> Callable[[], None]:
+    """Call ``callback(topic, records)`` after every committed write to ``topic``.
+
+    ``records`` holds the saved model objects when the writer knows them, and
+    is empty for bulk writes. Callbacks run on the writing thread and must
+    stay cheap (set a flag, drop a cache entry). Returns a function that
+    removes the subscription.
+    """
+    with _lock:
+        _subscribers.setdefault(topic, []).append(callback)
+
+    def unsubscribe() -> None:
+        with _lock:
+            if callback in _subscribers.get(topic, []):
+                _subscribers[topic].remove(callback)
+
+    return unsubscribe
+
+
+def publish(topic: str, records: Sequence[object] = ()) -> None:
+    with _lock:
+        callbacks = list(_subscribers.get(topic, []))
+    for callback in callbacks:
+        callback(topic, records)
+
+
+__all__ = ["CLIENTS", "INVOICES", "ITEMS", "SETTINGS", "publish", "subscribe"]
@@ -0,0 +1,177 @@
+"""Streaming ledger export for accounting.
+
+Rows come straight from a SQLite cursor and are written as soon as they
+are read, so memory use stays flat whatever the size of the database: no
+``Invoice`` or ``InvoiceLine`` object is built. Amounts are exported as
+exact decimals (``12.35``) computed from integer cents.
+"""
+
+import csv
+import json
+import sqlite3
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, TextIO, Union
+
+from app.database.storage import connection, invoice_filter
+from app.logic.models import line_total_cents
+
+FORMATS = ("csv", "jsonl")
+GRANULARITIES = ("line", "invoice")
+
+LINE_COLUMNS = [
+    "invoice_number",
+    "invoice_date",
+    "client_id",
+    "client_company",
+    "client_internal_code",
+    "vat_rate",
+    "position",
+    "article_number",
+    "description",
+    "quantity",
+    "unit_price",
+    "discount_percent",
+    "line_total",
+]
+
+INVOICE_COLUMNS = [
+    "invoice_number",
+    "invoice_date",
+    "client_id",
+    "client_company",
+    "client_internal_code",
+    "vat_rate",
+    "line_count",
+    "subtotal",
+    "vat",
+    "total",
+    "notes",
+]
+
+
+def _amount(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def iter_line_rows(conn: sqlite3.Connection, where: str = "", params: tuple = ()) -> Iterator[Sequence[object]]:
+    """One row per invoice line, in :data:`LINE_COLUMNS` order, by date then number."""
+    cursor = conn.execute(
+        f"""
+        SELECT invoices.number, invoices.invoice_date, invoices.client_id, clients.company,
+               clients.internal_code, invoices.vat_rate, invoice_lines.position, invoice_lines.article_number,
+               invoice_lines.description, invoice_lines.quantity, invoice_lines.unit_price,
+               invoice_lines.discount_percent
+        FROM invoices
+        JOIN clients ON clients.id = invoices.client_id
+        JOIN invoice_lines ON invoice_lines.invoice_id = invoices.id
+        {where}
+        ORDER BY invoices.invoice_date, invoices.id, invoice_lines.position
+        """,
+        params,
+    )
+    for row in cursor:
+        quantity, unit_price, discount = row[9], row[10], row[11] or 0.0
+        yield (
+            *row[:7],
+            row[7] or "",
+            row[8],
+            quantity,
+            unit_price,
+            discount,
+            _amount(line_total_cents(quantity, unit_price, discount)),
+        )
+
+
+def iter_invoice_rows(conn: sqlite3.Connection, where: str = "", params: tuple = ()) -> Iterator[Sequence[object]]:
+    """One row per invoice from its stored totals, in :data:`INVOICE_COLUMNS` order."""
+    cursor = conn.execute(
+        f"""
+        SELECT invoices.number, invoices.invoice_date, invoices.client_id, clients.company,
+               clients.internal_code, invoices.vat_rate, invoices.line_count, invoices.subtotal_cents,
+               invoices.vat_cents, invoices.total_cents, invoices.notes
+        FROM invoices
+        JOIN clients ON clients.id = invoices.client_id
+        {where}
+        ORDER BY invoices.invoice_date, invoices.id
+        """,
+        params,
+    )
+    for row in cursor:
+        yield (*row[:7], _amount(row[7]), _amount(row[8]), _amount(row[9]), row[10] or "")
+
+
+def _write_csv(stream: TextIO, columns: List[str], rows: Iterator[Sequence[object]], tick: Callable[[], None]) -> None:
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        tick()
+
+
+def _write_jsonl(stream: TextIO, columns: List[str], rows: Iterator[Sequence[object]], tick: Callable[[], None]) -> None:
+    for row in rows:
+        # Decimals are written as strings so amounts stay exact.
+        stream.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+        stream.write("\n")
+        tick()
+
+
+def export_ledger(
+    destination: Union[Path, str, TextIO, None] = None,
+    *,
+    fmt: str = "csv",
+    per: str = "line",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    client_id: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    progress_every: int = 10000,
+) -> int:
+    """Write the ledger to ``destination`` (a path, an open text file or stdout).
+
+    ``fmt`` is ``"csv"`` or ``"jsonl"``; ``per`` is ``"line"`` for one row per
+    invoice line or ``"invoice"`` for one row per invoice. Date bounds are
+    inclusive. ``progress`` receives the number of rows written every
+    ``progress_every`` rows. Returns the number of rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    if per not in GRANULARITIES:
+        raise ValueError(f"Granularité d'export inconnue : {per}")
+    where, params = invoice_filter(date_from=date_from, date_to=date_to, client_id=client_id)
+    columns = LINE_COLUMNS if per == "line" else INVOICE_COLUMNS
+    write = _write_csv if fmt == "csv" else _write_jsonl
+    written = 0
+
+    def tick() -> None:
+        nonlocal written
+        written += 1
+        if progress is not None and written % progress_every == 0:
+            progress(written)
+
+    with connection() as conn:
+        rows = iter_line_rows(conn, where, params) if per == "line" else iter_invoice_rows(conn, where, params)
+        if destination is None:
+            write(sys.stdout, columns, rows, tick)
+        elif isinstance(destination, (str, Path)):
+            with Path(destination).open("w", newline="", encoding="utf-8") as stream:
+                write(stream, columns, rows, tick)
+        else:
+            write(destination, columns, rows, tick)
+    if progress is not None:
+        progress(written)
+    return written
+
+
+__all__ = [
+    "FORMATS",
+    "GRANULARITIES",
+    "INVOICE_COLUMNS",
+    "LINE_COLUMNS",
+    "export_ledger",
+    "iter_invoice_rows",
+    "iter_line_rows",
+]
@@ -0,0 +1,425 @@
+"""Versioned schema migrations driven by ``PRAGMA user_version``.
+
+Each entry of :data:`MIGRATIONS` brings the schema from version ``n`` to
+``n + 1`` and runs in its own transaction together with the version bump.
+Migrations must stay idempotent for databases created before versioning,
+which all report version 0.
+"""
+
+import json
+import sqlite3
+from typing import Callable, List, Tuple
+
+from app.database import reports
+
+
+class DuplicateRecordsError(RuntimeError):
+    """A migration found rows that the unique index it adds would reject.
+
+    ``duplicates`` describes each conflicting group for display;
+    :func:`rename_duplicates` is the repair offered to the user.
+    """
+
+    def __init__(self, message: str, table: str, duplicates: List[str]):
+        super().__init__(message)
+        self.table = table
+        self.duplicates = duplicates
+
+
+def _create_base_schema(cur: sqlite3.Cursor) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company TEXT NOT NULL,
+            street TEXT NOT NULL,
+            zip_code TEXT NOT NULL,
+            city TEXT NOT NULL,
+            country TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            internal_code TEXT
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reference TEXT NOT NULL,
+            description TEXT NOT NULL,
+            unit_price REAL NOT NULL,
+            default_quantity REAL NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            number TEXT NOT NULL,
+            invoice_date TEXT NOT NULL,
+            client_id INTEGER NOT NULL,
+            notes TEXT,
+            vat_rate REAL NOT NULL,
+            FOREIGN KEY(client_id) REFERENCES clients(id)
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS invoice_lines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER NOT NULL,
+            article_number TEXT,
+            description TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            unit_price REAL NOT NULL,
+            discount_percent REAL,
+            item_id INTEGER,
+            FOREIGN KEY(invoice_id) REFERENCES invoices(id),
+            FOREIGN KEY(item_id) REFERENCES items(id)
+        )
+        """
+    )
+    _migrate_invoice_lines_table(cur)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            data TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _migrate_invoice_lines_table(cur: sqlite3.Cursor) -> None:
+    cur.execute("PRAGMA table_info(invoice_lines)")
+    columns = {row[1] for row in cur.fetchall()}
+    if "article_number" not in columns:
+        cur.execute("ALTER TABLE invoice_lines ADD COLUMN article_number TEXT DEFAULT ''")
+    if "discount_percent" not in columns:
+        cur.execute("ALTER TABLE invoice_lines ADD COLUMN discount_percent REAL DEFAULT 0.0")
+
+
+def _migrate_items_reference_key(cur: sqlite3.Cursor) -> None:
+    # Articles differing only by case may carry different prices: never pick one silently.
+    cur.execute(
+        """
+        SELECT group_concat(reference || ' (n° ' || id || ', ' || unit_price || ')', ' / ')
+        FROM items
+        WHERE lower(reference) IN (SELECT lower(reference) FROM items GROUP BY lower(reference) HAVING COUNT(*) > 1)
+        GROUP BY lower(reference)
+        ORDER BY lower(reference)
+        """
+    )
+    duplicates = [row[0] for row in cur.fetchall()]
+    if duplicates:
+        raise DuplicateRecordsError(
+            "Plusieurs articles ne diffèrent que par la casse de leur référence : "
+            f"{'; '.join(duplicates)}. Renommez ou supprimez les doublons avant de mettre à jour l'application.",
+            "items",
+            duplicates,
+        )
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_items_reference_key ON items(lower(reference))")
+
+
+def _add_lookup_indexes(cur: sqlite3.Cursor) -> None:
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_invoice_lines_invoice_id ON invoice_lines(invoice_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_invoices_client_id ON invoices(client_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_invoices_invoice_date ON invoices(invoice_date)")
+
+
+def _add_listing_indexes(cur: sqlite3.Cursor) -> None:
+    # Paged client/article lists read a window in display order.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_clients_company ON clients(company, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_items_reference ON items(reference, id)")
+
+
+_FTS_TABLES = {
+    # fts table: (content table, indexed columns)
+    "clients_fts": ("clients", ("company", "city", "email", "internal_code")),
+    "items_fts": ("items", ("reference", "description")),
+    "invoices_fts": ("invoices", ("number", "notes")),
+    "invoice_lines_fts": ("invoice_lines", ("article_number", "description")),
+}
+
+
+def _add_full_text_search(cur: sqlite3.Cursor) -> None:
+    """External-content FTS5 indexes kept in sync by triggers.
+
+    Skipped when SQLite is built without FTS5; searches then fall back to LIKE.
+    """
+    for fts_table, (table, columns) in _FTS_TABLES.items():
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        try:
+            cur.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {column_list}, content='{table}', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+                """
+            )
+        except sqlite3.OperationalError as exc:
+            if "fts5" in str(exc):
+                return
+            raise
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+            """
+        )
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+            """
+        )
+        _create_fts_update_trigger(cur, fts_table, table, columns)
+        cur.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def _create_fts_update_trigger(cur: sqlite3.Cursor, fts_table: str, table: str, columns: Tuple[str, ...]) -> None:
+    # Only updates of indexed columns reindex the row; totals or positions do not.
+    # UPDATE OF fires whenever a column is assigned, and saves assign every
+    # column, so the WHEN clause also skips rows whose indexed text is unchanged.
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table}
+        WHEN {changed} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+        """
+    )
+
+
+def _add_revenue_aggregates(cur: sqlite3.Cursor) -> None:
+    reports.create_tables(cur)
+    reports.rebuild(cur)
+
+
+def _add_invoice_totals(cur: sqlite3.Cursor) -> None:
+    """Denormalized amounts on ``invoices`` so listings never read the lines."""
+    cur.execute("PRAGMA table_info(invoices)")
+    columns = {row[1] for row in cur.fetchall()}
+    for column in ("subtotal_cents", "vat_cents", "total_cents", "line_count"):
+        if column not in columns:
+            cur.execute(f"ALTER TABLE invoices ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    cur.execute("SELECT id, vat_rate FROM invoices")
+    vat_rates = dict(cur.fetchall())
+    cur.executemany(
+        "UPDATE invoices SET subtotal_cents=?, vat_cents=?, total_cents=?, line_count=? WHERE id=?",
+        [
+            (*reports.amounts_cents(subtotal, vat_rates[invoice_id]), line_count, invoice_id)
+            for invoice_id, (subtotal, line_count) in reports.line_subtotals(cur).items()
+        ],
+    )
+
+
+def _add_line_positions(cur: sqlite3.Cursor) -> None:
+    """Explicit line order, so lines can be updated in place instead of re-inserted."""
+    cur.execute("PRAGMA table_info(invoice_lines)")
+    if "position" not in {row[1] for row in cur.fetchall()}:
+        cur.execute("ALTER TABLE invoice_lines ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+    cur.execute("SELECT id, invoice_id FROM invoice_lines ORDER BY invoice_id, id")
+    positions = []
+    previous_invoice, position = None, 0
+    for line_id, invoice_id in cur.fetchall():
+        position = position + 1 if invoice_id == previous_invoice else 0
+        previous_invoice = invoice_id
+        positions.append((position, line_id))
+    cur.executemany("UPDATE invoice_lines SET position=? WHERE id=?", positions)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_invoice_lines_position ON invoice_lines(invoice_id, position)")
+    # Covered by the new index.
+    cur.execute("DROP INDEX IF EXISTS idx_invoice_lines_invoice_id")
+
+
+def _add_invoice_sequence(cur: sqlite3.Cursor) -> None:
+    """Invoice numbers move from the settings blob to an atomic sequence."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+        """
+    )
+    cur.execute("SELECT data FROM settings WHERE id=1")
+    row = cur.fetchone()
+    next_value = json.loads(row[0]).get("next_number", 1) if row else 1
+    cur.execute("INSERT OR IGNORE INTO sequences(name, next_value) VALUES ('invoice', ?)", (next_value,))
+
+    cur.execute("SELECT number FROM invoices GROUP BY number HAVING COUNT(*) > 1 ORDER BY number")
+    duplicates = [row[0] for row in cur.fetchall()]
+    if duplicates:
+        raise DuplicateRecordsError(
+            "Plusieurs factures portent le même numéro : "
+            f"{', '.join(duplicates)}. Renumérotez-les avant de mettre à jour l'application.",
+            "invoices",
+            duplicates,
+        )
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_number ON invoices(number)")
+
+
+def _split_settings_blob(cur: sqlite3.Cursor) -> None:
+    """One typed row per setting instead of a JSON blob, plus a change counter."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings_values (
+            key TEXT PRIMARY KEY,
+            value
+        )
+        """
+    )
+    cur.execute("SELECT data FROM settings WHERE id=1")
+    row = cur.fetchone()
+    data = json.loads(row[0]) if row else {}
+    data.pop("next_number", None)
+    cur.executemany("INSERT OR REPLACE INTO settings_values(key, value) VALUES (?, ?)", data.items())
+    cur.execute("DROP TABLE settings")
+    # Other processes compare this counter with the one their cached settings came from.
+    cur.execute("INSERT OR IGNORE INTO sequences(name, next_value) VALUES ('settings_version', 1)")
+
+
+def _add_history_indexes(cur: sqlite3.Cursor) -> None:
+    # Invoice history pages walk (date, id) backwards, optionally for one client.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_invoices_client_date ON invoices(client_id, invoice_date)")
+    cur.execute("DROP INDEX IF EXISTS idx_invoices_client_id")
+
+
+def _narrow_fts_update_triggers(cur: sqlite3.Cursor) -> None:
+    """Recreate the FTS update triggers as ``AFTER UPDATE OF`` the indexed columns."""
+    for fts_table, (table, columns) in _FTS_TABLES.items():
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,))
+        if cur.fetchone() is None:
+            continue
+        cur.execute(f"DROP TRIGGER IF EXISTS {fts_table}_au")
+        _create_fts_update_trigger(cur, fts_table, table, columns)
+
+
+def _skip_unchanged_fts_updates(cur: sqlite3.Cursor) -> None:
+    """Recreate the FTS update triggers with the clause skipping unchanged text."""
+    _narrow_fts_update_triggers(cur)
+
+
+# Tables whose writes bump a per-table counter in ``sequences``.
+VERSIONED_TABLES = ("clients", "items", "invoices", "invoice_lines")
+
+
+def _add_table_versions(cur: sqlite3.Cursor) -> None:
+    """Per-table write counters, so other processes can tell which caches to drop."""
+    for table in VERSIONED_TABLES:
+        name = f"{table}_version"
+        cur.execute("INSERT OR IGNORE INTO sequences(name, next_value) VALUES (?, 1)", (name,))
+        for event, suffix in (("INSERT", "ai"), ("UPDATE", "au"), ("DELETE", "ad")):
+            cur.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+                    UPDATE sequences SET next_value = next_value + 1 WHERE name = '{name}';
+                END
+                """
+            )
+
+
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _create_base_schema,
+    _migrate_items_reference_key,
+    _add_lookup_indexes,
+    _add_listing_indexes,
+    _add_full_text_search,
+    _add_revenue_aggregates,
+    _add_invoice_totals,
+    _add_line_positions,
+    _add_invoice_sequence,
+    _split_settings_blob,
+    _add_history_indexes,
+    _narrow_fts_update_triggers,
+    _add_table_versions,
+    _skip_unchanged_fts_updates,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    version = schema_version(conn)
+    if version == SCHEMA_VERSION:
+        return version
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"La base de données (schéma v{version}) est plus récente que l'application (v{SCHEMA_VERSION})."
+        )
+    conn.commit()
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            MIGRATIONS[target - 1](cur)
+            cur.execute(f"PRAGMA user_version = {target}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return SCHEMA_VERSION
+
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# table: (column, key the unique index compares, as SQL and in Python)
+_UNIQUE_COLUMNS = {
+    "items": ("reference", "lower(reference)", lambda value: value.translate(_ASCII_LOWER)),
+    "invoices": ("number", "number", lambda value: value),
+}
+
+
+def rename_duplicates(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    """Suffix the later rows of each duplicate group with ``-2``, ``-3``, ...
+
+    The oldest row of a group keeps its value. Returns the ``(old, new)``
+    values of the renamed rows, after committing.
+    """
+    column, sql_key, key = _UNIQUE_COLUMNS[table]
+    rows = conn.execute(f"SELECT id, {column} FROM {table} ORDER BY {sql_key}, id").fetchall()
+    taken = {key(value) for _, value in rows}
+    seen = set()
+    renamed: List[Tuple[str, str]] = []
+    for row_id, value in rows:
+        if key(value) not in seen:
+            seen.add(key(value))
+            continue
+        suffix = 2
+        while key(f"{value}-{suffix}") in taken:
+            suffix += 1
+        new_value = f"{value}-{suffix}"
+        taken.add(key(new_value))
+        conn.execute(f"UPDATE {table} SET {column} = ? WHERE id = ?", (new_value, row_id))
+        renamed.append((value, new_value))
+    conn.commit()
+    return renamed
+
+
+__all__ = [
+    "DuplicateRecordsError",
+    "MIGRATIONS",
+    "SCHEMA_VERSION",
+    "VERSIONED_TABLES",
+    "migrate",
+    "rename_duplicates",
+    "schema_version",
+]
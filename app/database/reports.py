@@ -0,0 +1,147 @@
+"""Materialized revenue aggregates.
+
+Three summary tables hold the invoice count, subtotal, VAT and total (in
+integer cents) per month, per client and per VAT rate. ``save_invoice``
+keeps them current inside its own transaction: it subtracts the stored
+invoice's totals before rewriting it, then adds the new ones. Reports
+therefore read a handful of rows instead of every invoice line, and
+:func:`rebuild` recomputes everything from the invoices when needed.
+"""
+
+import sqlite3
+from typing import Dict, List, Tuple
+
+from app.logic.models import line_total_cents, vat_amount_cents
+
+# summary table: key column
+AGGREGATE_TABLES = {
+    "revenue_by_period": "period TEXT PRIMARY KEY",
+    "revenue_by_client": "client_id INTEGER PRIMARY KEY",
+    "revenue_by_vat_rate": "vat_rate REAL PRIMARY KEY",
+}
+
+# (subtotal, vat, total) in cents
+Amounts = Tuple[int, int, int]
+
+
+def create_tables(cur: sqlite3.Cursor) -> None:
+    for table, key_column in AGGREGATE_TABLES.items():
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {key_column},
+                invoice_count INTEGER NOT NULL DEFAULT 0,
+                subtotal_cents INTEGER NOT NULL DEFAULT 0,
+                vat_cents INTEGER NOT NULL DEFAULT 0,
+                total_cents INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+
+
+def period_of(invoice_date: str) -> str:
+    """Reporting period (``YYYY-MM``) of an ISO invoice date."""
+    return invoice_date[:7]
+
+
+def amounts_cents(subtotal_cents: int, vat_rate: float) -> Amounts:
+    vat = vat_amount_cents(subtotal_cents, vat_rate)
+    return subtotal_cents, vat, subtotal_cents + vat
+
+
+def add_invoice(
+    cur: sqlite3.Cursor, invoice_date: str, client_id: int, vat_rate: float, amounts: Amounts, sign: int = 1
+) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) one invoice from every aggregate."""
+    subtotal, vat, total = amounts
+    keys = {
+        "revenue_by_period": ("period", period_of(invoice_date)),
+        "revenue_by_client": ("client_id", client_id),
+        "revenue_by_vat_rate": ("vat_rate", vat_rate),
+    }
+    for table, (column, key) in keys.items():
+        cur.execute(
+            f"""
+            INSERT INTO {table}({column}, invoice_count, subtotal_cents, vat_cents, total_cents)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT({column}) DO UPDATE SET
+                invoice_count = invoice_count + excluded.invoice_count,
+                subtotal_cents = subtotal_cents + excluded.subtotal_cents,
+                vat_cents = vat_cents + excluded.vat_cents,
+                total_cents = total_cents + excluded.total_cents
+            """,
+            (key, sign, sign * subtotal, sign * vat, sign * total),
+        )
+        if sign < 0:
+            cur.execute(f"DELETE FROM {table} WHERE {column}=? AND invoice_count<=0", (key,))
+
+
+def remove_stored_invoice(cur: sqlite3.Cursor, invoice_id: int) -> None:
+    """Subtract the invoice as currently stored, using its stored totals."""
+    cur.execute(
+        "SELECT invoice_date, client_id, vat_rate, subtotal_cents, vat_cents, total_cents FROM invoices WHERE id=?",
+        (invoice_id,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return
+    add_invoice(cur, row[0], row[1], row[2], row[3:], sign=-1)
+
+
+def line_subtotals(cur: sqlite3.Cursor, where: str = "", params: tuple = ()) -> Dict[int, Tuple[int, int]]:
+    """``{invoice_id: (subtotal_cents, line_count)}`` computed from the lines.
+
+    ``where`` is an SQL fragment on ``invoices``; invoices without lines are
+    included with a zero subtotal.
+    """
+    cur.execute(f"SELECT invoices.id FROM invoices {where}", params)
+    subtotals = {row[0]: (0, 0) for row in cur.fetchall()}
+    # Streamed: the line table is by far the largest one.
+    lines = cur.connection.execute(
+        f"""
+        SELECT invoice_id, quantity, unit_price, discount_percent FROM invoice_lines
+        WHERE invoice_id IN (SELECT invoices.id FROM invoices {where})
+        """,
+        params,
+    )
+    for invoice_id, quantity, unit_price, discount in lines:
+        subtotal, count = subtotals[invoice_id]
+        subtotals[invoice_id] = (subtotal + line_total_cents(quantity, unit_price, discount), count + 1)
+    return subtotals
+
+
+def rebuild(cur: sqlite3.Cursor) -> int:
+    """Recompute every aggregate from the invoice lines; returns the number of invoices."""
+    subtotals = line_subtotals(cur)
+    cur.execute("SELECT id, invoice_date, client_id, vat_rate FROM invoices")
+    invoices = cur.fetchall()
+
+    sums: Dict[str, Dict[object, List[int]]] = {table: {} for table in AGGREGATE_TABLES}
+    for invoice_id, invoice_date, client_id, vat_rate in invoices:
+        amounts = amounts_cents(subtotals[invoice_id][0], vat_rate)
+        for table, key in (
+            ("revenue_by_period", period_of(invoice_date)),
+            ("revenue_by_client", client_id),
+            ("revenue_by_vat_rate", vat_rate),
+        ):
+            row = sums[table].setdefault(key, [0, 0, 0, 0])
+            row[0] += 1
+            for position, amount in enumerate(amounts, start=1):
+                row[position] += amount
+
+    for table, rows in sums.items():
+        cur.execute(f"DELETE FROM {table}")
+        cur.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?)", [(key, *row) for key, row in rows.items()])
+    return len(invoices)
+
+
+__all__ = [
+    "AGGREGATE_TABLES",
+    "add_invoice",
+    "amounts_cents",
+    "create_tables",
+    "line_subtotals",
+    "period_of",
+    "rebuild",
+    "remove_stored_invoice",
+]
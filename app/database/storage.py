@@ -1,102 +1,152 @@
-import json
+import re
 import sqlite3
+import threading
 from contextlib import contextmanager
-from dataclasses import asdict
+from dataclasses import asdict, fields
 from datetime import date
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from app.logic.models import Client, Invoice, InvoiceLine, Item, Settings
+from app.database import events, migrations, reports
+from app.logic.models import (
+    Client,
+    Invoice,
+    InvoiceHit,
+    InvoiceLines,
+    InvoicePage,
+    InvoiceSummary,
+    Item,
+    RevenueSummary,
+    Settings,
+    TotalsMismatch,
+    to_cents,
+)
 
 DB_PATH = Path("fte_facturation.db")
 
 
 def init_db() -> None:
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS clients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                company TEXT NOT NULL,
-                street TEXT NOT NULL,
-                zip_code TEXT NOT NULL,
-                city TEXT NOT NULL,
-                country TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                internal_code TEXT
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                reference TEXT NOT NULL,
-                description TEXT NOT NULL,
-                unit_price REAL NOT NULL,
-                default_quantity REAL NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS invoices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                number TEXT NOT NULL,
-                invoice_date TEXT NOT NULL,
-                client_id INTEGER NOT NULL,
-                notes TEXT,
-                vat_rate REAL NOT NULL,
-                FOREIGN KEY(client_id) REFERENCES clients(id)
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS invoice_lines (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_id INTEGER NOT NULL,
-                article_number TEXT,
-                description TEXT NOT NULL,
-                quantity REAL NOT NULL,
-                unit_price REAL NOT NULL,
-                discount_percent REAL,
-                item_id INTEGER,
-                FOREIGN KEY(invoice_id) REFERENCES invoices(id),
-                FOREIGN KEY(item_id) REFERENCES items(id)
-            )
-            """
-        )
-        _migrate_invoice_lines_table(cur)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS settings (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                data TEXT NOT NULL
-            )
-            """
-        )
-        conn.commit()
+    with connection() as conn:
+        migrations.migrate(conn)
+
+
+def rename_duplicates(table: str) -> List[Tuple[str, str]]:
+    """Repair the rows behind a :class:`migrations.DuplicateRecordsError` so that ``init_db`` can go on."""
+    with connection() as conn:
+        renamed = migrations.rename_duplicates(conn, table)
+    events.publish(events.ITEMS if table == "items" else events.INVOICES)
+    return renamed
+
+
+class ConnectionManager:
+    """Hand out one long-lived, tuned SQLite connection per thread.
+
+    WAL journaling lets readers run while another connection is writing, so a
+    report does not block an invoice being saved. Connections are reopened
+    when ``DB_PATH`` changes and closed together by :meth:`close_all`.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA foreign_keys=ON",
+        "PRAGMA cache_size=-32000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA temp_store=MEMORY",
+    )
+
+    def __init__(self, busy_timeout: float = 10.0):
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
 
+    def get(self, path: Path) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.path == path:
+            return conn
+        if conn is not None:
+            self._discard(conn)
+        conn = sqlite3.connect(path, timeout=self.busy_timeout, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        self._local.conn = conn
+        self._local.path = path
+        self._local.data_version = None
+        with self._lock:
+            self._connections.append(conn)
+        return conn
 
-def _migrate_invoice_lines_table(cur: sqlite3.Cursor) -> None:
-    cur.execute("PRAGMA table_info(invoice_lines)")
-    columns = {row[1] for row in cur.fetchall()}
-    if "article_number" not in columns:
-        cur.execute("ALTER TABLE invoice_lines ADD COLUMN article_number TEXT DEFAULT ''")
-    if "discount_percent" not in columns:
-        cur.execute("ALTER TABLE invoice_lines ADD COLUMN discount_percent REAL DEFAULT 0.0")
+    def changed_elsewhere(self, path: Path) -> bool:
+        """Whether another connection committed since this thread last asked.
+
+        SQLite bumps ``PRAGMA data_version`` on a connection when any other
+        connection, in this process or another, commits. The counter is per
+        connection, so the last value seen is kept per thread; the first call
+        on a connection has nothing to compare with and answers ``True``.
+        """
+        conn = self.get(path)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._local.data_version
+        self._local.data_version = version
+        return changed
+
+    def close_thread(self) -> None:
+        """Close the calling thread's connection, e.g. when a worker exits."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            self._discard(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+
+_connections = ConnectionManager()
 
 
 @contextmanager
 def connection():
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connections.get(DB_PATH)
     try:
         yield conn
-    finally:
-        conn.close()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def changed_elsewhere() -> bool:
+    """Cheap check for writes made through other connections, e.g. the service."""
+    return _connections.changed_elsewhere(DB_PATH)
+
+
+def close_connections() -> None:
+    """Close every connection opened by this module (call on shutdown)."""
+    _connections.close_all()
+
+
+def _client_from_row(row) -> Client:
+    return Client(
+        id=row[0],
+        company=row[1],
+        street=row[2],
+        zip_code=row[3],
+        city=row[4],
+        country=row[5],
+        email=row[6] or "",
+        phone=row[7] or "",
+        internal_code=row[8] or "",
+    )
 
 
 def save_client(client: Client) -> Client:
@@ -140,28 +190,25 @@ def save_client(client: Client) -> Client:
             )
             client.id = cur.lastrowid
         conn.commit()
+    events.publish(events.CLIENTS, [client])
     return client
 
 
-def list_clients() -> List[Client]:
+def list_clients(offset: int = 0, limit: Optional[int] = None) -> List[Client]:
     with connection() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT id, company, street, zip_code, city, country, email, phone, internal_code FROM clients ORDER BY company")
-        rows = cur.fetchall()
-    return [
-        Client(
-            id=row[0],
-            company=row[1],
-            street=row[2],
-            zip_code=row[3],
-            city=row[4],
-            country=row[5],
-            email=row[6] or "",
-            phone=row[7] or "",
-            internal_code=row[8] or "",
+        cur.execute(
+            "SELECT id, company, street, zip_code, city, country, email, phone, internal_code FROM clients "
+            "ORDER BY company, id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
         )
-        for row in rows
-    ]
+        rows = cur.fetchall()
+    return [_client_from_row(row) for row in rows]
+
+
+def count_clients() -> int:
+    with connection() as conn:
+        return conn.execute("SELECT count(*) FROM clients").fetchone()[0]
 
 
 def save_item(item: Item) -> Item:
@@ -186,13 +233,18 @@ def save_item(item: Item) -> Item:
             )
             item.id = cur.lastrowid
         conn.commit()
+    events.publish(events.ITEMS, [item])
     return item
 
 
-def list_items() -> List[Item]:
+def list_items(offset: int = 0, limit: Optional[int] = None) -> List[Item]:
     with connection() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT id, reference, description, unit_price, default_quantity FROM items ORDER BY reference")
+        cur.execute(
+            "SELECT id, reference, description, unit_price, default_quantity FROM items "
+            "ORDER BY reference, id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        )
         rows = cur.fetchall()
     return [
         Item(id=row[0], reference=row[1], description=row[2], unit_price=row[3], default_quantity=row[4])
@@ -200,6 +252,21 @@ def list_items() -> List[Item]:
     ]
 
 
+def count_items() -> int:
+    with connection() as conn:
+        return conn.execute("SELECT count(*) FROM items").fetchone()[0]
+
+
+def load_item(item_id: int) -> Item:
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT id, reference, description, unit_price, default_quantity FROM items WHERE id=?", (item_id,)
+        ).fetchone()
+    if not row:
+        raise ValueError("Item not found")
+    return Item(id=row[0], reference=row[1], description=row[2], unit_price=row[3], default_quantity=row[4])
+
+
 def get_item_by_reference(reference: str) -> Optional[Item]:
     if not reference:
         return None
@@ -228,6 +295,92 @@ def upsert_item(item: Item) -> Item:
     return save_item(item)
 
 
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def reference_key(reference: str) -> str:
+    # Mirrors SQLite's lower(), which only folds ASCII letters.
+    return reference.translate(_ASCII_LOWER)
+
+
+def _parse_item_row(row: Tuple[object, object, object]) -> Optional[Tuple[str, str, float]]:
+    reference, description, price = row
+    reference = str(reference or "").strip()
+    if not reference:
+        return None
+    try:
+        unit_price = float(str(price if price is not None else "").strip().replace(",", "."))
+    except ValueError:
+        return None
+    return reference, str(description or "").strip(), unit_price
+
+
+def _upsert_item_batch(cur: sqlite3.Cursor, batch: List[Tuple[str, str, float]], seen: Set[str]) -> Tuple[int, int]:
+    keys = {reference_key(reference) for reference, _, _ in batch} - seen
+    existing: Set[str] = set()
+    if keys:
+        placeholders = ", ".join("?" for _ in keys)
+        cur.execute(f"SELECT lower(reference) FROM items WHERE lower(reference) IN ({placeholders})", tuple(keys))
+        existing = {row[0] for row in cur.fetchall()}
+    inserted = updated = 0
+    for reference, _, _ in batch:
+        key = reference_key(reference)
+        if key in seen or key in existing:
+            updated += 1
+        else:
+            inserted += 1
+        seen.add(key)
+    cur.executemany(
+        """
+        INSERT INTO items(reference, description, unit_price, default_quantity)
+        VALUES (?, ?, ?, 1.0)
+        ON CONFLICT(lower(reference)) DO UPDATE
+        SET reference=excluded.reference, description=excluded.description, unit_price=excluded.unit_price
+        """,
+        batch,
+    )
+    return inserted, updated
+
+
+def import_items(
+    rows: Iterable[Tuple[object, object, object]],
+    batch_size: int = 500,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Tuple[int, int, int]:
+    """Upsert raw ``(reference, description, price)`` rows in a single transaction.
+
+    Rows are consumed lazily and written in batches of ``batch_size``. Matching
+    on the reference is case-insensitive; existing articles keep their default
+    quantity. Rows without a reference or with an unreadable price are skipped.
+    ``progress`` is called with the number of rows read every ``batch_size``
+    rows; an exception raised from it aborts the import and rolls it back.
+    Returns ``(inserted, updated, skipped)``.
+    """
+    inserted = updated = skipped = 0
+    seen: Set[str] = set()
+    batch: List[Tuple[str, str, float]] = []
+    with connection() as conn:
+        cur = conn.cursor()
+        for read, row in enumerate(rows, start=1):
+            if progress is not None and read % batch_size == 0:
+                progress(read)
+            record = _parse_item_row(row)
+            if record is None:
+                skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                added, changed = _upsert_item_batch(cur, batch, seen)
+                inserted, updated = inserted + added, updated + changed
+                batch = []
+        if batch:
+            added, changed = _upsert_item_batch(cur, batch, seen)
+            inserted, updated = inserted + added, updated + changed
+        conn.commit()
+    events.publish(events.ITEMS)
+    return inserted, updated, skipped
+
+
 def _load_client(conn: sqlite3.Connection, client_id: int) -> Client:
     cur = conn.cursor()
     cur.execute(
@@ -237,17 +390,7 @@ def _load_client(conn: sqlite3.Connection, client_id: int) -> Client:
     row = cur.fetchone()
     if not row:
         raise ValueError("Client not found")
-    return Client(
-        id=row[0],
-        company=row[1],
-        street=row[2],
-        zip_code=row[3],
-        city=row[4],
-        country=row[5],
-        email=row[6] or "",
-        phone=row[7] or "",
-        internal_code=row[8] or "",
-    )
+    return _client_from_row(row)
 
 
 def load_client(client_id: int) -> Client:
@@ -255,137 +398,803 @@ def load_client(client_id: int) -> Client:
         return _load_client(conn, client_id)
 
 
+class DuplicateNumberError(ValueError):
+    """The invoice number is already used by another invoice."""
+
+
 def save_invoice(invoice: Invoice) -> Invoice:
+    """Insert or update ``invoice`` with its lines in a single transaction.
+
+    An invoice without a number gets the next free one from the invoice
+    sequence, allocated inside the same transaction so concurrent writers
+    never share a number. A number already used by another invoice raises
+    :class:`DuplicateNumberError`.
+    """
+    amounts = (invoice.subtotal_cents, invoice.vat_cents, invoice.total_cents, len(invoice.lines))
+    number = invoice.number
+    invoice_id = invoice.id
+    try:
+        with connection() as conn:
+            cur = conn.cursor()
+            if not number:
+                number = _allocate_invoice_numbers(cur, _load_settings(conn), 1)[0]
+            if invoice_id:
+                reports.remove_stored_invoice(cur, invoice_id)
+                cur.execute(
+                    """
+                    UPDATE invoices SET number=?, invoice_date=?, client_id=?, notes=?, vat_rate=?,
+                        subtotal_cents=?, vat_cents=?, total_cents=?, line_count=?
+                    WHERE id=?
+                    """,
+                    (
+                        number,
+                        invoice.invoice_date.isoformat(),
+                        invoice.client.id,
+                        invoice.notes,
+                        invoice.vat_rate,
+                        *amounts,
+                        invoice_id,
+                    ),
+                )
+            else:
+                cur.execute(
+                    """
+                    INSERT INTO invoices(number, invoice_date, client_id, notes, vat_rate,
+                        subtotal_cents, vat_cents, total_cents, line_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        number,
+                        invoice.invoice_date.isoformat(),
+                        invoice.client.id,
+                        invoice.notes,
+                        invoice.vat_rate,
+                        *amounts,
+                    ),
+                )
+                invoice_id = cur.lastrowid
+
+            _save_lines(cur, invoice_id, invoice.lines)
+            reports.add_invoice(cur, invoice.invoice_date.isoformat(), invoice.client.id, invoice.vat_rate, amounts[:3])
+            conn.commit()
+    except sqlite3.IntegrityError as exc:
+        if "invoices.number" in str(exc):
+            raise DuplicateNumberError(f"Le numéro de facture {number} est déjà utilisé") from exc
+        raise
+    invoice.id = invoice_id
+    invoice.number = number
+    events.publish(events.INVOICES, [invoice])
+    return invoice
+
+
+def _save_lines(cur: sqlite3.Cursor, invoice_id: int, lines: InvoiceLines) -> None:
+    """Bring the stored lines of invoice ``invoice_id`` in line with ``lines``.
+
+    Lines are matched on their id: unchanged rows are left alone, and only
+    the rows to delete, update or insert are written, each kind with a
+    single ``executemany``. Lines without a known id are inserted and get
+    their new id assigned.
+    """
+    cur.execute(
+        """
+        SELECT id, position, article_number, description, quantity, unit_price, discount_percent, item_id
+        FROM invoice_lines WHERE invoice_id=?
+        """,
+        (invoice_id,),
+    )
+    stored = {row[0]: row[1:] for row in cur.fetchall()}
+    inserts = []
+    updates = []
+    for position, line in enumerate(lines):
+        values = (
+            position,
+            line.article_number,
+            line.description,
+            line.quantity,
+            line.unit_price,
+            line.discount_percent,
+            line.item.id if line.item else None,
+        )
+        current = stored.pop(line.id, None) if line.id is not None else None
+        if current is None:
+            inserts.append((invoice_id, *values))
+        elif current != values:
+            updates.append((*values, line.id))
+    # Whatever was not matched has been removed from the invoice.
+    cur.executemany("DELETE FROM invoice_lines WHERE id=?", [(line_id,) for line_id in stored])
+    cur.executemany(
+        """
+        UPDATE invoice_lines SET position=?, article_number=?, description=?, quantity=?, unit_price=?,
+            discount_percent=?, item_id=?
+        WHERE id=?
+        """,
+        updates,
+    )
+    cur.executemany(
+        """
+        INSERT INTO invoice_lines(invoice_id, position, article_number, description, quantity, unit_price,
+            discount_percent, item_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        inserts,
+    )
+    if inserts:
+        cur.execute("SELECT id FROM invoice_lines WHERE invoice_id=? ORDER BY position", (invoice_id,))
+        lines.assign_ids(row[0] for row in cur.fetchall())
+
+
+def _load_invoices(conn: sqlite3.Connection, where: str = "", params: tuple = ()) -> List[Invoice]:
+    """Load invoices matching ``where`` with a fixed number of queries.
+
+    Invoices and their clients come from a single JOIN, then every line and
+    every referenced item is fetched in one pass each, whatever the number of
+    invoices. ``where`` is an SQL fragment on the ``invoices`` table.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT invoices.id, invoices.number, invoices.invoice_date, invoices.notes, invoices.vat_rate,
+               clients.id, clients.company, clients.street, clients.zip_code, clients.city,
+               clients.country, clients.email, clients.phone, clients.internal_code
+        FROM invoices JOIN clients ON clients.id = invoices.client_id
+        {where}
+        ORDER BY invoices.id DESC
+        """,
+        params,
+    )
+    invoice_rows = cur.fetchall()
+    if not invoice_rows:
+        return []
+
+    subquery = f"SELECT invoices.id FROM invoices {where}"
+    cur.execute(
+        f"""
+        SELECT id, reference, description, unit_price, default_quantity FROM items
+        WHERE id IN (SELECT item_id FROM invoice_lines WHERE invoice_id IN ({subquery}))
+        """,
+        params,
+    )
+    item_map = {
+        row[0]: Item(id=row[0], reference=row[1], description=row[2], unit_price=row[3], default_quantity=row[4])
+        for row in cur.fetchall()
+    }
+
+    cur.execute(
+        f"""
+        SELECT invoice_id, article_number, description, quantity, unit_price, discount_percent, item_id, id
+        FROM invoice_lines WHERE invoice_id IN ({subquery})
+        ORDER BY invoice_id, position
+        """,
+        params,
+    )
+    # Lines go straight into per-invoice columns; no InvoiceLine object is built.
+    columns_by_invoice: dict[int, tuple] = {}
+    for invoice_id, article_number, description, quantity, unit_price, discount_percent, item_id, line_id in cur:
+        columns = columns_by_invoice.get(invoice_id)
+        if columns is None:
+            columns = columns_by_invoice[invoice_id] = ([], [], [], [], [], [], [])
+        columns[0].append(item_map.get(item_id) if item_id else None)
+        columns[1].append(article_number or "")
+        columns[2].append(description)
+        columns[3].append(quantity)
+        columns[4].append(unit_price)
+        columns[5].append(discount_percent or 0.0)
+        columns[6].append(line_id)
+
+    clients: dict[int, Client] = {}
+    invoices: List[Invoice] = []
+    for row in invoice_rows:
+        client_id = row[5]
+        client = clients.get(client_id)
+        if client is None:
+            client = clients[client_id] = _client_from_row(row[5:])
+        invoices.append(
+            Invoice(
+                id=row[0],
+                number=row[1],
+                invoice_date=date.fromisoformat(row[2]),
+                client=client,
+                lines=InvoiceLines.from_columns(*columns_by_invoice.get(row[0], ([], [], [], [], [], [], []))),
+                notes=row[3] or "",
+                vat_rate=row[4],
+            )
+        )
+    return invoices
+
+
+def invoice_filter(
+    number_from: Optional[str] = None,
+    number_to: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    client_id: Optional[int] = None,
+    number_prefix: Optional[str] = None,
+    min_total: Optional[float] = None,
+    max_total: Optional[float] = None,
+) -> Tuple[str, tuple]:
+    """``WHERE`` fragment on ``invoices`` for inclusive number/date/amount ranges and a client.
+
+    Shared by the listings and the ledger export so that both select the
+    same invoices for the same filter.
+    """
+    conditions = []
+    params: list = []
+    if number_prefix:
+        # A range rather than LIKE, so the unique index on the number can serve it.
+        conditions.append("invoices.number >= ? AND invoices.number < ?")
+        params.extend([number_prefix, number_prefix[:-1] + chr(ord(number_prefix[-1]) + 1)])
+    if min_total is not None:
+        conditions.append("invoices.total_cents >= ?")
+        params.append(to_cents(min_total))
+    if max_total is not None:
+        conditions.append("invoices.total_cents <= ?")
+        params.append(to_cents(max_total))
+    if number_from:
+        conditions.append("invoices.number >= ?")
+        params.append(number_from)
+    if number_to:
+        conditions.append("invoices.number <= ?")
+        params.append(number_to)
+    if date_from:
+        conditions.append("invoices.invoice_date >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        conditions.append("invoices.invoice_date <= ?")
+        params.append(date_to.isoformat())
+    if client_id is not None:
+        conditions.append("invoices.client_id = ?")
+        params.append(client_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, tuple(params)
+
+
+def list_invoices(
+    conn: Optional[sqlite3.Connection] = None,
+    *,
+    number_from: Optional[str] = None,
+    number_to: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    client_id: Optional[int] = None,
+) -> List[Invoice]:
+    """Load invoices, optionally restricted to inclusive number/date ranges or a client."""
+    where, params = invoice_filter(number_from, number_to, date_from, date_to, client_id)
+    if conn is not None:
+        return _load_invoices(conn, where, params)
+    with connection() as own_conn:
+        return _load_invoices(own_conn, where, params)
+
+
+def list_invoice_summaries(
+    *,
+    number_from: Optional[str] = None,
+    number_to: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    client_id: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[InvoiceSummary]:
+    """Invoices with their stored totals, newest first, without reading any line."""
+    where, params = invoice_filter(number_from, number_to, date_from, date_to, client_id)
+    with connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT invoices.id, invoices.number, invoices.invoice_date, invoices.client_id, clients.company,
+                   invoices.line_count, invoices.subtotal_cents, invoices.vat_cents, invoices.total_cents
+            FROM invoices JOIN clients ON clients.id = invoices.client_id
+            {where}
+            ORDER BY invoices.id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (*params, -1 if limit is None else limit, offset),
+        ).fetchall()
+    return [InvoiceSummary(row[0], row[1], date.fromisoformat(row[2]), *row[3:]) for row in rows]
+
+
+def query_invoices(
+    *,
+    client_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    number_prefix: Optional[str] = None,
+    min_total: Optional[float] = None,
+    max_total: Optional[float] = None,
+    after: Optional[Tuple[str, int]] = None,
+    limit: int = 50,
+) -> InvoicePage:
+    """One page of invoices, newest first (by date, then id), with stored totals.
+
+    Pagination is by keyset: pass the previous page's ``next_cursor`` as
+    ``after`` to continue. Every page costs the same, however deep, and
+    rows inserted meanwhile never shift or duplicate results. Amount bounds
+    apply to the invoice total and are inclusive, like the date bounds.
+    """
+    where, params = invoice_filter(
+        date_from=date_from,
+        date_to=date_to,
+        client_id=client_id,
+        number_prefix=number_prefix,
+        min_total=min_total,
+        max_total=max_total,
+    )
+    if after is not None:
+        where = f"{where} AND" if where else "WHERE"
+        where += " (invoices.invoice_date, invoices.id) < (?, ?)"
+        params += tuple(after)
+    with connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT invoices.id, invoices.number, invoices.invoice_date, invoices.client_id, clients.company,
+                   invoices.line_count, invoices.subtotal_cents, invoices.vat_cents, invoices.total_cents
+            FROM invoices JOIN clients ON clients.id = invoices.client_id
+            {where}
+            ORDER BY invoices.invoice_date DESC, invoices.id DESC
+            LIMIT ?
+            """,
+            (*params, limit + 1),
+        ).fetchall()
+    invoices = [InvoiceSummary(row[0], row[1], date.fromisoformat(row[2]), *row[3:]) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = invoices[-1]
+        next_cursor = (last.invoice_date.isoformat(), last.id)
+    return InvoicePage(invoices, next_cursor)
+
+
+def estimate_invoice_count(
+    *,
+    client_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    number_prefix: Optional[str] = None,
+    min_total: Optional[float] = None,
+    max_total: Optional[float] = None,
+    cap: int = 10000,
+) -> Tuple[int, bool]:
+    """Number of invoices matching the filters, counted up to ``cap``.
+
+    Returns ``(count, exact)``; when ``exact`` is false there are more than
+    ``cap`` matches and counting stopped there.
+    """
+    where, params = invoice_filter(
+        date_from=date_from,
+        date_to=date_to,
+        client_id=client_id,
+        number_prefix=number_prefix,
+        min_total=min_total,
+        max_total=max_total,
+    )
+    with connection() as conn:
+        count = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM invoices {where} LIMIT ?)", (*params, cap + 1)
+        ).fetchone()[0]
+    return min(count, cap), count <= cap
+
+
+def check_invoice_totals(repair: bool = False) -> List[TotalsMismatch]:
+    """Compare every invoice's stored totals with its lines.
+
+    With ``repair``, mismatching rows are rewritten from the lines and the
+    revenue aggregates rebuilt, in one transaction.
+    """
     with connection() as conn:
         cur = conn.cursor()
-        if invoice.id:
-            cur.execute(
-                """
-                UPDATE invoices SET number=?, invoice_date=?, client_id=?, notes=?, vat_rate=? WHERE id=?
+        computed_subtotals = reports.line_subtotals(cur)
+        cur.execute("SELECT id, number, vat_rate, subtotal_cents, vat_cents, total_cents, line_count FROM invoices")
+        mismatches = []
+        for invoice_id, number, vat_rate, *stored in cur.fetchall():
+            subtotal, line_count = computed_subtotals[invoice_id]
+            computed = (*reports.amounts_cents(subtotal, vat_rate), line_count)
+            if tuple(stored) != computed:
+                mismatches.append(TotalsMismatch(invoice_id, number, tuple(stored), computed))
+        if repair and mismatches:
+            cur.executemany(
+                "UPDATE invoices SET subtotal_cents=?, vat_cents=?, total_cents=?, line_count=? WHERE id=?",
+                [(*mismatch.computed, mismatch.invoice_id) for mismatch in mismatches],
+            )
+            reports.rebuild(cur)
+            conn.commit()
+    if repair and mismatches:
+        events.publish(events.INVOICES)
+    return mismatches
+
+
+def load_invoice(invoice_id: int) -> Invoice:
+    with connection() as conn:
+        invoices = _load_invoices(conn, "WHERE invoices.id = ?", (invoice_id,))
+    if not invoices:
+        raise ValueError("Invoice not found")
+    return invoices[0]
+
+
+def revenue_by_period(period_from: Optional[str] = None, period_to: Optional[str] = None) -> List[RevenueSummary]:
+    """Revenue per month, oldest first; periods are ``YYYY-MM`` and bounds inclusive."""
+    clauses = []
+    params: List[str] = []
+    if period_from:
+        clauses.append("period >= ?")
+        params.append(period_from)
+    if period_to:
+        clauses.append("period <= ?")
+        params.append(period_to)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT period, period, invoice_count, subtotal_cents, vat_cents, total_cents
+            FROM revenue_by_period {where}
+            ORDER BY period
+            """,
+            params,
+        ).fetchall()
+    return [RevenueSummary(*row) for row in rows]
+
+
+def revenue_by_client(limit: Optional[int] = None) -> List[RevenueSummary]:
+    """Revenue per client, largest total first."""
+    with connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT revenue_by_client.client_id, COALESCE(clients.company, ''), invoice_count,
+                   subtotal_cents, vat_cents, total_cents
+            FROM revenue_by_client
+            LEFT JOIN clients ON clients.id = revenue_by_client.client_id
+            ORDER BY total_cents DESC, revenue_by_client.client_id
+            LIMIT ?
+            """,
+            (-1 if limit is None else limit,),
+        ).fetchall()
+    return [RevenueSummary(*row) for row in rows]
+
+
+def revenue_by_vat_rate() -> List[RevenueSummary]:
+    with connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT vat_rate, invoice_count, subtotal_cents, vat_cents, total_cents
+            FROM revenue_by_vat_rate
+            ORDER BY vat_rate
+            """
+        ).fetchall()
+    return [RevenueSummary(row[0], f"{row[0] * 100:.1f} %", *row[1:]) for row in rows]
+
+
+def rebuild_reports() -> int:
+    """Recompute the revenue aggregates from scratch; returns the number of invoices."""
+    with connection() as conn:
+        count = reports.rebuild(conn.cursor())
+        conn.commit()
+    events.publish(events.INVOICES)
+    return count
+
+
+def _fts_query(text: str) -> str:
+    # Every word must match, each as a prefix: "rue cent" finds "Rue Centrale".
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text))
+
+
+# Invoice lines are by far the largest index: ranking every line matching a
+# common prefix is too slow for type-ahead, so only the most recent line
+# matches are ranked. Clients, articles and invoice headers rank all matches.
+SEARCH_CANDIDATES = 1000
+
+
+def _fts_ranked(fts_table: str) -> str:
+    # FTS5 keeps only the best :limit rows while ranking, rather than sorting every match.
+    return f"SELECT rowid AS id, rank FROM {fts_table} WHERE {fts_table} MATCH :query ORDER BY rank LIMIT :limit"
+
+
+def _fts_recent(fts_table: str) -> str:
+    return (
+        f"SELECT rowid AS id, rank FROM {fts_table} WHERE {fts_table} MATCH :query "
+        "ORDER BY rowid DESC LIMIT :candidates"
+    )
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name='clients_fts'").fetchone() is not None
+
+
+def _like_pattern(text: str) -> str:
+    return "%" + text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_clients(text: str, limit: int = 20) -> List[Client]:
+    """Clients matching every word of ``text`` as a prefix, best matches first."""
+    query = _fts_query(text)
+    if not query:
+        return []
+    columns = (
+        "clients.id, clients.company, clients.street, clients.zip_code, clients.city, "
+        "clients.country, clients.email, clients.phone, clients.internal_code"
+    )
+    with connection() as conn:
+        if _has_fts(conn):
+            cur = conn.execute(
+                f"""
+                SELECT {columns} FROM ({_fts_ranked("clients_fts")}) AS hits JOIN clients ON clients.id = hits.id
+                ORDER BY hits.rank, clients.company
                 """,
-                (
-                    invoice.number,
-                    invoice.invoice_date.isoformat(),
-                    invoice.client.id,
-                    invoice.notes,
-                    invoice.vat_rate,
-                    invoice.id,
-                ),
+                {"query": query, "limit": limit},
             )
-            cur.execute("DELETE FROM invoice_lines WHERE invoice_id=?", (invoice.id,))
         else:
-            cur.execute(
-                """
-                INSERT INTO invoices(number, invoice_date, client_id, notes, vat_rate)
-                VALUES (?, ?, ?, ?, ?)
+            cur = conn.execute(
+                f"SELECT {columns} FROM clients WHERE company LIKE ? ESCAPE '\\' ORDER BY company LIMIT ?",
+                (_like_pattern(text), limit),
+            )
+        rows = cur.fetchall()
+    return [_client_from_row(row) for row in rows]
+
+
+def search_items(text: str, limit: int = 50) -> List[Item]:
+    """Articles whose reference or description matches every word of ``text`` as a prefix."""
+    query = _fts_query(text)
+    if not query:
+        return []
+    columns = "items.id, items.reference, items.description, items.unit_price, items.default_quantity"
+    with connection() as conn:
+        if _has_fts(conn):
+            cur = conn.execute(
+                f"""
+                SELECT {columns} FROM ({_fts_ranked("items_fts")}) AS hits JOIN items ON items.id = hits.id
+                ORDER BY hits.rank, items.reference
                 """,
-                (
-                    invoice.number,
-                    invoice.invoice_date.isoformat(),
-                    invoice.client.id,
-                    invoice.notes,
-                    invoice.vat_rate,
-                ),
+                {"query": query, "limit": limit},
             )
-            invoice.id = cur.lastrowid
+        else:
+            pattern = _like_pattern(text)
+            cur = conn.execute(
+                f"""
+                SELECT {columns} FROM items WHERE reference LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\'
+                ORDER BY reference LIMIT ?
+                """,
+                (pattern, pattern, limit),
+            )
+        rows = cur.fetchall()
+    return [
+        Item(id=row[0], reference=row[1], description=row[2], unit_price=row[3], default_quantity=row[4])
+        for row in rows
+    ]
 
-        for line in invoice.lines:
-            cur.execute(
+
+def search_invoices(text: str, limit: int = 50) -> List[InvoiceHit]:
+    """Invoices whose number, notes or line text match ``text``, best matches first."""
+    query = _fts_query(text)
+    if not query:
+        return []
+    with connection() as conn:
+        if _has_fts(conn):
+            cur = conn.execute(
+                f"""
+                SELECT invoices.id, invoices.number, invoices.invoice_date, clients.company
+                FROM (
+                    SELECT id AS invoice_id, rank FROM ({_fts_ranked("invoices_fts")})
+                    UNION ALL
+                    SELECT invoice_lines.invoice_id, line_hits.rank
+                    FROM ({_fts_recent("invoice_lines_fts")}) AS line_hits
+                    JOIN invoice_lines ON invoice_lines.id = line_hits.id
+                ) AS hits
+                JOIN invoices ON invoices.id = hits.invoice_id
+                JOIN clients ON clients.id = invoices.client_id
+                GROUP BY invoices.id
+                ORDER BY MIN(hits.rank), invoices.id DESC
+                LIMIT :limit
+                """,
+                {"query": query, "candidates": SEARCH_CANDIDATES, "limit": limit},
+            )
+        else:
+            cur = conn.execute(
                 """
-                INSERT INTO invoice_lines(invoice_id, article_number, description, quantity, unit_price, discount_percent, item_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                SELECT invoices.id, invoices.number, invoices.invoice_date, clients.company
+                FROM invoices JOIN clients ON clients.id = invoices.client_id
+                WHERE invoices.number LIKE :pattern ESCAPE '\\' OR invoices.notes LIKE :pattern ESCAPE '\\'
+                   OR invoices.id IN (
+                       SELECT invoice_id FROM invoice_lines
+                       WHERE description LIKE :pattern ESCAPE '\\' OR article_number LIKE :pattern ESCAPE '\\'
+                   )
+                ORDER BY invoices.id DESC
+                LIMIT :limit
                 """,
-                (
-                    invoice.id,
-                    line.article_number,
-                    line.description,
-                    line.quantity,
-                    line.unit_price,
-                    line.discount_percent,
-                    line.item.id if line.item else None,
-                ),
+                {"pattern": _like_pattern(text), "limit": limit},
             )
-        conn.commit()
-    return invoice
+        rows = cur.fetchall()
+    return [
+        InvoiceHit(id=row[0], number=row[1], invoice_date=date.fromisoformat(row[2]), client_company=row[3])
+        for row in rows
+    ]
 
 
-def list_invoices(conn: Optional[sqlite3.Connection] = None) -> List[Invoice]:
-    own_conn = False
-    if conn is None:
-        conn = sqlite3.connect(DB_PATH)
-        own_conn = True
-    cur = conn.cursor()
-    cur.execute("SELECT id, number, invoice_date, client_id, notes, vat_rate FROM invoices ORDER BY id DESC")
-    rows = cur.fetchall()
-    invoices: List[Invoice] = []
-    for row in rows:
-        client = _load_client(conn, row[3])
+INVOICE_SEQUENCE = "invoice"
+
+
+def _allocate_invoice_numbers(cur: sqlite3.Cursor, settings: Settings, count: int) -> List[str]:
+    """Reserve the next ``count`` free invoice numbers.
+
+    The first UPDATE takes the write lock, so the read-increment cannot
+    interleave with another writer's. Values whose number is already taken
+    (an invoice saved with an explicit number, or a next number lowered in
+    the settings) are skipped, and the sequence moves past them.
+    """
+    numbers: List[str] = []
+    while len(numbers) < count:
+        missing = count - len(numbers)
         cur.execute(
-            "SELECT article_number, description, quantity, unit_price, discount_percent, item_id FROM invoice_lines WHERE invoice_id=?",
-            (row[0],),
+            "UPDATE sequences SET next_value = next_value + ? WHERE name = ? RETURNING next_value - ?",
+            (missing, INVOICE_SEQUENCE, missing),
         )
-        line_rows = cur.fetchall()
-        item_map = {item.id: item for item in list_items()}
-        lines: List[InvoiceLine] = []
-        for article_number, description, quantity, unit_price, discount_percent, item_id in line_rows:
-            item = item_map.get(item_id) if item_id else None
-            lines.append(
-                InvoiceLine(
-                    item=item,
-                    article_number=article_number or "",
-                    description=description,
-                    quantity=quantity,
-                    unit_price=unit_price,
-                    discount_percent=discount_percent or 0.0,
-                )
-            )
-        invoices.append(
-            Invoice(
-                id=row[0],
-                number=row[1],
-                invoice_date=date.fromisoformat(row[2]),
-                client=client,
-                lines=lines,
-                notes=row[4] or "",
-                vat_rate=row[5],
-            )
+        first = cur.fetchone()[0]
+        candidates = [settings.format_invoice_number(value) for value in range(first, first + missing)]
+        cur.execute(
+            f"SELECT number FROM invoices WHERE number IN ({', '.join('?' * missing)})",
+            candidates,
         )
-    if own_conn:
-        conn.close()
-    return invoices
+        taken = {row[0] for row in cur.fetchall()}
+        numbers.extend(number for number in candidates if number not in taken)
+    return numbers
+
+
+def _next_invoice_value(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT next_value FROM sequences WHERE name = ?", (INVOICE_SEQUENCE,)).fetchone()
+    return row[0] if row else 1
+
+
+def _next_free_number(conn: sqlite3.Connection, settings: Settings) -> str:
+    value = _next_invoice_value(conn)
+    number = settings.format_invoice_number(value)
+    while conn.execute("SELECT 1 FROM invoices WHERE number = ?", (number,)).fetchone():
+        value += 1
+        number = settings.format_invoice_number(value)
+    return number
+
+
+def reserve_invoice_numbers(count: int) -> List[str]:
+    """Reserve a block of ``count`` invoice numbers at once, for batch jobs.
+
+    Reserved numbers are never handed out again, even if they end up unused.
+    Numbers already taken are skipped, so the block may have gaps.
+    """
+    if count < 1:
+        raise ValueError("count must be positive")
+    with connection() as conn:
+        numbers = _allocate_invoice_numbers(conn.cursor(), _load_settings(conn), count)
+        conn.commit()
+    events.publish(events.SETTINGS)
+    return numbers
+
+
+def peek_invoice_number() -> str:
+    """The number the next saved invoice will get, without reserving it (e.g. for a PDF preview)."""
+    with connection() as conn:
+        return _next_free_number(conn, _load_settings(conn))
+
+
+def set_next_invoice_number(value: int) -> None:
+    if value < 1:
+        raise ValueError("Le prochain numéro doit être positif")
+    with connection() as conn:
+        conn.execute("UPDATE sequences SET next_value = ? WHERE name = ?", (value, INVOICE_SEQUENCE))
+        conn.execute("UPDATE sequences SET next_value = next_value + 1 WHERE name = ?", (SETTINGS_VERSION,))
+        conn.commit()
+    events.publish(events.SETTINGS)
+
+
+SETTINGS_VERSION = "settings_version"
+
+# Stored values are coerced back to the type declared on ``Settings``.
+_SETTING_TYPES = {
+    settings_field.name: {"bool": bool, "int": int, "float": float, "str": str}[settings_field.type]
+    for settings_field in fields(Settings)
+}
+
+
+def _load_settings(conn: sqlite3.Connection) -> Settings:
+    values = {
+        key: _SETTING_TYPES[key](value)
+        for key, value in conn.execute("SELECT key, value FROM settings_values")
+        if key in _SETTING_TYPES
+    }
+    # The invoice sequence is the authority on numbering.
+    values["next_number"] = _next_invoice_value(conn)
+    return Settings(**values)
+
+
+# Topic whose caches a write to each versioned table invalidates.
+_TABLE_TOPICS = {
+    "clients": events.CLIENTS,
+    "items": events.ITEMS,
+    "invoices": events.INVOICES,
+    "invoice_lines": events.INVOICES,
+}
+
+
+def table_versions() -> Dict[str, int]:
+    """Write counters per topic, bumped by triggers in every process."""
+    versions: Dict[str, int] = {}
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT name, next_value FROM sequences WHERE name IN ({', '.join('?' * len(_TABLE_TOPICS))})",
+            [f"{table}_version" for table in _TABLE_TOPICS],
+        ).fetchall()
+    for name, value in rows:
+        topic = _TABLE_TOPICS[name[: -len("_version")]]
+        versions[topic] = versions.get(topic, 0) + value
+    return versions
+
+
+def settings_version() -> int:
+    """Counter bumped by every settings save, visible to all processes."""
+    with connection() as conn:
+        row = conn.execute("SELECT next_value FROM sequences WHERE name = ?", (SETTINGS_VERSION,)).fetchone()
+    return row[0] if row else 0
 
 
 def load_settings() -> Settings:
+    """Read the settings from the database; prefer ``cache.settings()`` on hot paths."""
     with connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT data FROM settings WHERE id=1")
-        row = cur.fetchone()
-        if not row:
-            default_settings = Settings()
-            save_settings(default_settings)
-            return default_settings
-        data = json.loads(row[0])
-    return Settings(**data)
+        return _load_settings(conn)
 
 
 def save_settings(settings: Settings) -> None:
+    """Store the settings that changed, one row per key.
+
+    ``next_number`` is not stored here, see :func:`set_next_invoice_number`.
+    """
+    values = asdict(settings)
+    del values["next_number"]
     with connection() as conn:
-        cur = conn.cursor()
-        data = json.dumps(asdict(settings))
-        cur.execute("INSERT OR REPLACE INTO settings(id, data) VALUES (1, ?)", (data,))
+        stored = dict(conn.execute("SELECT key, value FROM settings_values"))
+        changed = [(key, value) for key, value in values.items() if key not in stored or stored[key] != value]
+        if not changed:
+            return
+        conn.executemany(
+            "INSERT INTO settings_values(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            changed,
+        )
+        conn.execute("UPDATE sequences SET next_value = next_value + 1 WHERE name = ?", (SETTINGS_VERSION,))
         conn.commit()
+    events.publish(events.SETTINGS, [settings])
 
 
 __all__ = [
     "init_db",
+    "rename_duplicates",
+    "connection",
+    "close_connections",
+    "changed_elsewhere",
     "save_client",
     "load_client",
     "list_clients",
+    "count_clients",
     "save_item",
+    "load_item",
     "list_items",
+    "count_items",
     "get_item_by_reference",
+    "upsert_item",
+    "reference_key",
+    "import_items",
+    "DuplicateNumberError",
     "save_invoice",
+    "invoice_filter",
     "list_invoices",
+    "list_invoice_summaries",
+    "query_invoices",
+    "estimate_invoice_count",
+    "check_invoice_totals",
+    "load_invoice",
+    "revenue_by_period",
+    "revenue_by_client",
+    "revenue_by_vat_rate",
+    "rebuild_reports",
+    "search_clients",
+    "search_items",
+    "search_invoices",
+    "reserve_invoice_numbers",
+    "peek_invoice_number",
+    "set_next_invoice_number",
+    "table_versions",
+    "settings_version",
     "load_settings",
     "save_settings",
 ]
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from array import array
+from collections.abc import MutableSequence
 from dataclasses import dataclass, field
 from datetime import date
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
 
 
 @dataclass
@@ -27,19 +29,233 @@ class Item:
     default_quantity: float = 1.0
 
 
-@dataclass
+def to_cents(amount: float) -> int:
+    """Convert an amount already rounded to 2 decimals into integer cents."""
+    return int(round(amount * 100))
+
+
+def line_total_cents(quantity: float, unit_price: float, discount_percent: float) -> int:
+    discount_factor = 1 - (discount_percent or 0.0) / 100.0
+    return to_cents(round(quantity * unit_price * discount_factor, 2))
+
+
+def vat_amount_cents(subtotal_cents: int, vat_rate: float) -> int:
+    """VAT on a subtotal, rounded to the cent as printed on the invoice."""
+    return to_cents(round(subtotal_cents / 100 * vat_rate, 2)) if vat_rate else 0
+
+
+def line_totals_cents(quantities: Iterable[float], unit_prices: Iterable[float], discounts: Iterable[float]) -> array:
+    """Column-wise :func:`line_total_cents` over parallel sequences."""
+    return array("q", map(line_total_cents, quantities, unit_prices, discounts))
+
+
+@dataclass(frozen=True, slots=True)
 class InvoiceLine:
+    """A single invoice line.
+
+    Lines are immutable so that the running totals kept by :class:`InvoiceLines`
+    cannot go stale; replace a line (``lines[i] = new_line``) to edit it. ``id``
+    is the stored row; keep it on the replacement so saving updates that row.
+    """
+
     item: Optional[Item]
     article_number: str
     description: str
     quantity: float
     unit_price: float
     discount_percent: float = 0.0
+    id: Optional[int] = field(default=None, compare=False)
+    total_cents: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "total_cents", line_total_cents(self.quantity, self.unit_price, self.discount_percent))
 
     @property
     def total(self) -> float:
-        discount_factor = 1 - (self.discount_percent or 0.0) / 100.0
-        return round(self.quantity * self.unit_price * discount_factor, 2)
+        return self.total_cents / 100
+
+
+class InvoiceLines(MutableSequence):
+    """Columnar list of invoice lines that keeps its sum in integer cents.
+
+    Quantities, unit prices, discounts and line totals live in parallel typed
+    arrays rather than one object per line, and totals for a batch of lines
+    are computed column-wise. Indexing yields :class:`InvoiceLine` values, so
+    callers keep the usual sequence API. Adding, replacing or removing a line
+    adjusts the running sum, so reading the total is O(1).
+    """
+
+    def __init__(self, lines: Iterable[InvoiceLine] = ()):
+        self._reset()
+        self.extend(lines)
+
+    @classmethod
+    def from_columns(
+        cls,
+        items: List[Optional[Item]],
+        article_numbers: List[str],
+        descriptions: List[str],
+        quantities: Iterable[float],
+        unit_prices: Iterable[float],
+        discounts: Iterable[float],
+        ids: Optional[List[Optional[int]]] = None,
+    ) -> "InvoiceLines":
+        lines = cls()
+        if ids is None:
+            ids = [None] * len(items)
+        lines._append_columns(ids, items, article_numbers, descriptions, quantities, unit_prices, discounts)
+        return lines
+
+    def _reset(self) -> None:
+        self._ids: List[Optional[int]] = []
+        self._items: List[Optional[Item]] = []
+        self._article_numbers: List[str] = []
+        self._descriptions: List[str] = []
+        self._quantities = array("d")
+        self._unit_prices = array("d")
+        self._discounts = array("d")
+        self._cents = array("q")
+        self.total_cents = 0
+
+    def _append_columns(self, ids, items, article_numbers, descriptions, quantities, unit_prices, discounts) -> None:
+        quantities = array("d", quantities)
+        unit_prices = array("d", unit_prices)
+        discounts = array("d", (discount or 0.0 for discount in discounts))
+        cents = line_totals_cents(quantities, unit_prices, discounts)
+        self._ids.extend(ids)
+        self._items.extend(items)
+        self._article_numbers.extend(article_numbers)
+        self._descriptions.extend(descriptions)
+        self._quantities.extend(quantities)
+        self._unit_prices.extend(unit_prices)
+        self._discounts.extend(discounts)
+        self._cents.extend(cents)
+        self.total_cents += sum(cents)
+
+    @property
+    def total(self) -> float:
+        return self.total_cents / 100
+
+    @property
+    def ids(self) -> List[Optional[int]]:
+        return self._ids
+
+    def assign_ids(self, ids: Iterable[Optional[int]]) -> None:
+        """Record the stored row id of every line, in order (after a save)."""
+        ids = list(ids)
+        if len(ids) != len(self):
+            raise ValueError("One id per line is required")
+        self._ids = ids
+
+    @property
+    def quantities(self) -> array:
+        return self._quantities
+
+    @property
+    def unit_prices(self) -> array:
+        return self._unit_prices
+
+    @property
+    def discounts(self) -> array:
+        return self._discounts
+
+    @property
+    def line_totals_cents(self) -> array:
+        return self._cents
+
+    def extend(self, values: Iterable[InvoiceLine]) -> None:
+        lines = list(values)
+        self._append_columns(
+            [line.id for line in lines],
+            [line.item for line in lines],
+            [line.article_number for line in lines],
+            [line.description for line in lines],
+            [line.quantity for line in lines],
+            [line.unit_price for line in lines],
+            [line.discount_percent for line in lines],
+        )
+
+    def _line(self, index: int) -> InvoiceLine:
+        return InvoiceLine(
+            item=self._items[index],
+            article_number=self._article_numbers[index],
+            description=self._descriptions[index],
+            quantity=self._quantities[index],
+            unit_price=self._unit_prices[index],
+            discount_percent=self._discounts[index],
+            id=self._ids[index],
+        )
+
+    def __len__(self) -> int:
+        return len(self._cents)
+
+    def __iter__(self):
+        for index in range(len(self._cents)):
+            yield self._line(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return InvoiceLines(self._line(i) for i in range(*index.indices(len(self))))
+        return self._line(range(len(self))[index])
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            lines = list(self)
+            lines[index] = value
+            self._reset()
+            self.extend(lines)
+            return
+        index = range(len(self))[index]
+        self.total_cents += value.total_cents - self._cents[index]
+        self._ids[index] = value.id
+        self._items[index] = value.item
+        self._article_numbers[index] = value.article_number
+        self._descriptions[index] = value.description
+        self._quantities[index] = value.quantity
+        self._unit_prices[index] = value.unit_price
+        self._discounts[index] = value.discount_percent or 0.0
+        self._cents[index] = value.total_cents
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            removed = sum(self._cents[index])
+        else:
+            index = range(len(self))[index]
+            removed = self._cents[index]
+        for column in self._columns():
+            del column[index]
+        self.total_cents -= removed
+
+    def insert(self, index: int, value: InvoiceLine) -> None:
+        self._ids.insert(index, value.id)
+        self._items.insert(index, value.item)
+        self._article_numbers.insert(index, value.article_number)
+        self._descriptions.insert(index, value.description)
+        self._quantities.insert(index, value.quantity)
+        self._unit_prices.insert(index, value.unit_price)
+        self._discounts.insert(index, value.discount_percent or 0.0)
+        self._cents.insert(index, value.total_cents)
+        self.total_cents += value.total_cents
+
+    def _columns(self) -> tuple:
+        return (
+            self._ids,
+            self._items,
+            self._article_numbers,
+            self._descriptions,
+            self._quantities,
+            self._unit_prices,
+            self._discounts,
+            self._cents,
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (InvoiceLines, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"InvoiceLines({list(self)!r})"
 
 
 @dataclass
@@ -48,21 +264,112 @@ class Invoice:
     number: str
     invoice_date: date
     client: Client
-    lines: List[InvoiceLine] = field(default_factory=list)
+    lines: InvoiceLines = field(default_factory=InvoiceLines)
     notes: str = ""
     vat_rate: float = 0.077
 
+    def __setattr__(self, name, value) -> None:
+        if name == "lines" and not isinstance(value, InvoiceLines):
+            value = InvoiceLines(value)
+        super().__setattr__(name, value)
+
+    @property
+    def subtotal_cents(self) -> int:
+        return self.lines.total_cents
+
     @property
     def subtotal(self) -> float:
-        return round(sum(line.total for line in self.lines), 2)
+        return self.lines.total
 
     @property
     def vat_amount(self) -> float:
-        return round(self.subtotal * self.vat_rate, 2) if self.vat_rate else 0.0
+        return self.vat_cents / 100
+
+    @property
+    def vat_cents(self) -> int:
+        return vat_amount_cents(self.subtotal_cents, self.vat_rate)
+
+    @property
+    def total_cents(self) -> int:
+        return self.subtotal_cents + self.vat_cents
+
+    @property
+    def total(self) -> float:
+        return self.total_cents / 100
+
+
+@dataclass
+class InvoiceHit:
+    """An invoice matched by a full-text search."""
+
+    id: int
+    number: str
+    invoice_date: date
+    client_company: str
+
+
+@dataclass
+class InvoiceSummary:
+    """An invoice as listed, with the totals stored on its row but no lines."""
+
+    id: int
+    number: str
+    invoice_date: date
+    client_id: int
+    client_company: str
+    line_count: int
+    subtotal_cents: int
+    vat_cents: int
+    total_cents: int
+
+    @property
+    def total(self) -> float:
+        return self.total_cents / 100
+
+
+@dataclass
+class InvoicePage:
+    """One page of an invoice query; pass ``next_cursor`` back for the next page."""
+
+    invoices: List[InvoiceSummary]
+    next_cursor: Optional[Tuple[str, int]] = None
+
+
+@dataclass
+class TotalsMismatch:
+    """An invoice whose stored totals disagree with its lines.
+
+    Amounts are ``(subtotal_cents, vat_cents, total_cents, line_count)``.
+    """
+
+    invoice_id: int
+    number: str
+    stored: tuple
+    computed: tuple
+
+
+@dataclass
+class RevenueSummary:
+    """Invoiced amounts aggregated over a period, a client or a VAT rate."""
+
+    key: object
+    label: str
+    invoice_count: int
+    subtotal_cents: int
+    vat_cents: int
+    total_cents: int
+
+    @property
+    def subtotal(self) -> float:
+        return self.subtotal_cents / 100
+
+    @property
+    def vat(self) -> float:
+        return self.vat_cents / 100
 
     @property
     def total(self) -> float:
-        return round(self.subtotal + self.vat_amount, 2)
+        return self.total_cents / 100
 
 
 @dataclass
@@ -76,8 +383,12 @@ class Settings:
     vat_enabled: bool = True
     vat_rate: float = 0.077
     logo_path: str = ""
+    qr_backend: str = "cairosvg"
     invoice_prefix: str = "2025-"
     next_number: int = 1
 
+    def format_invoice_number(self, value: int) -> str:
+        return f"{self.invoice_prefix}{value:03d}"
+
     def generate_invoice_number(self) -> str:
-        return f"{self.invoice_prefix}{self.next_number:03d}"
+        return self.format_invoice_number(self.next_number)
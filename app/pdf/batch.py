@@ -0,0 +1,109 @@
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from app.logic.models import Invoice, Settings
+
+# Heavy rendering dependencies imported once per worker process; the QR
+# backend's own modules are added by warm_worker.
+_WARM_MODULES = ("fpdf", "qrbill", "app.pdf.invoice_pdf")
+
+_worker_settings: Optional[Settings] = None
+
+
+@dataclass
+class RenderResult:
+    invoice_id: Optional[int]
+    number: str
+    seconds: float
+    path: Optional[Path] = None
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def warm_worker(qr_backend: str = "") -> None:
+    """Import the rendering stack once; use as a process pool initializer.
+
+    Only the modules of ``qr_backend`` are imported besides the PDF stack
+    (none when it is empty). Failures are ignored here: a missing module or
+    native library (``import cairosvg`` raises OSError without libcairo) must
+    not kill the pool, and is reported per invoice when rendering.
+    """
+    modules = _WARM_MODULES
+    if qr_backend:
+        try:
+            from app.qr.backends import get_backend
+
+            modules += get_backend(qr_backend).modules
+        except Exception:  # pylint: disable=broad-except
+            pass
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+def _init_worker(settings: Settings) -> None:
+    global _worker_settings  # pylint: disable=global-statement
+    _worker_settings = settings
+    warm_worker(settings.qr_backend)
+    try:
+        from app.pdf.invoice_pdf import render_context
+
+        # Decode the logo once per worker rather than in the first invoice.
+        render_context(settings, settings.logo_path or None)
+    except Exception:  # pylint: disable=broad-except
+        # Surfaces again, per invoice, in render_invoice.
+        pass
+
+
+def _render_one(invoice: Invoice) -> RenderResult:
+    return render_invoice(invoice, _worker_settings)
+
+
+def render_invoice(invoice: Invoice, settings: Settings) -> RenderResult:
+    """Render one invoice, capturing any failure in the result."""
+    start = time.perf_counter()
+    try:
+        from app.pdf.invoice_pdf import generate_invoice_pdf
+
+        path = generate_invoice_pdf(invoice, settings, settings.logo_path or None)
+    except Exception as exc:  # pylint: disable=broad-except
+        return RenderResult(invoice.id, invoice.number, time.perf_counter() - start, error=f"{type(exc).__name__}: {exc}")
+    return RenderResult(invoice.id, invoice.number, time.perf_counter() - start, path=path)
+
+
+def render_invoices(
+    invoices: Sequence[Invoice],
+    settings: Settings,
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[RenderResult], None]] = None,
+) -> List[RenderResult]:
+    """Render ``invoices`` to PDF across a pool of warm worker processes.
+
+    Workers import the PDF/QR stack once in their initializer, and invoices are
+    handed out in chunks to keep inter-process traffic low. Failures are
+    captured per invoice instead of aborting the batch.
+    """
+    if not invoices:
+        return []
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(invoices) // (workers * 4))
+    results: List[RenderResult] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings,)) as pool:
+        for result in pool.map(_render_one, invoices, chunksize=chunksize):
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+__all__ = ["RenderResult", "render_invoice", "render_invoices", "warm_worker"]
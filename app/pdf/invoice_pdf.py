@@ -1,13 +1,23 @@
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Hashable, Optional, Tuple, Union
 
-from fpdf import FPDF
+from fpdf import FPDF, FPDF_VERSION
+from PIL import Image
 
 from app.logic.models import Invoice, Settings
+from app.qr.backends import CairoSvgBackend, get_backend
+from app.qr.swiss_qr import generate_qr_png, render_qr_png, render_qr_svg
 
 FACTURE_DIR = Path("Factures")
-FACTURE_DIR.mkdir(exist_ok=True)
+
+LOGO_WIDTH_MM = 30
+# Logos are embedded at print resolution; larger images are downscaled once.
+LOGO_DPI = 300
 
 
 class InvoicePDF(FPDF):
@@ -25,10 +35,6 @@ def format_address(lines):
     return "\n".join(lines)
 
 
-def _normalize_country(value: str) -> str:
-    return "CH" if value.strip().lower() == "switzerland" else value
-
-
 def create_swiss_qr_png(invoice: Invoice, settings: Settings, destination: Path, dpi: int = 300) -> Path:
     """Generate a fully compliant Swiss QR-bill PNG with the Swiss cross.
 
@@ -42,72 +48,149 @@ def create_swiss_qr_png(invoice: Invoice, settings: Settings, destination: Path,
       the model is extended; currently we generate a NON-reference QR.
     """
 
-    try:
-        from qrbill import QRBill
-    except Exception as exc:  # pragma: no cover - dependency/runtime check
-        raise RuntimeError(
-            "Le module 'qrbill' est requis pour générer un QR-bill conforme."
-        ) from exc
+    return generate_qr_png(invoice, settings, destination, dpi=dpi)
 
+
+@dataclass(frozen=True)
+class RenderContext:
+    """Parts of the invoice page that depend only on the settings.
+
+    Built once per settings (and logo file) and shared by every invoice
+    rendered afterwards: the logo is decoded and scaled to its printed size
+    up front, so each PDF embeds a small ready image instead of decoding
+    and recompressing the original file, and the company blocks are
+    formatted once. Obtain one with :func:`render_context`.
+    """
+
+    settings: Settings
+    logo: Union[Image.Image, bytes, None]
+    company_address: str
+    creditor_lines: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, settings: Settings, logo_path: Optional[str] = None) -> "RenderContext":
+        return cls(
+            settings=settings,
+            logo=_load_logo(Path(logo_path)) if logo_path and Path(logo_path).exists() else None,
+            company_address=format_address([
+                settings.company_name,
+                settings.street,
+                f"{settings.zip_code} {settings.city}",
+                settings.country,
+            ]),
+            creditor_lines=(
+                "Compte QR-IBAN : " + settings.qr_iban,
+                "Bénéficiaire :",
+                settings.company_name,
+                settings.street,
+                f"{settings.zip_code} {settings.city}",
+                settings.country,
+            ),
+        )
+
+    def draw_logo(self, pdf: FPDF, x: float, y: float) -> bool:
+        if self.logo is None:
+            return False
+        logo = io.BytesIO(self.logo) if isinstance(self.logo, bytes) else self.logo
+        pdf.image(logo, x=x, y=y, w=LOGO_WIDTH_MM)
+        return True
+
+
+def _load_logo(path: Path) -> Union[Image.Image, bytes]:
+    with Image.open(path) as image:
+        if image.format == "JPEG":
+            # fpdf2 embeds JPEG data as is, without decoding it.
+            return path.read_bytes()
+        image.load()
+        if image.mode in ("P", "PA"):
+            image = image.convert("RGBA")
+        elif image.mode == "1":
+            image = image.convert("L")
+        width = round(LOGO_WIDTH_MM / 25.4 * LOGO_DPI)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        else:
+            image = image.copy()
+    return image
+
+
+_contexts: "OrderedDict[Hashable, RenderContext]" = OrderedDict()
+_contexts_lock = threading.Lock()
+_MAX_CONTEXTS = 4
+
+
+def render_context(settings: Settings, logo_path: Optional[str] = None) -> RenderContext:
+    """The cached :class:`RenderContext` for these settings and logo file.
+
+    Contexts are keyed on the settings values and the logo file's size and
+    modification time, so editing either yields a fresh context while
+    repeated renders, in a batch worker or a long-running service, reuse
+    the same one.
+    """
+    logo_stat = None
+    if logo_path and Path(logo_path).exists():
+        stat = Path(logo_path).stat()
+        logo_stat = (stat.st_mtime_ns, stat.st_size)
+    key = (astuple(settings), logo_path, logo_stat)
+    with _contexts_lock:
+        context = _contexts.get(key)
+        if context is not None:
+            _contexts.move_to_end(key)
+            return context
+    context = RenderContext.build(settings, logo_path)
+    with _contexts_lock:
+        _contexts[key] = context
+        while len(_contexts) > _MAX_CONTEXTS:
+            _contexts.popitem(last=False)
+    return context
+
+
+def _supports_svg_embedding() -> bool:
+    # fpdf2 draws SVG natively, but only renders <text> elements from 2.7.8 on.
     try:
-        from cairosvg import svg2png
-    except Exception as exc:  # pragma: no cover - dependency/runtime check
-        raise RuntimeError(
-            "Le module 'cairosvg' est requis pour convertir le QR-bill SVG en PNG."
-        ) from exc
-
-    creditor_country = _normalize_country(settings.country)
-    debtor_country = _normalize_country(invoice.client.country)
-
-    # Build the QR-bill data structure (white Swiss cross included by qrbill)
-    bill = QRBill(
-        account=settings.qr_iban.replace(" ", ""),
-        creditor={
-            "name": settings.company_name,
-            "line1": settings.street,
-            "line2": f"{settings.zip_code} {settings.city}",
-            "country": creditor_country,
-        },
-        debtor={
-            "name": invoice.client.company,
-            "line1": invoice.client.street,
-            "line2": f"{invoice.client.zip_code} {invoice.client.city}",
-            "country": debtor_country,
-        },
-        amount=invoice.total,
-        currency="CHF",
-        reference=None,
-        additional_information=invoice.notes or "",
-    )
-
-    # Render the QR-bill to SVG (includes the Swiss cross) then convert to PNG for FPDF.
-    svg_path = destination.with_suffix(".svg")
-    bill.as_svg(str(svg_path))
-    svg2png(url=str(svg_path), write_to=str(destination), dpi=dpi)
-    try:
-        svg_path.unlink()
-    except FileNotFoundError:
-        pass
-    return destination
+        version = tuple(int(part) for part in FPDF_VERSION.split(".")[:3])
+    except ValueError:
+        return False
+    return version >= (2, 7, 8)
+
 
+def _embed_qr_bill(pdf: FPDF, invoice: Invoice, settings: Settings, x: float, y: float, size: float) -> None:
+    """Draw the QR-bill from in-memory buffers, as vector graphics when fpdf2 allows it.
 
-def generate_invoice_pdf(invoice: Invoice, settings: Settings, logo_path: Optional[str] = None) -> Path:
+    The full bill fills the ``size`` square at ``(x, y)``. A backend that
+    draws only the QR symbol gets its specified size instead, in the
+    bottom-right corner of that square, so that it is never stretched.
+    """
+    backend = get_backend(settings.qr_backend)
+    # The vector path draws the same qrbill SVG the cairosvg backend would rasterize.
+    if backend.name == CairoSvgBackend.name and _supports_svg_embedding():
+        try:
+            svg = render_qr_svg(invoice, settings)
+            pdf.image(io.BytesIO(svg.encode("utf-8")), x=x, y=y, w=size, h=size)
+            return
+        except Exception:  # pylint: disable=broad-except
+            # Unsupported SVG construct: fall back to the rasterized image below.
+            pass
+    png = render_qr_png(invoice, settings)
+    placed = backend.symbol_mm or size
+    pdf.image(io.BytesIO(png), x=x + size - placed, y=y + size - placed, w=placed, h=placed)
+
+
+def generate_invoice_pdf(
+    invoice: Invoice, settings: Settings, logo_path: Optional[str] = None, context: Optional[RenderContext] = None
+) -> Path:
+    if context is None:
+        context = render_context(settings, logo_path)
     pdf = InvoicePDF()
     pdf.add_page()
 
-    if logo_path and Path(logo_path).exists():
-        pdf.image(logo_path, x=10, y=10, w=30)
+    if context.draw_logo(pdf, x=10, y=10):
         pdf.set_xy(10, 40)
     else:
         pdf.set_xy(10, 20)
 
     pdf.set_font("Helvetica", "B", 12)
-    pdf.multi_cell(80, 6, format_address([
-        settings.company_name,
-        settings.street,
-        f"{settings.zip_code} {settings.city}",
-        settings.country,
-    ]))
+    pdf.multi_cell(80, 6, context.company_address)
 
     pdf.set_xy(120, 30)
     pdf.set_font("Helvetica", size=12)
@@ -158,25 +241,16 @@ def generate_invoice_pdf(invoice: Invoice, settings: Settings, logo_path: Option
     pdf.set_font("Helvetica", "B", 12)
     pdf.cell(0, 10, "Section QR-facture", ln=True)
 
-    qr_temp_path = Path(__file__).resolve().parent / "qr_temp.png"
-    # Create compliant Swiss QR-bill as PNG (generated from SVG above).
-    qr_image_path = create_swiss_qr_png(invoice, settings, qr_temp_path)
-
     qr_size_mm = 70
     x_pos = pdf.w - pdf.r_margin - qr_size_mm
     y_pos = pdf.h - pdf.b_margin - qr_size_mm - 15
-    # Insert the QR-bill PNG into the payment section of the PDF.
-    pdf.image(str(qr_image_path), x=x_pos, y=y_pos, w=qr_size_mm, h=qr_size_mm)
+    # Insert the compliant Swiss QR-bill into the payment section of the PDF.
+    _embed_qr_bill(pdf, invoice, settings, x_pos, y_pos, qr_size_mm)
 
     pdf.set_xy(10, y_pos)
     pdf.set_font("Helvetica", size=11)
     pdf.multi_cell(0, 7, format_address([
-        "Compte QR-IBAN : " + settings.qr_iban,
-        "Bénéficiaire :",
-        settings.company_name,
-        settings.street,
-        f"{settings.zip_code} {settings.city}",
-        settings.country,
+        *context.creditor_lines,
         "",
         "Montant : {:.2f} CHF".format(invoice.total),
         "Payer depuis :",
@@ -186,12 +260,9 @@ def generate_invoice_pdf(invoice: Invoice, settings: Settings, logo_path: Option
         invoice.client.country,
     ]))
 
+    FACTURE_DIR.mkdir(exist_ok=True)
     filename = FACTURE_DIR / f"Facture_{invoice.number}_{invoice.client.company.replace(' ', '_')}.pdf"
     pdf.output(str(filename))
-    try:
-        qr_temp_path.unlink()
-    except FileNotFoundError:
-        pass
     return filename
 
 
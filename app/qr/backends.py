@@ -0,0 +1,117 @@
+import abc
+import io
+from typing import Dict, List, Optional, Tuple
+
+# Dimensions from the Swiss QR-bill style guide, in millimetres.
+QR_SYMBOL_MM = 46.0
+SWISS_CROSS_MM = 7.0
+
+
+class QRBackend(abc.ABC):
+    """Turns a ``qrbill.QRBill`` into PNG bytes at the requested resolution.
+
+    Backends do not all draw the same thing: ``description`` says what ends
+    up in the PDF, and is shown next to the setting.
+    """
+
+    name = ""
+    description = ""
+    # Modules to import ahead of time in render worker processes.
+    modules: Tuple[str, ...] = ()
+    # Printed size of the image, for backends that draw only the QR symbol.
+    symbol_mm: Optional[float] = None
+
+    @abc.abstractmethod
+    def render_png(self, bill, dpi: int) -> bytes:
+        """PNG image of ``bill`` rendered at ``dpi``."""
+
+
+class CairoSvgBackend(QRBackend):
+    """Full QR-bill as drawn by qrbill, rasterized from SVG through Cairo."""
+
+    name = "cairosvg"
+    description = "QR-facture complète (section paiement avec textes), via qrbill et Cairo"
+    modules = ("cairosvg",)
+
+    def render_png(self, bill, dpi: int) -> bytes:
+        try:
+            from cairosvg import svg2png
+        except Exception as exc:  # pragma: no cover - runtime environment concern
+            raise RuntimeError(
+                "Le module 'cairosvg' est requis pour convertir le QR-bill SVG en PNG."
+            ) from exc
+
+        buffer = io.StringIO()
+        bill.as_svg(buffer)
+        return svg2png(bytestring=buffer.getvalue().encode("utf-8"), dpi=dpi)
+
+
+class PillowBackend(QRBackend):
+    """Swiss QR code drawn straight into a Pillow image, without SVG or Cairo.
+
+    Only the scannable symbol is produced: the module matrix at 46 x 46 mm with
+    the 7 x 7 mm Swiss cross in its centre, as specified by the style guide.
+    """
+
+    name = "pillow"
+    description = "Symbole QR seul (46 mm, croix suisse), sans textes de la section paiement"
+    modules = ("qrcode", "PIL")
+    symbol_mm = QR_SYMBOL_MM
+
+    def render_png(self, bill, dpi: int) -> bytes:
+        try:
+            import qrcode
+            from PIL import Image, ImageDraw
+        except Exception as exc:  # pragma: no cover - runtime environment concern
+            raise RuntimeError(
+                "Les modules 'qrcode' et 'Pillow' sont requis pour le rendu QR direct."
+            ) from exc
+
+        code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=0)
+        code.add_data(bill.qr_data())
+        code.make(fit=True)
+        matrix = code.get_matrix()
+        modules = len(matrix)
+
+        # One pixel per module, then a single nearest-neighbour upscale.
+        raw = bytes(0 if dark else 255 for row in matrix for dark in row)
+        size = round(QR_SYMBOL_MM / 25.4 * dpi)
+        image = Image.frombytes("L", (modules, modules), raw).resize((size, size), Image.NEAREST)
+
+        cross = round(SWISS_CROSS_MM / 25.4 * dpi)
+        unit = cross / 19.0
+        left = top = (size - cross) // 2
+        draw = ImageDraw.Draw(image)
+
+        def rect(x: float, y: float, w: float, h: float, fill: int) -> None:
+            draw.rectangle(
+                [left + round(x * unit), top + round(y * unit), left + round((x + w) * unit) - 1, top + round((y + h) * unit) - 1],
+                fill=fill,
+            )
+
+        rect(0, 0, 19, 19, 255)
+        rect(0.7, 0.7, 17.6, 17.6, 0)
+        rect(8.3, 4, 3.3, 11, 255)
+        rect(4.4, 7.9, 11, 3.3, 255)
+
+        output = io.BytesIO()
+        image.convert("1").save(output, format="PNG", dpi=(dpi, dpi))
+        return output.getvalue()
+
+
+BACKENDS: Dict[str, QRBackend] = {backend.name: backend for backend in (CairoSvgBackend(), PillowBackend())}
+DEFAULT_BACKEND = CairoSvgBackend.name
+
+
+def get_backend(name: str = "") -> QRBackend:
+    try:
+        return BACKENDS[name or DEFAULT_BACKEND]
+    except KeyError as exc:
+        raise ValueError(f"Moteur QR inconnu : {name} (disponibles : {', '.join(available_backends())})") from exc
+
+
+def available_backends() -> List[str]:
+    return sorted(BACKENDS)
+
+
+__all__ = ["BACKENDS", "DEFAULT_BACKEND", "QRBackend", "available_backends", "get_backend"]
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+QR_CACHE_DIR = Path("cache") / "qr"
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def payload_key(payload: dict) -> str:
+    """Stable content hash of a QR payload (see ``swiss_qr.qr_payload``)."""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class QRImageCache:
+    """Two-tier cache of rendered QR-bill images keyed by payload hash.
+
+    An in-process LRU holds the most recent images. Behind it, a directory
+    shared between processes keeps up to ``disk_bytes`` of images and evicts
+    the least recently used files first. Pass ``directory=None`` to keep the
+    cache in memory only.
+    """
+
+    def __init__(self, directory: Optional[Path] = QR_CACHE_DIR, memory_entries: int = 256, disk_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._disk_usage: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return data
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data)
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.stats = CacheStats()
+            self._disk_usage = None
+        if self.directory and self.directory.exists():
+            for path in self.directory.glob("*.bin"):
+                path.unlink(missing_ok=True)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.bin"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if not self.directory:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file.
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_name, self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_usage is None:
+                self._disk_usage = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_usage += len(data)
+            if self._disk_usage > self.disk_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self) -> List[Tuple[float, int, Path]]:
+        """``(mtime, size, path)`` of the cached files, skipping any removed meanwhile."""
+        entries = []
+        for path in self.directory.glob("*.bin"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict_disk(self) -> None:
+        entries = sorted(self._disk_entries())
+        usage = sum(size for _, size, _ in entries)
+        # Trim to 90% of the cap so eviction does not run on every write.
+        target = self.disk_bytes * 0.9
+        for _, size, path in entries:
+            if usage <= target:
+                break
+            path.unlink(missing_ok=True)
+            usage -= size
+        self._disk_usage = usage
+
+
+qr_cache = QRImageCache()
+
+
+__all__ = ["CacheStats", "QRImageCache", "QR_CACHE_DIR", "payload_key", "qr_cache"]
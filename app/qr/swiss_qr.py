@@ -1,7 +1,10 @@
+import io
 from pathlib import Path
 from typing import Optional
 
 from app.logic.models import Invoice, Settings
+from app.qr.backends import get_backend
+from app.qr.cache import payload_key, qr_cache
 
 
 def _normalize_country(value: str) -> str:
@@ -53,12 +56,8 @@ def build_payload(invoice: Invoice, settings: Settings) -> str:
     return "\n".join(lines)
 
 
-def generate_qr_png(invoice: Invoice, settings: Settings, destination: Path, reference: Optional[str] = None, dpi: int = 300) -> Path:
-    """Generate a fully compliant Swiss QR code with the Swiss cross using qrbill.
-
-    This helper relies on the maintained qrbill package to ensure ISO 20022
-    compliance and embeds the white Swiss cross in the center of the QR symbol.
-    """
+def build_qr_bill(invoice: Invoice, settings: Settings, reference: Optional[str] = None):
+    """Build the ``qrbill.QRBill`` for an invoice (white Swiss cross included by qrbill)."""
 
     try:
         from qrbill import QRBill
@@ -67,43 +66,83 @@ def generate_qr_png(invoice: Invoice, settings: Settings, destination: Path, ref
             "Le module 'qrbill' est requis pour générer un QR-bill conforme."
         ) from exc
 
-    try:
-        from cairosvg import svg2png
-    except Exception as exc:  # pragma: no cover - runtime environment concern
-        raise RuntimeError(
-            "Le module 'cairosvg' est requis pour convertir le QR-bill SVG en PNG."
-        ) from exc
+    return QRBill(**qr_payload(invoice, settings, reference))
 
-    creditor_country = _normalize_country(settings.country)
-    debtor_country = _normalize_country(invoice.client.country)
 
-    reference_value = None if reference in (None, "NON", "") else reference
+def qr_payload(invoice: Invoice, settings: Settings, reference: Optional[str] = None) -> dict:
+    """Arguments passed to ``qrbill.QRBill``, also used as the image cache key.
+
+    The key is built from exactly what the bill is built from, so two
+    invoices share a cached image only if they encode the same payload.
+    """
 
-    bill = QRBill(
-        account=settings.qr_iban.replace(" ", ""),
-        creditor={
+    return {
+        "account": settings.qr_iban.replace(" ", ""),
+        "creditor": {
             "name": settings.company_name,
             "line1": settings.street,
             "line2": f"{settings.zip_code} {settings.city}",
-            "country": creditor_country,
+            "country": _normalize_country(settings.country),
         },
-        debtor={
+        "debtor": {
             "name": invoice.client.company,
             "line1": invoice.client.street,
             "line2": f"{invoice.client.zip_code} {invoice.client.city}",
-            "country": debtor_country,
+            "country": _normalize_country(invoice.client.country),
         },
-        amount=invoice.total,
-        currency="CHF",
-        reference=reference_value,
-        additional_information=invoice.notes or "",
-    )
-
-    svg_path = destination.with_suffix(".svg")
-    bill.as_svg(str(svg_path))
-    svg2png(url=str(svg_path), write_to=str(destination), dpi=dpi)
-    try:
-        svg_path.unlink()
-    except FileNotFoundError:
-        pass
+        "amount": f"{invoice.total:.2f}",
+        "currency": "CHF",
+        "reference_number": None if reference in (None, "NON", "") else reference,
+        "additional_information": invoice.notes or "",
+    }
+
+
+def _cache_key(invoice: Invoice, settings: Settings, reference: Optional[str], image_format: str, dpi: int = 0) -> str:
+    payload = qr_payload(invoice, settings, reference)
+    payload.update(format=image_format, dpi=dpi)
+    return payload_key(payload)
+
+
+def _render_svg_bytes(invoice: Invoice, settings: Settings, reference: Optional[str]) -> bytes:
+    buffer = io.StringIO()
+    build_qr_bill(invoice, settings, reference).as_svg(buffer)
+    return buffer.getvalue().encode("utf-8")
+
+
+def render_qr_svg(invoice: Invoice, settings: Settings, reference: Optional[str] = None) -> str:
+    """Render the QR-bill to an SVG document held in memory (cached by payload)."""
+
+    key = _cache_key(invoice, settings, reference, "svg")
+    return qr_cache.get_or_render(key, lambda: _render_svg_bytes(invoice, settings, reference)).decode("utf-8")
+
+
+def render_qr_png(
+    invoice: Invoice, settings: Settings, reference: Optional[str] = None, dpi: int = 300, backend: Optional[str] = None
+) -> bytes:
+    """Rasterize the QR-bill to PNG bytes without touching the filesystem (cached by payload).
+
+    ``backend`` selects the renderer (see ``app.qr.backends``); it defaults to
+    ``settings.qr_backend``.
+    """
+
+    renderer = get_backend(backend or settings.qr_backend)
+    key = _cache_key(invoice, settings, reference, f"png:{renderer.name}", dpi)
+    return qr_cache.get_or_render(key, lambda: renderer.render_png(build_qr_bill(invoice, settings, reference), dpi))
+
+
+def generate_qr_png(
+    invoice: Invoice,
+    settings: Settings,
+    destination: Path,
+    reference: Optional[str] = None,
+    dpi: int = 300,
+    backend: Optional[str] = None,
+) -> Path:
+    """Generate a fully compliant Swiss QR code with the Swiss cross using qrbill.
+
+    This helper relies on the maintained qrbill package to ensure ISO 20022
+    compliance and embeds the white Swiss cross in the center of the QR symbol.
+    """
+
+    destination.write_bytes(render_qr_png(invoice, settings, reference, dpi, backend))
     return destination
@@ -0,0 +1,189 @@
+"""JSON representation of the models exchanged by the service."""
+
+from dataclasses import asdict, fields
+from datetime import date
+from typing import Dict, Optional
+
+from app.database import storage
+from app.logic.models import Client, Invoice, InvoiceLine, InvoicePage, InvoiceSummary, Item, Settings
+
+
+def client_to_json(client: Client) -> dict:
+    return asdict(client)
+
+
+def item_to_json(item: Item) -> dict:
+    return asdict(item)
+
+
+def settings_to_json(settings: Settings) -> dict:
+    return asdict(settings)
+
+
+def summary_to_json(summary: InvoiceSummary) -> dict:
+    data = asdict(summary)
+    data["invoice_date"] = summary.invoice_date.isoformat()
+    return data
+
+
+def page_to_json(page: InvoicePage) -> dict:
+    return {
+        "invoices": [summary_to_json(summary) for summary in page.invoices],
+        "next_cursor": format_cursor(page.next_cursor),
+    }
+
+
+def invoice_to_json(invoice: Invoice) -> dict:
+    return {
+        "id": invoice.id,
+        "number": invoice.number,
+        "invoice_date": invoice.invoice_date.isoformat(),
+        "client": client_to_json(invoice.client),
+        "notes": invoice.notes,
+        "vat_rate": invoice.vat_rate,
+        "lines": [
+            {
+                "id": line.id,
+                "item_id": line.item.id if line.item else None,
+                "article_number": line.article_number,
+                "description": line.description,
+                "quantity": line.quantity,
+                "unit_price": line.unit_price,
+                "discount_percent": line.discount_percent,
+                "total_cents": line.total_cents,
+            }
+            for line in invoice.lines
+        ],
+        "subtotal_cents": invoice.subtotal_cents,
+        "vat_cents": invoice.vat_cents,
+        "total_cents": invoice.total_cents,
+    }
+
+
+def format_cursor(cursor) -> Optional[str]:
+    return f"{cursor[0]},{cursor[1]}" if cursor else None
+
+
+def parse_cursor(text: str):
+    invoice_date, _, invoice_id = text.partition(",")
+    try:
+        return date.fromisoformat(invoice_date).isoformat(), int(invoice_id)
+    except ValueError as exc:
+        raise ValueError(f"Curseur invalide : {text}") from exc
+
+
+def _require(data: dict, name: str, kind: type):
+    value = data.get(name)
+    if value is None or value == "":
+        raise ValueError(f"Champ obligatoire manquant : {name}")
+    return _coerce(name, value, kind)
+
+
+def _coerce(name: str, value, kind: type):
+    if kind is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind is str and isinstance(value, str):
+        return value
+    raise ValueError(f"Valeur invalide pour {name} : {value!r}")
+
+
+def _fields_from_json(cls, data: dict, required: tuple) -> Dict[str, object]:
+    if not isinstance(data, dict):
+        raise ValueError("Un objet JSON est attendu")
+    values: Dict[str, object] = {}
+    for spec in fields(cls):
+        if spec.name == "id":
+            continue
+        kind = {"str": str, "float": float}[spec.type]
+        if spec.name in required:
+            values[spec.name] = _require(data, spec.name, kind)
+        elif data.get(spec.name) is not None:
+            values[spec.name] = _coerce(spec.name, data[spec.name], kind)
+    return values
+
+
+def client_from_json(data: dict, client_id: Optional[int] = None) -> Client:
+    return Client(id=client_id, **_fields_from_json(Client, data, ("company", "street", "zip_code", "city")))
+
+
+def item_from_json(data: dict, item_id: Optional[int] = None) -> Item:
+    return Item(id=item_id, **_fields_from_json(Item, data, ("reference", "description", "unit_price")))
+
+
+def invoice_from_json(
+    data: dict, invoice_id: Optional[int] = None, default_vat_rate: float = 0.0, default_number: str = ""
+) -> Invoice:
+    """Build an invoice from its JSON form, loading the referenced client and items.
+
+    ``number`` defaults to ``default_number``; left empty, the next number
+    is allocated on save, so updates must pass the stored one. ``vat_rate``
+    defaults to ``default_vat_rate``. Lines keep their ``id`` so that
+    updating an invoice only rewrites the lines that changed.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Un objet JSON est attendu")
+    try:
+        invoice_date = date.fromisoformat(_require(data, "invoice_date", str))
+    except ValueError as exc:
+        raise ValueError(f"Date de facture invalide : {data.get('invoice_date')!r}") from exc
+    client_id = _require(data, "client_id", int)
+    try:
+        client = storage.load_client(client_id)
+    except ValueError as exc:
+        raise ValueError(f"Client inconnu : {client_id}") from exc
+    lines = data.get("lines") or []
+    if not isinstance(lines, list):
+        raise ValueError("Valeur invalide pour lines : une liste est attendue")
+
+    items: Dict[int, Item] = {}
+    invoice = Invoice(
+        id=invoice_id,
+        number=_coerce("number", data.get("number") or default_number, str),
+        invoice_date=invoice_date,
+        client=client,
+        notes=_coerce("notes", data.get("notes") or "", str),
+        vat_rate=_coerce("vat_rate", data.get("vat_rate", default_vat_rate), float),
+    )
+    for line in lines:
+        if not isinstance(line, dict):
+            raise ValueError("Chaque ligne doit être un objet JSON")
+        item = None
+        item_id = line.get("item_id")
+        if item_id is not None:
+            item_id = _coerce("item_id", item_id, int)
+            if item_id not in items:
+                try:
+                    items[item_id] = storage.load_item(item_id)
+                except ValueError as exc:
+                    raise ValueError(f"Article inconnu : {item_id}") from exc
+            item = items[item_id]
+        line_id = line.get("id")
+        invoice.lines.append(
+            InvoiceLine(
+                item=item,
+                article_number=_coerce("article_number", line.get("article_number") or "", str),
+                description=_require(line, "description", str),
+                quantity=_require(line, "quantity", float),
+                unit_price=_require(line, "unit_price", float),
+                discount_percent=_coerce("discount_percent", line.get("discount_percent") or 0.0, float),
+                id=None if line_id is None else _coerce("id", line_id, int),
+            )
+        )
+    return invoice
+
+
+__all__ = [
+    "client_from_json",
+    "client_to_json",
+    "format_cursor",
+    "invoice_from_json",
+    "invoice_to_json",
+    "item_from_json",
+    "item_to_json",
+    "page_to_json",
+    "parse_cursor",
+    "settings_to_json",
+    "summary_to_json",
+]
@@ -0,0 +1,449 @@
+"""Headless HTTP/JSON service sharing one database between workstations.
+
+Front desks talk to this process instead of opening the SQLite file
+themselves. Requests are handled by a bounded pool of reader threads, each
+with its own connection, so reads run concurrently under WAL. Every write
+is handed to a single writer thread: there is exactly one writing
+connection, and writers queue in this process instead of failing with
+"database is locked". PDF rendering runs in a pool of worker processes and
+is exposed as jobs that clients poll.
+"""
+
+import itertools
+import json
+import multiprocessing
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from app.database import cache, storage
+from app.logic.models import Invoice
+from app.pdf.batch import RenderResult, render_invoice, warm_worker
+from app.service import codec
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PAGE_SIZE = 500
+
+
+class ApiError(Exception):
+    """An error reported to the client with an HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class PdfJob:
+    id: int
+    invoice_id: int
+    number: str
+    status: str = "pending"
+    path: Optional[Path] = None
+    error: str = ""
+    seconds: float = 0.0
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def to_json(self) -> dict:
+        return {
+            "id": self.id,
+            "invoice_id": self.invoice_id,
+            "number": self.number,
+            "status": self.status,
+            "path": str(self.path) if self.path else None,
+            "error": self.error,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class InvoiceService:
+    """Executors behind the HTTP handlers: reader threads, one writer, PDF processes."""
+
+    def __init__(self, readers: int = 8, pdf_workers: Optional[int] = None, max_jobs: int = 1000):
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="fte-reader")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fte-writer")
+        self.pdf_workers = pdf_workers
+        self.pdf_pool = self._new_pdf_pool()
+        self._pdf_pool_broken = False
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[int, PdfJob]" = OrderedDict()
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def write(self, work: Callable[..., object], *args: object) -> object:
+        """Run ``work(*args)`` on the writer thread and wait for its result."""
+        return self.writer.submit(work, *args).result()
+
+    def submit_pdf(self, invoice: Invoice) -> PdfJob:
+        settings = cache.settings()
+        with self._lock:
+            job = PdfJob(next(self._job_ids), invoice.id, invoice.number)
+            self._jobs[job.id] = job
+            self._prune()
+            if self._pdf_pool_broken:
+                self._replace_pdf_pool()
+            try:
+                job.future = self.pdf_pool.submit(render_invoice, invoice, settings)
+            except BrokenProcessPool:
+                self._replace_pdf_pool()
+                job.future = self.pdf_pool.submit(render_invoice, invoice, settings)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _new_pdf_pool(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: the service is multi-threaded and holds connections.
+        return ProcessPoolExecutor(
+            max_workers=self.pdf_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_worker,
+            initargs=(cache.settings().qr_backend,),
+        )
+
+    def _replace_pdf_pool(self) -> None:
+        # A worker died (crash, OOM kill): the pool refuses all further work.
+        broken, self.pdf_pool = self.pdf_pool, self._new_pdf_pool()
+        self._pdf_pool_broken = False
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def job(self, job_id: int) -> Optional[PdfJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def close(self) -> None:
+        self.readers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+        self.pdf_pool.shutdown(wait=True, cancel_futures=True)
+        storage.close_connections()
+
+    def _finish(self, job: PdfJob, future: Future) -> None:
+        with self._lock:
+            if future.cancelled():
+                job.status, job.error = "failed", "Annulé"
+                return
+            exc = future.exception()
+            if exc is not None:
+                if isinstance(exc, BrokenProcessPool):
+                    self._pdf_pool_broken = True
+                job.status, job.error = "failed", f"{type(exc).__name__}: {exc}"
+                return
+            result: RenderResult = future.result()
+            job.seconds = result.seconds
+            if result.ok:
+                job.status, job.path = "done", result.path
+            else:
+                job.status, job.error = "failed", result.error
+
+    def _prune(self) -> None:
+        # Forget the oldest finished jobs; pending ones are always kept.
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status != "pending"][: max(excess, 0)]:
+            del self._jobs[job_id]
+
+
+Query = Dict[str, str]
+Response = Tuple[HTTPStatus, object]
+
+
+def _int(query: Query, name: str, default: Optional[int] = None) -> Optional[int]:
+    if name not in query:
+        return default
+    try:
+        return int(query[name])
+    except ValueError as exc:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre {name} invalide : {query[name]}") from exc
+
+
+def _float(query: Query, name: str) -> Optional[float]:
+    if name not in query:
+        return None
+    try:
+        return float(query[name])
+    except ValueError as exc:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre {name} invalide : {query[name]}") from exc
+
+
+def _date(query: Query, name: str) -> Optional[date]:
+    if name not in query:
+        return None
+    try:
+        return date.fromisoformat(query[name])
+    except ValueError as exc:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre {name} invalide : {query[name]}") from exc
+
+
+def _limit(query: Query, default: int) -> int:
+    limit = _int(query, "limit", default)
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre limit hors limites (1 à {MAX_PAGE_SIZE})")
+    return limit
+
+
+def _load(loader: Callable[[int], object], object_id: int, what: str):
+    try:
+        return loader(object_id)
+    except ValueError as exc:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"{what} introuvable : {object_id}") from exc
+
+
+def _health(service: InvoiceService, query: Query, body: object) -> Response:
+    return HTTPStatus.OK, {"status": "ok"}
+
+
+def _list_clients(service: InvoiceService, query: Query, body: object) -> Response:
+    limit = _limit(query, 50)
+    if query.get("q"):
+        clients = storage.search_clients(query["q"], limit=limit)
+    else:
+        clients = storage.list_clients(offset=_int(query, "offset", 0), limit=limit)
+    return HTTPStatus.OK, {"clients": [codec.client_to_json(client) for client in clients]}
+
+
+def _get_client(service: InvoiceService, query: Query, body: object, client_id: str) -> Response:
+    return HTTPStatus.OK, codec.client_to_json(_load(storage.load_client, int(client_id), "Client"))
+
+
+def _create_client(service: InvoiceService, query: Query, body: object) -> Response:
+    client = service.write(storage.save_client, codec.client_from_json(body))
+    return HTTPStatus.CREATED, codec.client_to_json(client)
+
+
+def _update_client(service: InvoiceService, query: Query, body: object, client_id: str) -> Response:
+    _load(storage.load_client, int(client_id), "Client")
+    client = service.write(storage.save_client, codec.client_from_json(body, int(client_id)))
+    return HTTPStatus.OK, codec.client_to_json(client)
+
+
+def _list_items(service: InvoiceService, query: Query, body: object) -> Response:
+    limit = _limit(query, 50)
+    if query.get("q"):
+        items = storage.search_items(query["q"], limit=limit)
+    else:
+        items = storage.list_items(offset=_int(query, "offset", 0), limit=limit)
+    return HTTPStatus.OK, {"items": [codec.item_to_json(item) for item in items]}
+
+
+def _get_item(service: InvoiceService, query: Query, body: object, item_id: str) -> Response:
+    return HTTPStatus.OK, codec.item_to_json(_load(storage.load_item, int(item_id), "Article"))
+
+
+def _create_item(service: InvoiceService, query: Query, body: object) -> Response:
+    item = service.write(storage.save_item, codec.item_from_json(body))
+    return HTTPStatus.CREATED, codec.item_to_json(item)
+
+
+def _update_item(service: InvoiceService, query: Query, body: object, item_id: str) -> Response:
+    _load(storage.load_item, int(item_id), "Article")
+    item = service.write(storage.save_item, codec.item_from_json(body, int(item_id)))
+    return HTTPStatus.OK, codec.item_to_json(item)
+
+
+def _list_invoices(service: InvoiceService, query: Query, body: object) -> Response:
+    page = storage.query_invoices(
+        client_id=_int(query, "client_id"),
+        date_from=_date(query, "date_from"),
+        date_to=_date(query, "date_to"),
+        number_prefix=query.get("number_prefix") or None,
+        min_total=_float(query, "min_total"),
+        max_total=_float(query, "max_total"),
+        after=codec.parse_cursor(query["after"]) if query.get("after") else None,
+        limit=_limit(query, 50),
+    )
+    return HTTPStatus.OK, codec.page_to_json(page)
+
+
+def _get_invoice(service: InvoiceService, query: Query, body: object, invoice_id: str) -> Response:
+    return HTTPStatus.OK, codec.invoice_to_json(_load(storage.load_invoice, int(invoice_id), "Facture"))
+
+
+def _vat_rate() -> float:
+    settings = cache.settings()
+    return settings.vat_rate if settings.vat_enabled else 0.0
+
+
+def _create_invoice(service: InvoiceService, query: Query, body: object) -> Response:
+    invoice = service.write(storage.save_invoice, codec.invoice_from_json(body, default_vat_rate=_vat_rate()))
+    return HTTPStatus.CREATED, codec.invoice_to_json(invoice)
+
+
+def _update_invoice(service: InvoiceService, query: Query, body: object, invoice_id: str) -> Response:
+    stored = _load(storage.load_invoice, int(invoice_id), "Facture")
+    # An update never takes a new number or today's VAT rate unless asked to.
+    invoice = codec.invoice_from_json(
+        body, int(invoice_id), default_vat_rate=stored.vat_rate, default_number=stored.number
+    )
+    return HTTPStatus.OK, codec.invoice_to_json(service.write(storage.save_invoice, invoice))
+
+
+def _render_invoice(service: InvoiceService, query: Query, body: object, invoice_id: str) -> Response:
+    invoice = _load(storage.load_invoice, int(invoice_id), "Facture")
+    return HTTPStatus.ACCEPTED, service.submit_pdf(invoice).to_json()
+
+
+def _get_job(service: InvoiceService, query: Query, body: object, job_id: str) -> Response:
+    job = service.job(int(job_id))
+    if job is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Tâche introuvable : {job_id}")
+    return HTTPStatus.OK, job.to_json()
+
+
+def _get_job_pdf(service: InvoiceService, query: Query, body: object, job_id: str) -> Response:
+    job = service.job(int(job_id))
+    if job is None or job.status != "done" or not job.path.exists():
+        raise ApiError(HTTPStatus.NOT_FOUND, f"PDF non disponible pour la tâche {job_id}")
+    # A path payload is sent back as the PDF file itself.
+    return HTTPStatus.OK, job.path
+
+
+def _get_settings(service: InvoiceService, query: Query, body: object) -> Response:
+    return HTTPStatus.OK, codec.settings_to_json(storage.load_settings())
+
+
+ROUTES: List[Tuple[str, "re.Pattern[str]", Callable[..., Response]]] = [
+    (method, re.compile(pattern), handler)
+    for method, pattern, handler in [
+        ("GET", r"/health", _health),
+        ("GET", r"/clients", _list_clients),
+        ("POST", r"/clients", _create_client),
+        ("GET", r"/clients/(\d+)", _get_client),
+        ("PUT", r"/clients/(\d+)", _update_client),
+        ("GET", r"/items", _list_items),
+        ("POST", r"/items", _create_item),
+        ("GET", r"/items/(\d+)", _get_item),
+        ("PUT", r"/items/(\d+)", _update_item),
+        ("GET", r"/invoices", _list_invoices),
+        ("POST", r"/invoices", _create_invoice),
+        ("GET", r"/invoices/(\d+)", _get_invoice),
+        ("PUT", r"/invoices/(\d+)", _update_invoice),
+        ("POST", r"/invoices/(\d+)/pdf", _render_invoice),
+        ("GET", r"/jobs/(\d+)", _get_job),
+        ("GET", r"/jobs/(\d+)/pdf", _get_job_pdf),
+        ("GET", r"/settings", _get_settings),
+    ]
+]
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "FTEFacturation/1.0"
+    server: "ServiceHTTPServer"
+    # Each connection occupies a reader thread: drop clients that go silent.
+    timeout = 30
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:  # pylint: disable=invalid-name
+        self._dispatch("PUT")
+
+    def do_DELETE(self) -> None:  # pylint: disable=invalid-name
+        self._dispatch("DELETE")
+
+    def log_message(self, format: str, *args) -> None:  # pylint: disable=redefined-builtin
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            status, payload = self._route(method, url.path, query)
+        except ApiError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        except storage.DuplicateNumberError as exc:
+            status, payload = HTTPStatus.CONFLICT, {"error": str(exc)}
+        except ValueError as exc:
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+        except sqlite3.IntegrityError as exc:
+            status, payload = HTTPStatus.CONFLICT, {"error": f"Conflit avec une donnée existante : {exc}"}
+        except Exception as exc:  # pylint: disable=broad-except
+            self.log_error("%s %s : %r", method, url.path, exc)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"}
+        if isinstance(payload, Path):
+            self._send(status, payload.read_bytes(), "application/pdf")
+        else:
+            self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _route(self, method: str, path: str, query: Query) -> Response:
+        known_path = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            known_path = True
+            if route_method == method:
+                body = self._read_body() if method in ("POST", "PUT") else None
+                return handler(self.server.service, query, body, *match.groups())
+        if known_path:
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"Méthode {method} non prise en charge")
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Ressource inconnue : {path}")
+
+    def _read_body(self) -> object:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Requête trop volumineuse")
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"JSON invalide : {exc}") from exc
+
+    def _send(self, status: HTTPStatus, content: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """HTTP server whose requests run on the service's reader threads.
+
+    Reusing a bounded pool, rather than a thread per request, keeps one warm
+    connection per reader instead of opening one for every request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: InvoiceService, quiet: bool = False):
+        super().__init__(address, ServiceRequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+    def process_request(self, request, client_address) -> None:
+        self.service.readers.submit(self.process_request_thread, request, client_address)
+
+
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    readers: int = 8,
+    pdf_workers: Optional[int] = None,
+    quiet: bool = False,
+) -> ServiceHTTPServer:
+    """Build a server on ``host:port`` (port 0 picks a free one); call ``serve_forever``."""
+    return ServiceHTTPServer((host, port), InvoiceService(readers, pdf_workers), quiet)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, readers: int = 8, pdf_workers: Optional[int] = None) -> None:
+    server = create_server(host, port, readers, pdf_workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+__all__ = ["ApiError", "InvoiceService", "PdfJob", "ROUTES", "ServiceHTTPServer", "create_server", "serve"]
@@ -1,12 +1,17 @@
 import csv
+import sqlite3
 import tkinter as tk
+import traceback
 from datetime import date
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 
-from app.database import storage
-from app.logic.models import Client, Invoice, InvoiceLine, Item
-from app.pdf.invoice_pdf import generate_invoice_pdf, generate_swiss_qr_invoice
+from app.database import cache, events, migrations, storage
+from app.database.article_index import article_index
+from app.logic.models import Client, Invoice, InvoiceLine, InvoiceLines, Item, Settings
+from app.qr.backends import available_backends, get_backend
+from app.ui.tasks import TaskRunner, runner_for
+from app.ui.virtual_list import VirtualList
 
 
 class Sidebar(ttk.Frame):
@@ -14,7 +19,7 @@ class Sidebar(ttk.Frame):
         super().__init__(master, padding=10)
         self.on_select = on_select
         self.buttons = {}
-        for view in ["Clients", "Articles", "Factures", "Paramètres"]:
+        for view in ["Clients", "Articles", "Factures", "Historique", "Rapports", "Paramètres"]:
             btn = ttk.Button(self, text=view, command=lambda v=view: self.on_select(v))
             btn.pack(fill="x", pady=5)
             self.buttons[view] = btn
@@ -24,11 +29,17 @@ class ClientsFrame(ttk.Frame):
     def __init__(self, master):
         super().__init__(master, padding=10)
         self.editing_client_id: int | None = None
-        self.tree = ttk.Treeview(self, columns=("company", "city"), show="headings", height=8)
-        self.tree.heading("company", text="Client")
-        self.tree.heading("city", text="Ville")
-        self.tree.pack(fill="x")
-        self.tree.bind("<Double-1>", self.on_client_double_click)
+        self.list = VirtualList(
+            self,
+            [("company", "Client"), ("city", "Ville")],
+            cache.count_clients,
+            self.fetch_rows,
+            height=8,
+            runner=runner_for(self),
+        )
+        self.rendered_version: int | None = None
+        self.list.pack(fill="x")
+        self.list.bind_rows("<Double-1>", self.on_client_double_click)
 
         form = ttk.Frame(self)
         form.pack(fill="x", pady=10)
@@ -60,11 +71,19 @@ class ClientsFrame(ttk.Frame):
         self.save_button.grid(row=8, column=1, sticky="w", pady=5)
         self.refresh()
 
+    @staticmethod
+    def fetch_rows(offset: int, limit: int):
+        return [
+            (client.id, (client.company, f"{client.zip_code} {client.city}"))
+            for client in cache.list_clients(offset, limit)
+        ]
+
     def refresh(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for client in storage.list_clients():
-            self.tree.insert("", "end", iid=str(client.id), values=(client.company, f"{client.zip_code} {client.city}"))
+        version = cache.data_cache.version(events.CLIENTS)
+        if version == self.rendered_version:
+            return
+        self.rendered_version = version
+        self.list.refresh()
 
     def save_client(self):
         if not self.company.get():
@@ -86,12 +105,8 @@ class ClientsFrame(ttk.Frame):
         self.refresh()
 
     def on_client_double_click(self, event):  # pylint: disable=unused-argument
-        selection = self.tree.selection()
-        if not selection:
-            return
-        try:
-            client_id = int(selection[0])
-        except ValueError:
+        client_id = self.list.selected_key()
+        if client_id is None:
             return
         try:
             client = storage.load_client(client_id)
@@ -128,10 +143,28 @@ class ClientsFrame(ttk.Frame):
 class ItemsFrame(ttk.Frame):
     def __init__(self, master):
         super().__init__(master, padding=10)
-        self.tree = ttk.Treeview(self, columns=("ref", "description", "price"), show="headings", height=8)
-        for col, title in [("ref", "Article n°"), ("description", "Description"), ("price", "PU")]:
-            self.tree.heading(col, text=title)
-        self.tree.pack(fill="x")
+        search_bar = ttk.Frame(self)
+        search_bar.pack(fill="x", pady=(0, 5))
+        self.search = tk.StringVar()
+        ttk.Label(search_bar, text="Rechercher").pack(side="left")
+        search_entry = ttk.Entry(search_bar, textvariable=self.search, width=40)
+        search_entry.pack(side="left", padx=5)
+        search_entry.bind("<KeyRelease>", self.on_search_typed)
+        self.search_job: str | None = None
+        self.search_task = None
+        self.matches: list[Item] | None = None
+        self.tasks = runner_for(self)
+
+        self.list = VirtualList(
+            self,
+            [("ref", "Article n°"), ("description", "Description"), ("price", "PU")],
+            self.count_rows,
+            self.fetch_rows,
+            height=8,
+            runner=self.tasks,
+        )
+        self.rendered_version: int | None = None
+        self.list.pack(fill="x")
 
         form = ttk.Frame(self)
         form.pack(fill="x", pady=10)
@@ -145,16 +178,58 @@ class ItemsFrame(ttk.Frame):
         ttk.Label(form, text="PU").grid(row=2, column=0, sticky="w")
         ttk.Entry(form, textvariable=self.unit_price, width=10).grid(row=2, column=1, sticky="w")
         ttk.Button(form, text="Ajouter", command=self.add_item).grid(row=3, column=1, sticky="w", pady=5)
-        ttk.Button(form, text="Importer depuis Excel/CSV...", command=self.on_import_items).grid(
-            row=3, column=2, sticky="w", padx=5
-        )
+        self.import_button = ttk.Button(form, text="Importer depuis Excel/CSV...", command=self.on_import_items)
+        self.import_button.grid(row=3, column=2, sticky="w", padx=5)
+        self.import_status = ttk.Label(form, text="")
+        self.import_status.grid(row=3, column=3, sticky="w", padx=5)
+        self.cancel_import_button = ttk.Button(form, text="Annuler", command=self.cancel_import)
+        self.import_task = None
         self.refresh()
 
+    def count_rows(self) -> int:
+        return cache.count_items() if self.matches is None else len(self.matches)
+
+    def fetch_rows(self, offset: int, limit: int):
+        items = cache.list_items(offset, limit) if self.matches is None else self.matches[offset:offset + limit]
+        return [(item.id, (item.reference, item.description, f"{item.unit_price:.2f}")) for item in items]
+
     def refresh(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for item in storage.list_items():
-            self.tree.insert("", "end", values=(item.reference, item.description, f"{item.unit_price:.2f}"))
+        version = cache.data_cache.version(events.ITEMS)
+        if version == self.rendered_version:
+            return
+        self.rendered_version = version
+        self.run_search()
+
+    def on_search_typed(self, event=None):  # pylint: disable=unused-argument
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(150, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        if self.search_task:
+            self.search_task.cancel()
+            self.search_task = None
+        text = self.search.get().strip()
+        if not text:
+            self.show_matches(None)
+            return
+        self.search_task = self.tasks.submit(
+            lambda task: storage.search_items(text, limit=500),
+            on_done=self.show_matches,
+            on_error=self.on_search_failed,
+        )
+
+    def on_search_failed(self, exc: BaseException):
+        self.search_task = None
+        self.tasks.report_error(exc)
+
+    def show_matches(self, matches: list[Item] | None):
+        self.search_task = None
+        if matches != self.matches:
+            self.list.offset = 0
+        self.matches = matches
+        self.list.refresh()
 
     def on_import_items(self):
         filename = filedialog.askopenfilename(
@@ -174,19 +249,45 @@ class ItemsFrame(ttk.Frame):
                 "Merci d'enregistrer le fichier Excel au format CSV avant l'import.",
             )
             return
-        try:
-            inserted, updated, skipped = self.import_items_from_csv(path)
-        except Exception as exc:  # pylint: disable=broad-except
-            messagebox.showerror("Erreur d'import", str(exc))
-            return
+        self.import_button.config(state="disabled")
+        self.import_status.config(text="Import en cours...")
+        self.cancel_import_button.grid(row=3, column=4, sticky="w")
+        self.import_task = self.tasks.submit(
+            lambda task: self.import_items_from_csv(path, progress=task.report),
+            on_done=self.on_import_done,
+            on_error=self.on_import_failed,
+            on_progress=self.on_import_progress,
+        )
+
+    def on_import_progress(self, rows_read: int):
+        self.import_status.config(text=f"Import en cours... {rows_read} lignes lues")
+
+    def on_import_done(self, result: tuple[int, int, int]):
+        self.end_import("")
+        inserted, updated, skipped = result
         self.refresh()
         messagebox.showinfo(
             "Import terminé",
             f"Articles ajoutés: {inserted}\nArticles mis à jour: {updated}\nLignes ignorées: {skipped}",
         )
 
-    def import_items_from_csv(self, file_path: Path) -> tuple[int, int, int]:
-        inserted = updated = skipped = 0
+    def on_import_failed(self, exc: BaseException):
+        self.end_import("")
+        messagebox.showerror("Erreur d'import", str(exc))
+
+    def cancel_import(self):
+        if self.import_task:
+            # The import stops at its next batch and its transaction is rolled back.
+            self.import_task.cancel()
+        self.end_import("Import annulé")
+
+    def end_import(self, status: str):
+        self.import_task = None
+        self.import_button.config(state="normal")
+        self.import_status.config(text=status)
+        self.cancel_import_button.grid_remove()
+
+    def import_items_from_csv(self, file_path: Path, progress=None) -> tuple[int, int, int]:
         with file_path.open(newline="", encoding="utf-8-sig") as csvfile:
             reader = csv.DictReader(csvfile)
             headers = [h.strip() for h in reader.fieldnames or []]
@@ -195,33 +296,9 @@ class ItemsFrame(ttk.Frame):
             price_key = self._find_column(headers, ["price", "unit_price", "prix", "pu", "prix unitaire"])
             if not ref_key or not desc_key or not price_key:
                 raise ValueError("Colonnes requises manquantes (référence, description, prix)")
-            for row in reader:
-                try:
-                    reference = (row.get(ref_key) or "").strip()
-                    description = (row.get(desc_key) or "").strip()
-                    price_raw = (row.get(price_key) or "").strip().replace(",", ".")
-                    if not reference:
-                        skipped += 1
-                        continue
-                    unit_price = float(price_raw)
-                except Exception:  # pylint: disable=broad-except
-                    skipped += 1
-                    continue
-                existing = storage.get_item_by_reference(reference)
-                default_qty = existing.default_quantity if existing else 1.0
-                item = Item(
-                    id=existing.id if existing else None,
-                    reference=reference,
-                    description=description,
-                    unit_price=unit_price,
-                    default_quantity=default_qty,
-                )
-                storage.upsert_item(item)
-                if existing:
-                    updated += 1
-                else:
-                    inserted += 1
-        return inserted, updated, skipped
+            return storage.import_items(
+                ((row.get(ref_key), row.get(desc_key), row.get(price_key)) for row in reader), progress=progress
+            )
 
     @staticmethod
     def _find_column(headers: list[str], candidates: list[str]) -> str | None:
@@ -241,7 +318,7 @@ class ItemsFrame(ttk.Frame):
             description=self.description.get(),
             unit_price=float(self.unit_price.get()),
         )
-        storage.save_item(item)
+        storage.upsert_item(item)
         self.reference.set("")
         self.description.set("")
         self.unit_price.set(0.0)
@@ -251,18 +328,23 @@ class ItemsFrame(ttk.Frame):
 class InvoiceFrame(ttk.Frame):
     def __init__(self, master):
         super().__init__(master, padding=10)
-        self.settings = storage.load_settings()
         self.client_var = tk.StringVar()
         self.date_var = tk.StringVar(value=date.today().isoformat())
         self.notes = tk.StringVar()
-        self.lines: list[InvoiceLine] = []
+        self.lines = InvoiceLines()
         self.editing_line_index: int | None = None
+        self.clients: dict[str, Client] = {}
+        self.tasks = runner_for(self)
 
         top = ttk.Frame(self)
         top.pack(fill="x")
         ttk.Label(top, text="Client").grid(row=0, column=0, sticky="w")
         self.client_combo = ttk.Combobox(top, textvariable=self.client_var, width=40)
         self.client_combo.grid(row=0, column=1, sticky="w")
+        self.client_combo.bind("<KeyRelease>", self.on_client_typed)
+        self.client_search_job: str | None = None
+        self.client_search_task = None
+        self.article_index_task = None
         ttk.Button(top, text="Recharger", command=self.load_clients).grid(row=0, column=2, padx=5)
 
         ttk.Label(top, text="Date").grid(row=1, column=0, sticky="w")
@@ -271,23 +353,22 @@ class InvoiceFrame(ttk.Frame):
         ttk.Label(top, text="Remarques").grid(row=2, column=0, sticky="nw")
         ttk.Entry(top, textvariable=self.notes, width=60).grid(row=2, column=1, sticky="w")
 
-        self.lines_tree = ttk.Treeview(
+        self.lines_list = VirtualList(
             self,
-            columns=("article", "description", "qty", "price", "discount", "total"),
-            show="headings",
+            [
+                ("article", "Article"),
+                ("description", "Description"),
+                ("qty", "Qté"),
+                ("price", "PU"),
+                ("discount", "Remise %"),
+                ("total", "Total"),
+            ],
+            lambda: len(self.lines),
+            self.fetch_line_rows,
             height=6,
         )
-        for col, title in [
-            ("article", "Article"),
-            ("description", "Description"),
-            ("qty", "Qté"),
-            ("price", "PU"),
-            ("discount", "Remise %"),
-            ("total", "Total"),
-        ]:
-            self.lines_tree.heading(col, text=title)
-        self.lines_tree.bind("<Double-1>", self.on_line_double_click)
-        self.lines_tree.pack(fill="x", pady=5)
+        self.lines_list.bind_rows("<Double-1>", self.on_line_double_click)
+        self.lines_list.pack(fill="x", pady=5)
 
         line_form = ttk.Frame(self)
         line_form.pack(fill="x", pady=5)
@@ -297,10 +378,12 @@ class InvoiceFrame(ttk.Frame):
         self.line_price = tk.DoubleVar(value=0.0)
         self.line_discount = tk.DoubleVar(value=0.0)
         ttk.Label(line_form, text="Article n°").grid(row=0, column=0)
-        article_entry = ttk.Entry(line_form, textvariable=self.line_article_number, width=15)
-        article_entry.grid(row=0, column=1)
-        article_entry.bind("<Return>", self.on_article_number_enter)
-        article_entry.bind("<FocusOut>", self.on_article_number_enter)
+        self.article_combo = ttk.Combobox(line_form, textvariable=self.line_article_number, width=15)
+        self.article_combo.grid(row=0, column=1)
+        self.article_combo.bind("<KeyRelease>", self.on_article_number_typed)
+        self.article_combo.bind("<<ComboboxSelected>>", self.on_article_number_enter)
+        self.article_combo.bind("<Return>", self.on_article_number_enter)
+        self.article_combo.bind("<FocusOut>", self.on_article_number_enter)
         ttk.Label(line_form, text="Description").grid(row=0, column=2)
         ttk.Entry(line_form, textvariable=self.line_description, width=30).grid(row=0, column=3)
         ttk.Label(line_form, text="Qté").grid(row=0, column=4)
@@ -315,7 +398,8 @@ class InvoiceFrame(ttk.Frame):
         action_bar = ttk.Frame(self)
         action_bar.pack(fill="x", pady=5)
         ttk.Button(action_bar, text="Enregistrer la facture", command=self.save_invoice).pack(side="left")
-        ttk.Button(action_bar, text="Générer le PDF", command=self.generate_pdf).pack(side="left", padx=5)
+        self.pdf_button = ttk.Button(action_bar, text="Générer le PDF", command=self.generate_pdf)
+        self.pdf_button.pack(side="left", padx=5)
         self.total_label = ttk.Label(action_bar, text="Total: 0.00 CHF")
         self.total_label.pack(side="right")
 
@@ -323,16 +407,86 @@ class InvoiceFrame(ttk.Frame):
         self.refresh_lines_tree()
         self.refresh_totals()
 
+    def refresh(self):
+        if self.clients_version != cache.data_cache.version(events.CLIENTS):
+            self.load_clients()
+
     def load_clients(self):
-        clients = storage.list_clients()
+        self.clients_version = cache.data_cache.version(events.CLIENTS)
+        self.tasks.submit(lambda task: cache.list_clients(), on_done=self.show_clients, on_error=self.on_clients_failed)
+
+    def on_clients_failed(self, exc: BaseException):
+        # Try again on the next refresh.
+        self.clients_version = None
+        self.tasks.report_error(exc)
+
+    def show_clients(self, clients: list[Client]):
         self.clients = {client.company: client for client in clients}
         self.client_combo["values"] = list(self.clients.keys())
 
+    def on_client_typed(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self.client_search_job:
+            self.after_cancel(self.client_search_job)
+        self.client_search_job = self.after(150, self.search_clients)
+
+    def search_clients(self):
+        self.client_search_job = None
+        if self.client_search_task:
+            self.client_search_task.cancel()
+            self.client_search_task = None
+        text = self.client_var.get().strip()
+        if not text:
+            self.client_combo["values"] = list(self.clients.keys())
+            return
+        self.client_search_task = self.tasks.submit(
+            lambda task: storage.search_clients(text, limit=20),
+            on_done=self.show_client_matches,
+            on_error=self.on_client_search_failed,
+        )
+
+    def on_client_search_failed(self, exc: BaseException):
+        self.client_search_task = None
+        self.tasks.report_error(exc)
+
+    def show_client_matches(self, matches: list[Client]):
+        self.client_search_task = None
+        for client in matches:
+            self.clients[client.company] = client
+        self.client_combo["values"] = [client.company for client in matches]
+
+    def on_article_number_typed(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if not article_index.ready():
+            # The catalog changed; reload it off the Tk thread and complete afterwards.
+            if self.article_index_task is None:
+                self.article_index_task = self.tasks.submit(
+                    lambda task: article_index.load(),
+                    on_done=self.on_article_index_loaded,
+                    on_error=self.on_article_index_failed,
+                )
+            return
+        self.show_article_matches()
+
+    def show_article_matches(self):
+        self.article_combo["values"] = [item.reference for item in article_index.complete(self.line_article_number.get())]
+
+    def on_article_index_loaded(self, result):  # pylint: disable=unused-argument
+        self.article_index_task = None
+        self.show_article_matches()
+
+    def on_article_index_failed(self, exc: BaseException):
+        self.article_index_task = None
+        self.tasks.report_error(exc)
+
     def on_article_number_enter(self, event=None):  # pylint: disable=unused-argument
         reference = self.line_article_number.get().strip()
         if not reference:
             return
-        item = storage.get_item_by_reference(reference)
+        # One indexed query while the catalog reloads, rather than waiting for it.
+        item = article_index.get(reference) if article_index.ready() else storage.get_item_by_reference(reference)
         if not item:
             return
         self.line_description.set(item.description)
@@ -359,37 +513,39 @@ class InvoiceFrame(ttk.Frame):
             quantity=quantity,
             unit_price=unit_price,
             discount_percent=discount,
+            id=None if self.editing_line_index is None else self.lines[self.editing_line_index].id,
         )
         if self.editing_line_index is None:
             self.lines.append(line)
+            shown_index = len(self.lines) - 1
         else:
             self.lines[self.editing_line_index] = line
+            shown_index = self.editing_line_index
         self.reset_line_form()
         self.refresh_lines_tree()
+        self.lines_list.see(shown_index)
         self.refresh_totals()
 
     def build_invoice(self) -> Invoice:
         client_name = self.client_var.get()
         if client_name not in self.clients:
             raise ValueError("Sélectionner un client existant")
-        invoice_number = self.settings.generate_invoice_number()
         invoice_date = date.fromisoformat(self.date_var.get())
+        settings = cache.settings()
+        # The number is allocated from the invoice sequence when the invoice is saved.
         return Invoice(
             id=None,
-            number=invoice_number,
+            number="",
             invoice_date=invoice_date,
             client=self.clients[client_name],
             lines=self.lines,
             notes=self.notes.get(),
-            vat_rate=self.settings.vat_rate if self.settings.vat_enabled else 0.0,
+            vat_rate=settings.vat_rate if settings.vat_enabled else 0.0,
         )
 
     def on_line_double_click(self, event):  # pylint: disable=unused-argument
-        selection = self.lines_tree.selection()
-        if not selection:
-            return
-        index = self.lines_tree.index(selection[0])
-        if index >= len(self.lines):
+        index = self.lines_list.selected_index()
+        if index is None or index >= len(self.lines):
             return
         line = self.lines[index]
         self.editing_line_index = index
@@ -400,23 +556,27 @@ class InvoiceFrame(ttk.Frame):
         self.line_discount.set(line.discount_percent)
         self.add_line_button.config(text="Mettre à jour la ligne")
 
-    def refresh_lines_tree(self):
-        for row in self.lines_tree.get_children():
-            self.lines_tree.delete(row)
-        for idx, line in enumerate(self.lines):
-            self.lines_tree.insert(
-                "",
-                "end",
-                iid=str(idx),
-                values=(
-                    line.article_number,
-                    line.description,
-                    f"{line.quantity:.2f}",
-                    f"{line.unit_price:.2f}",
-                    f"{line.discount_percent:.2f}",
-                    f"{line.total:.2f}",
-                ),
+    def fetch_line_rows(self, offset: int, limit: int):
+        rows = []
+        for index in range(offset, min(offset + limit, len(self.lines))):
+            line = self.lines[index]
+            rows.append(
+                (
+                    index,
+                    (
+                        line.article_number,
+                        line.description,
+                        f"{line.quantity:.2f}",
+                        f"{line.unit_price:.2f}",
+                        f"{line.discount_percent:.2f}",
+                        f"{line.total:.2f}",
+                    ),
+                )
             )
+        return rows
+
+    def refresh_lines_tree(self):
+        self.lines_list.refresh()
 
     def reset_line_form(self):
         self.editing_line_index = None
@@ -433,9 +593,11 @@ class InvoiceFrame(ttk.Frame):
         except Exception as exc:  # pylint: disable=broad-except
             messagebox.showerror("Erreur", str(exc))
             return
-        storage.save_invoice(invoice)
-        self.settings.next_number += 1
-        storage.save_settings(self.settings)
+        try:
+            storage.save_invoice(invoice)
+        except ValueError as exc:
+            messagebox.showerror("Erreur", str(exc))
+            return
         messagebox.showinfo("Succès", f"Facture {invoice.number} enregistrée")
 
     def generate_pdf(self):
@@ -444,29 +606,274 @@ class InvoiceFrame(ttk.Frame):
         except Exception as exc:  # pylint: disable=broad-except
             messagebox.showerror("Erreur", str(exc))
             return
-        filename = generate_swiss_qr_invoice(invoice, self.settings, self.settings.logo_path or None)
+        # The worker renders from copies: lines can be edited while the PDF is built.
+        invoice.lines = list(invoice.lines)
+        settings = cache.settings()
+        self.pdf_button.config(state="disabled")
+
+        def render(task):  # pylint: disable=unused-argument
+            # Preview with the number the invoice will get if saved now; nothing is reserved.
+            invoice.number = storage.peek_invoice_number()
+            return self.render_pdf(invoice, settings)
+
+        self.tasks.submit(render, on_done=self.on_pdf_done, on_error=self.on_pdf_failed)
+
+    @staticmethod
+    def render_pdf(invoice: Invoice, settings: Settings) -> Path:
+        # Imported on first use: fpdf2 and the QR stack are not needed to start the window.
+        from app.pdf.invoice_pdf import generate_swiss_qr_invoice
+
+        return generate_swiss_qr_invoice(invoice, settings, settings.logo_path or None)
+
+    def on_pdf_done(self, filename: Path):
+        self.pdf_button.config(state="normal")
         messagebox.showinfo("PDF créé", f"Enregistré sous {filename}")
 
+    def on_pdf_failed(self, exc: BaseException):
+        self.pdf_button.config(state="normal")
+        messagebox.showerror("Erreur", str(exc))
+
     def refresh_totals(self):
-        total = sum(line.total for line in self.lines)
-        self.total_label.config(text=f"Total: {total:.2f} CHF")
+        self.total_label.config(text=f"Total: {self.lines.total:.2f} CHF")
+
+
+class HistoryFrame(ttk.Frame):
+    """Invoice history, filtered, loading further pages as the user scrolls."""
+
+    page_size = 50
+
+    def __init__(self, master):
+        super().__init__(master, padding=10)
+        self.tasks = runner_for(self)
+        self.rendered_version: tuple[int, int] | None = None
+        self.filters: dict = {}
+        self.next_cursor: tuple[str, int] | None = None
+        self.loading = None
+        self.generation = 0
+        self.client_ids: dict[str, int] = {}
+
+        filters = ttk.Frame(self)
+        filters.pack(fill="x")
+        self.client_var = tk.StringVar()
+        self.date_from = tk.StringVar()
+        self.date_to = tk.StringVar()
+        self.number_prefix = tk.StringVar()
+        self.min_total = tk.StringVar()
+        self.max_total = tk.StringVar()
+        ttk.Label(filters, text="Client").grid(row=0, column=0, sticky="w")
+        self.client_combo = ttk.Combobox(filters, textvariable=self.client_var, width=30)
+        self.client_combo.grid(row=0, column=1, sticky="w")
+        ttk.Label(filters, text="N° commence par").grid(row=0, column=2, sticky="w", padx=(10, 0))
+        ttk.Entry(filters, textvariable=self.number_prefix, width=12).grid(row=0, column=3, sticky="w")
+        ttk.Label(filters, text="Du (AAAA-MM-JJ)").grid(row=1, column=0, sticky="w")
+        ttk.Entry(filters, textvariable=self.date_from, width=12).grid(row=1, column=1, sticky="w")
+        ttk.Label(filters, text="Au").grid(row=1, column=2, sticky="w", padx=(10, 0))
+        ttk.Entry(filters, textvariable=self.date_to, width=12).grid(row=1, column=3, sticky="w")
+        ttk.Label(filters, text="Total min.").grid(row=2, column=0, sticky="w")
+        ttk.Entry(filters, textvariable=self.min_total, width=12).grid(row=2, column=1, sticky="w")
+        ttk.Label(filters, text="Total max.").grid(row=2, column=2, sticky="w", padx=(10, 0))
+        ttk.Entry(filters, textvariable=self.max_total, width=12).grid(row=2, column=3, sticky="w")
+        ttk.Button(filters, text="Rechercher", command=self.apply_filters).grid(row=2, column=4, padx=5)
+
+        self.count_label = ttk.Label(self, text="")
+        self.count_label.pack(anchor="w", pady=5)
+        results = ttk.Frame(self)
+        results.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(
+            results, columns=["number", "date", "client", "lines", "total"], show="headings", height=15
+        )
+        for column, title in [
+            ("number", "N°"),
+            ("date", "Date"),
+            ("client", "Client"),
+            ("lines", "Lignes"),
+            ("total", "Total"),
+        ]:
+            self.tree.heading(column, text=title)
+        self.scrollbar = ttk.Scrollbar(results, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_tree_scrolled)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.refresh()
+
+    def refresh(self):
+        version = (cache.data_cache.version(events.INVOICES), cache.data_cache.version(events.CLIENTS))
+        if version == self.rendered_version:
+            return
+        self.rendered_version = version
+        self.tasks.submit(
+            lambda task: cache.list_clients(), on_done=self.show_clients, on_error=self.tasks.report_error
+        )
+        self.apply_filters()
+
+    def show_clients(self, clients: list[Client]):
+        self.client_ids = {client.company: client.id for client in clients}
+        self.client_combo["values"] = list(self.client_ids)
+
+    def read_filters(self) -> dict:
+        def amount(text: str) -> float | None:
+            return float(text.replace(",", ".")) if text.strip() else None
+
+        def day(text: str) -> date | None:
+            return date.fromisoformat(text.strip()) if text.strip() else None
+
+        client = self.client_var.get().strip()
+        if client and client not in self.client_ids:
+            raise ValueError("Client inconnu")
+        return {
+            "client_id": self.client_ids.get(client),
+            "date_from": day(self.date_from.get()),
+            "date_to": day(self.date_to.get()),
+            "number_prefix": self.number_prefix.get().strip() or None,
+            "min_total": amount(self.min_total.get()),
+            "max_total": amount(self.max_total.get()),
+        }
+
+    def apply_filters(self):
+        try:
+            self.filters = self.read_filters()
+        except ValueError as exc:
+            messagebox.showerror("Erreur", f"Filtre invalide : {exc}")
+            return
+        if self.loading:
+            self.loading.cancel()
+        self.generation += 1
+        generation = self.generation
+        self.tree.delete(*self.tree.get_children())
+        self.next_cursor = None
+        self.count_label.config(text="Recherche...")
+        filters = self.filters
+        self.loading = self.tasks.submit(
+            lambda task: (
+                storage.query_invoices(limit=self.page_size, **filters),
+                storage.estimate_invoice_count(**filters),
+            ),
+            on_done=lambda result: self.show_first_page(result, generation),
+            on_error=self.on_load_failed,
+        )
+
+    def show_first_page(self, result, generation: int):
+        page, (count, exact) = result
+        self.count_label.config(text=f"{count} facture(s)" if exact else f"Plus de {count} factures")
+        self.show_page(page, generation)
+
+    def load_next_page(self):
+        if self.loading or self.next_cursor is None:
+            return
+        generation = self.generation
+        filters, cursor = self.filters, self.next_cursor
+        self.loading = self.tasks.submit(
+            lambda task: storage.query_invoices(after=cursor, limit=self.page_size, **filters),
+            on_done=lambda page: self.show_page(page, generation),
+            on_error=self.on_load_failed,
+        )
+
+    def show_page(self, page, generation: int):
+        if generation != self.generation:
+            return
+        self.loading = None
+        for invoice in page.invoices:
+            self.tree.insert(
+                "",
+                "end",
+                values=(
+                    invoice.number,
+                    invoice.invoice_date.isoformat(),
+                    invoice.client_company,
+                    invoice.line_count,
+                    f"{invoice.total:.2f}",
+                ),
+            )
+        self.next_cursor = page.next_cursor
+
+    def on_load_failed(self, exc: BaseException):
+        self.loading = None
+        self.count_label.config(text="")
+        messagebox.showerror("Erreur", str(exc))
+
+    def on_tree_scrolled(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        # Near the bottom (or the page does not fill the view yet): fetch more.
+        if float(last) >= 0.9:
+            self.load_next_page()
+
+
+class ReportsFrame(ttk.Frame):
+    """Revenue dashboard read from the aggregates maintained on invoice save."""
+
+    def __init__(self, master):
+        super().__init__(master, padding=10)
+        self.tasks = runner_for(self)
+        self.rendered_versions: tuple[int, int] | None = None
+        self.trees: dict[str, ttk.Treeview] = {}
+        for name, title, key_title, height in [
+            ("period", "Par mois", "Mois", 6),
+            ("client", "Par client (20 premiers)", "Client", 6),
+            ("vat", "Par taux de TVA", "TVA", 3),
+        ]:
+            ttk.Label(self, text=title).pack(anchor="w", pady=(5, 0))
+            tree = ttk.Treeview(
+                self, columns=["key", "count", "subtotal", "vat", "total"], show="headings", height=height
+            )
+            for column, heading in [
+                ("key", key_title),
+                ("count", "Factures"),
+                ("subtotal", "Sous-total"),
+                ("vat", "TVA"),
+                ("total", "Total"),
+            ]:
+                tree.heading(column, text=heading)
+            tree.pack(fill="x")
+            self.trees[name] = tree
+        self.refresh()
+
+    def refresh(self):
+        versions = (cache.data_cache.version(events.INVOICES), cache.data_cache.version(events.CLIENTS))
+        if versions == self.rendered_versions:
+            return
+        self.rendered_versions = versions
+        self.tasks.submit(
+            lambda task: {
+                "period": storage.revenue_by_period(),
+                "client": storage.revenue_by_client(limit=20),
+                "vat": storage.revenue_by_vat_rate(),
+            },
+            on_done=self.show_reports,
+            on_error=self.on_reports_failed,
+        )
+
+    def on_reports_failed(self, exc: BaseException):
+        self.rendered_versions = None
+        self.tasks.report_error(exc)
+
+    def show_reports(self, reports: dict[str, list]):
+        for name, rows in reports.items():
+            tree = self.trees[name]
+            tree.delete(*tree.get_children())
+            for row in rows:
+                tree.insert(
+                    "",
+                    "end",
+                    values=(row.label, row.invoice_count, f"{row.subtotal:.2f}", f"{row.vat:.2f}", f"{row.total:.2f}"),
+                )
 
 
 class SettingsFrame(ttk.Frame):
     def __init__(self, master):
         super().__init__(master, padding=10)
-        self.settings = storage.load_settings()
-        self.company = tk.StringVar(value=self.settings.company_name)
-        self.street = tk.StringVar(value=self.settings.street)
-        self.zip_code = tk.StringVar(value=self.settings.zip_code)
-        self.city = tk.StringVar(value=self.settings.city)
-        self.country = tk.StringVar(value=self.settings.country)
-        self.qr_iban = tk.StringVar(value=self.settings.qr_iban)
-        self.logo_path = tk.StringVar(value=self.settings.logo_path)
-        self.prefix = tk.StringVar(value=self.settings.invoice_prefix)
-        self.next_number = tk.IntVar(value=self.settings.next_number)
-        self.vat_enabled = tk.BooleanVar(value=self.settings.vat_enabled)
-        self.vat_rate = tk.DoubleVar(value=self.settings.vat_rate)
+        self.rendered_version: tuple[int, int] | None = None
+        self.company = tk.StringVar()
+        self.street = tk.StringVar()
+        self.zip_code = tk.StringVar()
+        self.city = tk.StringVar()
+        self.country = tk.StringVar()
+        self.qr_iban = tk.StringVar()
+        self.logo_path = tk.StringVar()
+        self.prefix = tk.StringVar()
+        self.next_number = tk.IntVar()
+        self.vat_enabled = tk.BooleanVar()
+        self.vat_rate = tk.DoubleVar()
+        self.qr_backend = tk.StringVar()
 
         form = ttk.Frame(self)
         form.pack(fill="x")
@@ -489,7 +896,40 @@ class SettingsFrame(ttk.Frame):
         ttk.Checkbutton(form, text="TVA 7.7%", variable=self.vat_enabled).grid(row=vat_row, column=0, sticky="w")
         ttk.Entry(form, textvariable=self.vat_rate, width=10).grid(row=vat_row, column=1, sticky="w")
 
-        ttk.Button(form, text="Enregistrer", command=self.save_settings).grid(row=vat_row + 1, column=1, sticky="w", pady=5)
+        ttk.Label(form, text="Moteur QR").grid(row=vat_row + 1, column=0, sticky="w")
+        ttk.Combobox(
+            form, textvariable=self.qr_backend, values=available_backends(), state="readonly", width=12
+        ).grid(row=vat_row + 1, column=1, sticky="w")
+        # The backends do not put the same QR artwork in the PDF: say which one is chosen.
+        backend_info = ttk.Label(form, foreground="gray")
+        backend_info.grid(row=vat_row + 2, column=1, sticky="w")
+        self.qr_backend.trace_add(
+            "write", lambda *args: backend_info.config(text=get_backend(self.qr_backend.get()).description)
+        )
+
+        ttk.Button(form, text="Enregistrer", command=self.save_settings).grid(row=vat_row + 3, column=1, sticky="w", pady=5)
+        self.refresh()
+
+    def refresh(self):
+        # Saved invoices move the next number, so they count as a change here too.
+        version = (cache.data_cache.version(events.SETTINGS), cache.data_cache.version(events.INVOICES))
+        if version == self.rendered_version:
+            return
+        self.rendered_version = version
+        # Read live rather than from the snapshot, whose next number may lag.
+        self.settings = storage.load_settings()
+        self.company.set(self.settings.company_name)
+        self.street.set(self.settings.street)
+        self.zip_code.set(self.settings.zip_code)
+        self.city.set(self.settings.city)
+        self.country.set(self.settings.country)
+        self.qr_iban.set(self.settings.qr_iban)
+        self.logo_path.set(self.settings.logo_path)
+        self.prefix.set(self.settings.invoice_prefix)
+        self.next_number.set(self.settings.next_number)
+        self.vat_enabled.set(self.settings.vat_enabled)
+        self.vat_rate.set(self.settings.vat_rate)
+        self.qr_backend.set(self.settings.qr_backend)
 
     def save_settings(self):
         self.settings.company_name = self.company.get()
@@ -500,10 +940,15 @@ class SettingsFrame(ttk.Frame):
         self.settings.qr_iban = self.qr_iban.get()
         self.settings.logo_path = self.logo_path.get()
         self.settings.invoice_prefix = self.prefix.get()
-        self.settings.next_number = int(self.next_number.get())
         self.settings.vat_enabled = bool(self.vat_enabled.get())
         self.settings.vat_rate = float(self.vat_rate.get())
+        self.settings.qr_backend = self.qr_backend.get()
+        next_number = int(self.next_number.get())
         storage.save_settings(self.settings)
+        # Only an explicit change moves the sequence; other saves must not rewind it.
+        if next_number != self.settings.next_number:
+            storage.set_next_invoice_number(next_number)
+            self.settings.next_number = next_number
         messagebox.showinfo("Enregistré", "Paramètres sauvegardés")
 
 
@@ -522,17 +967,24 @@ class MainWindow(tk.Tk):
         self.main_area = ttk.Frame(container)
         self.main_area.pack(side="right", fill="both", expand=True)
 
-        self.views = {
-            "Clients": ClientsFrame(self.main_area),
-            "Articles": ItemsFrame(self.main_area),
-            "Factures": InvoiceFrame(self.main_area),
-            "Paramètres": SettingsFrame(self.main_area),
+        # Views are built the first time they are shown.
+        self.view_classes = {
+            "Clients": ClientsFrame,
+            "Articles": ItemsFrame,
+            "Factures": InvoiceFrame,
+            "Historique": HistoryFrame,
+            "Rapports": ReportsFrame,
+            "Paramètres": SettingsFrame,
         }
-        for view in self.views.values():
-            view.pack_forget()
+        self.views: dict[str, ttk.Frame] = {}
+        # Database and PDF work runs here so the window keeps responding.
+        self.tasks = TaskRunner(self)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_view("Factures")
 
     def show_view(self, name: str):
+        if name not in self.views:
+            self.views[name] = self.view_classes[name](self.main_area)
         for view_name, frame in self.views.items():
             if view_name == name:
                 frame.pack(fill="both", expand=True)
@@ -541,11 +993,69 @@ class MainWindow(tk.Tk):
             else:
                 frame.pack_forget()
 
+    def on_close(self):
+        self.tasks.shutdown()
+        self.destroy()
+
+    def report_callback_exception(self, exc, val, tb):
+        # Errors from callbacks and background tasks: keep the trace, tell the user.
+        traceback.print_exception(exc, val, tb)
+        messagebox.showerror("Erreur", f"{type(val).__name__} : {val}")
+
+
+def _open_database() -> bool:
+    """Bring the database to the current schema, asking the user to repair duplicates.
+
+    Runs before the main window exists, so the dialogs get a hidden root of
+    their own. Returns ``False`` when the application cannot start.
+    """
+    root = None
+    try:
+        while True:
+            try:
+                storage.init_db()
+                return True
+            except migrations.DuplicateRecordsError as exc:
+                root = root or _hidden_root()
+                records = "articles" if exc.table == "items" else "factures"
+                details = "\n".join(f"• {group}" for group in exc.duplicates)
+                if not messagebox.askyesno(
+                    "Mise à jour de la base de données",
+                    f"La mise à jour est bloquée par des {records} en double :\n\n{details}\n\n"
+                    "Renommer automatiquement les doublons (suffixe « -2 », « -3 »…) et continuer ?\n"
+                    "Le plus ancien de chaque groupe garde sa valeur.",
+                    icon="warning",
+                ):
+                    return False
+                renamed = storage.rename_duplicates(exc.table)
+                messagebox.showinfo(
+                    "Doublons renommés", "\n".join(f"{old} → {new}" for old, new in renamed)
+                )
+            except (RuntimeError, sqlite3.Error) as exc:
+                traceback.print_exc()
+                root = root or _hidden_root()
+                messagebox.showerror("Base de données", f"Impossible d'ouvrir la base de données :\n{exc}")
+                return False
+    finally:
+        if root is not None:
+            root.destroy()
+
+
+def _hidden_root() -> tk.Tk:
+    root = tk.Tk()
+    root.withdraw()
+    return root
+
 
 def run_app():
-    storage.init_db()
-    app = MainWindow()
-    app.mainloop()
+    if not _open_database():
+        storage.close_connections()
+        return
+    try:
+        app = MainWindow()
+        app.mainloop()
+    finally:
+        storage.close_connections()
 
 
 __all__ = ["run_app"]
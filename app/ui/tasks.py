@@ -0,0 +1,130 @@
+import queue
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Set
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when its cancellation has been requested."""
+
+
+class Task:
+    """Handle given to background work for progress reporting and cancellation."""
+
+    def __init__(self, runner: "TaskRunner", on_progress: Optional[Callable[..., None]] = None):
+        self.runner = runner
+        self.on_progress = on_progress
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report(self, *progress: Any) -> None:
+        """Forward progress to the UI thread; also a cancellation point."""
+        self.check()
+        self.runner.post(self.on_progress, *progress)
+
+
+class TaskRunner:
+    """Worker thread pool whose results are delivered on the Tk main loop.
+
+    Tk must only be touched from the thread running ``mainloop``, so workers
+    never call back directly: results, errors and progress go through a
+    queue drained by an ``after()`` poll on the UI thread.
+    """
+
+    def __init__(self, root, workers: int = 4, poll_ms: int = 30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fte-task")
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._tasks: Set[Task] = set()
+        self._lock = threading.Lock()
+        self._poll_job = self.root.after(self.poll_ms, self._poll)
+
+    def submit(
+        self,
+        work: Callable[[Task], Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        on_progress: Optional[Callable[..., None]] = None,
+    ) -> Task:
+        """Run ``work(task)`` on a worker; callbacks run later on the UI thread.
+
+        A cancelled task delivers neither ``on_done`` nor ``on_error``. Without
+        ``on_error``, failures go to :meth:`report_error`.
+        """
+        task = Task(self, on_progress)
+        if on_error is None:
+            on_error = self.report_error
+
+        def run() -> None:
+            try:
+                result = work(task)
+            except TaskCancelled:
+                return
+            except Exception as exc:  # pylint: disable=broad-except
+                if not task.cancelled:
+                    self.post(on_error, exc)
+                return
+            finally:
+                with self._lock:
+                    self._tasks.discard(task)
+            if not task.cancelled:
+                self.post(on_done, result)
+
+        with self._lock:
+            self._tasks.add(task)
+        task.future = self._executor.submit(run)
+        return task
+
+    def report_error(self, exc: BaseException) -> None:
+        """Hand ``exc`` to Tk's ``report_callback_exception`` (UI thread only)."""
+        self.root.report_callback_exception(type(exc), exc, exc.__traceback__)
+
+    def post(self, callback: Optional[Callable[..., None]], *args: Any) -> None:
+        if callback is not None:
+            self._queue.put((callback, args))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.root.after_cancel(self._poll_job)
+
+    def _poll(self) -> None:
+        try:
+            while True:
+                try:
+                    callback, args = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(*args)
+                except Exception:  # pylint: disable=broad-except
+                    # A failing callback (e.g. on a destroyed widget) must not stop delivery.
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self._poll_job = self.root.after(self.poll_ms, self._poll)
+
+
+def runner_for(widget) -> TaskRunner:
+    """The task runner owned by the widget's main window."""
+    return widget.winfo_toplevel().tasks
+
+
+__all__ = ["Task", "TaskCancelled", "TaskRunner", "runner_for"]
@@ -0,0 +1,219 @@
+from tkinter import ttk
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+from app.ui.tasks import Task, TaskRunner
+
+Row = Tuple[Hashable, Sequence[str]]
+
+
+class VirtualList(ttk.Frame):
+    """Treeview that only holds the rows currently on screen.
+
+    The widget keeps at most ``height`` Treeview items, fetches the visible
+    window through ``fetch_rows(offset, limit)`` and drives its own scrollbar
+    from ``count()``. Refreshing or scrolling compares the new window with
+    what is displayed and only touches the rows that changed. Each row is a
+    ``(key, values)`` pair; the key identifies the record behind the row.
+
+    With a ``runner``, refreshing and scrolling count and fetch on a worker
+    thread and the window is applied when the result comes back, so a slow
+    query never freezes the UI. Each load carries a generation number and
+    results of superseded loads are dropped, even if already queued.
+    ``count`` and ``fetch_rows`` must then be safe to call off the Tk thread.
+    """
+
+    def __init__(
+        self,
+        master,
+        columns: Sequence[Tuple[str, str]],
+        count: Callable[[], int],
+        fetch_rows: Callable[[int, int], List[Row]],
+        height: int = 8,
+        runner: Optional[TaskRunner] = None,
+    ):
+        super().__init__(master)
+        self.count = count
+        self.fetch_rows = fetch_rows
+        self.height = height
+        self.runner = runner
+        self._loading: Optional[Task] = None
+        self._loading_recounts = False
+        self._generation = 0
+        self._pending_select: Optional[int] = None
+        self.offset = 0
+        self.total = 0
+        self._shown: List[Row] = []
+        self._selected_key: Optional[Hashable] = None
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _ in columns], show="headings", height=height)
+        for name, title in columns:
+            self.tree.heading(name, text=title)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="x", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.tree.bind("<Up>", lambda event: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda event: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll_by(-self.height))
+        self.tree.bind("<Next>", lambda event: self.scroll_by(self.height))
+
+    def bind_rows(self, sequence: str, callback) -> None:
+        self.tree.bind(sequence, callback, add="+")
+
+    def refresh(self) -> None:
+        """Re-read the row count and the visible window, applying only the differences."""
+        if self.runner is None:
+            self.total = self.count()
+            self._render()
+            return
+        self._load(recount=True)
+
+    def scroll_to(self, offset: int) -> None:
+        self.offset = offset
+        if self.runner is None:
+            self._render()
+        else:
+            self._load(recount=False)
+
+    def _load(self, recount: bool) -> None:
+        """Fetch the window at ``self.offset`` on a worker, replacing any pending load."""
+        if self._loading is not None:
+            # The pending load is for an old position; a recount it owed is still owed.
+            recount = recount or self._loading_recounts
+            self._loading.cancel()
+        self._generation += 1
+        generation = self._generation
+        offset, height, known_total = self.offset, self.height, self.total
+
+        def load(task: Task) -> Tuple[int, int, List[Row]]:  # pylint: disable=unused-argument
+            total = self.count() if recount else known_total
+            start = max(0, min(offset, total - height))
+            return total, start, self.fetch_rows(start, height) if total else []
+
+        self._loading_recounts = recount
+        self._loading = self.runner.submit(
+            load,
+            on_done=lambda loaded: self._on_loaded(generation, loaded),
+            on_error=lambda exc: self._on_load_failed(generation, exc),
+        )
+
+    def scroll_by(self, delta: int) -> str:
+        self.scroll_to(self.offset + delta)
+        return "break"
+
+    def see(self, index: int) -> None:
+        """Scroll so that the row at absolute ``index`` is visible."""
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.height:
+            self.scroll_to(index - self.height + 1)
+
+    def selected_key(self) -> Optional[Hashable]:
+        return self._selected_key
+
+    def selected_index(self) -> Optional[int]:
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        return self.offset + self.tree.index(selection[0])
+
+    def _on_load_failed(self, generation: int, exc: BaseException) -> None:
+        if generation != self._generation:
+            return
+        self._loading = None
+        self._pending_select = None
+        self.runner.report_error(exc)
+
+    def _on_loaded(self, generation: int, loaded: Tuple[int, int, List[Row]]) -> None:
+        if generation != self._generation:
+            # Cancelled after its result was queued: a newer load is on its way.
+            return
+        self._loading = None
+        self.total, self.offset, rows = loaded
+        self._show(rows)
+        if self._pending_select is not None:
+            index, self._pending_select = self._pending_select, None
+            if 0 <= index - self.offset < len(self._shown):
+                self.tree.selection_set(f"slot{index - self.offset}")
+
+    def _render(self) -> None:
+        self.offset = max(0, min(self.offset, self.total - self.height))
+        self._show(self.fetch_rows(self.offset, self.height) if self.total else [])
+
+    def _show(self, rows: List[Row]) -> None:
+        slots = self.tree.get_children()
+        for position, row in enumerate(rows):
+            key, values = row[0], tuple(row[1])
+            if position < len(slots):
+                if position >= len(self._shown) or self._shown[position] != (key, values):
+                    self.tree.item(slots[position], values=values)
+            else:
+                self.tree.insert("", "end", iid=f"slot{position}", values=values)
+        for slot in slots[len(rows):]:
+            self.tree.delete(slot)
+        self._shown = [(row[0], tuple(row[1])) for row in rows]
+        self._restore_selection()
+        self._update_scrollbar()
+
+    def _restore_selection(self) -> None:
+        keys = [key for key, _ in self._shown]
+        target = f"slot{keys.index(self._selected_key)}" if self._selected_key in keys else None
+        current = self.tree.selection()
+        if target and current != (target,):
+            self.tree.selection_set(target)
+        elif not target and current:
+            self.tree.selection_remove(*current)
+
+    def _update_scrollbar(self) -> None:
+        if not self.total:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.offset / self.total
+        last = min(1.0, (self.offset + self.height) / self.total)
+        self.scrollbar.set(first, last)
+
+    def _on_scrollbar(self, action: str, value: str, unit: str = "") -> None:
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.total))
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+    def _on_mousewheel(self, event) -> str:
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_select(self, event) -> None:  # pylint: disable=unused-argument
+        selection = self.tree.selection()
+        if not selection:
+            # Selection also disappears when the selected row scrolls out of view.
+            return
+        position = self.tree.index(selection[0])
+        if position < len(self._shown):
+            self._selected_key = self._shown[position][0]
+
+    def _on_arrow(self, direction: int) -> Optional[str]:
+        index = self.selected_index()
+        if index is None:
+            return None
+        if self._loading is not None:
+            return "break"
+        position = index - self.offset
+        if 0 <= position + direction < len(self._shown):
+            return None
+        target = index + direction
+        if not 0 <= target < self.total:
+            return "break"
+        self.see(target)
+        if self._loading is None:
+            self.tree.selection_set(f"slot{target - self.offset}")
+        else:
+            # The window is loading; select the row once it is shown.
+            self._pending_select = target
+        return "break"
+
+
+__all__ = ["VirtualList"]
@@ -0,0 +1,97 @@
+"""Compare the QR backends: what they draw, whether it encodes the bill, and how fast.
+
+Run with ``python -m tests.bench_qr_backends [renders]``. Backends whose
+dependencies are missing (e.g. no native Cairo library) are reported as
+unavailable rather than failing the run.
+"""
+
+import io
+import sys
+import time
+from datetime import date
+
+from app.logic.models import Client, Invoice, InvoiceLine, Settings
+from app.qr.backends import BACKENDS, QR_SYMBOL_MM, SWISS_CROSS_MM
+from app.qr.swiss_qr import build_qr_bill
+
+
+def sample_invoice():
+    settings = Settings(qr_iban="CH9300762011623852957")
+    client = Client(1, "Pia-Maria Rutschmann-Schnyder", "Grosse Marktgasse 28", "9400", "Rorschach")
+    invoice = Invoice(1, "2025-001", date(2025, 3, 1), client, [InvoiceLine(None, "A1", "Vis", 3, 12.35)])
+    return invoice, settings
+
+
+def sample_bill():
+    return build_qr_bill(*sample_invoice())
+
+
+def symbol_mismatches(png: bytes, bill, dpi: int) -> int:
+    """Modules of a symbol-only PNG that differ from the QR code of ``bill.qr_data()``.
+
+    The Swiss cross area is skipped: it covers modules on purpose.
+    """
+    import qrcode
+    from PIL import Image
+
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=0)
+    code.add_data(bill.qr_data())
+    code.make(fit=True)
+    matrix = code.get_matrix()
+    modules = len(matrix)
+    image = Image.open(io.BytesIO(png)).convert("L")
+    step = image.width / modules
+    cross = SWISS_CROSS_MM / QR_SYMBOL_MM * image.width
+    low, high = (image.width - cross) / 2, (image.width + cross) / 2
+    mismatches = 0
+    for row in range(modules):
+        for column in range(modules):
+            x, y = (column + 0.5) * step, (row + 0.5) * step
+            if low <= x <= high and low <= y <= high:
+                continue
+            dark = image.getpixel((int(x), int(y))) < 128
+            mismatches += dark != matrix[row][column]
+    return mismatches
+
+
+def run(renders: int = 20, dpi: int = 300) -> dict:
+    bill = sample_bill()
+    results = {}
+    for name, backend in sorted(BACKENDS.items()):
+        try:
+            png = backend.render_png(bill, dpi)
+        except Exception as exc:  # pylint: disable=broad-except
+            results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+            continue
+        start = time.perf_counter()
+        for _ in range(renders):
+            backend.render_png(bill, dpi)
+        from PIL import Image
+
+        size = Image.open(io.BytesIO(png)).size
+        results[name] = {
+            "ms": (time.perf_counter() - start) / renders * 1000,
+            "size_px": size,
+            "bytes": len(png),
+            # Only the symbol-only output can be checked module by module.
+            "mismatches": symbol_mismatches(png, bill, dpi) if size[0] == size[1] else None,
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    renders = int((argv or sys.argv[1:] or ["20"])[0])
+    for name, result in run(renders).items():
+        if "error" in result:
+            print(f"{name:<10} indisponible : {result['error'][:100]}")
+            continue
+        check = "-" if result["mismatches"] is None else f"{result['mismatches']} module(s) faux"
+        print(
+            f"{name:<10} {result['ms']:8.2f} ms/rendu  {result['size_px'][0]}x{result['size_px'][1]} px  "
+            f"{result['bytes']} octets  symbole : {check}  ({BACKENDS[name].description})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
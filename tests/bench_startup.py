@@ -0,0 +1,49 @@
+"""Time the cold-start path: importing the UI module and opening a current database.
+
+Run with ``python -m tests.bench_startup [runs]``. The import is timed in a
+fresh interpreter each run; ``init_db`` on a temporary database already at
+the current schema.
+"""
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.database import migrations, storage
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_ms() -> float:
+    code = "import time; start = time.perf_counter(); import app.ui.main_window; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(output.stdout) * 1000
+
+
+def init_db_ms(runs: int) -> list:
+    timings = []
+    with tempfile.TemporaryDirectory() as directory:
+        storage.DB_PATH = Path(directory) / "bench.db"
+        storage.init_db()
+        for _ in range(runs):
+            start = time.perf_counter()
+            storage.init_db()
+            timings.append((time.perf_counter() - start) * 1000)
+        storage.close_connections()
+    return timings
+
+
+def main(argv=None) -> int:
+    runs = int((argv or sys.argv[1:] or ["5"])[0])
+    imports = [import_ms() for _ in range(runs)]
+    print(f"import app.ui.main_window : médiane {statistics.median(imports):.1f} ms sur {runs} essais")
+    opens = init_db_ms(runs * 20)
+    print(f"init_db (schéma v{migrations.SCHEMA_VERSION}) : médiane {statistics.median(opens):.3f} ms sur {len(opens)} essais")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.database import storage
+from app.logic.models import Client, Invoice, InvoiceLine, Item
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A migrated database in a temporary directory, used through ``storage``."""
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "test.db")
+    storage.init_db()
+    yield storage.DB_PATH
+    storage.close_connections()
+
+
+@pytest.fixture
+def sample_invoices(db):
+    """Five clients, twenty articles and fifty invoices of three lines each."""
+    clients = [storage.save_client(Client(None, f"Client {n}", "Rue 1", "1000", "Lausanne")) for n in range(5)]
+    items = [storage.save_item(Item(None, f"ART-{n:03d}", f"Article {n}", 1.5 + n)) for n in range(20)]
+    invoices = []
+    for n in range(50):
+        lines = [InvoiceLine(items[(n + k) % 20], items[(n + k) % 20].reference, "Ligne", 1 + k, 2.5) for k in range(3)]
+        invoices.append(
+            storage.save_invoice(Invoice(None, "", date(2025, 1, 1) + timedelta(days=n), clients[n % 5], lines))
+        )
+    return invoices
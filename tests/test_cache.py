@@ -0,0 +1,58 @@
+"""Writes from another connection invalidate only the caches of the tables they touched."""
+
+import sqlite3
+
+import pytest
+
+from app.database import cache, events, storage
+from app.database.article_index import article_index
+from app.logic.models import Client, Item
+
+
+@pytest.fixture
+def polled(db, monkeypatch):
+    # Check on every read instead of every two seconds.
+    monkeypatch.setattr(cache.data_cache, "check_interval", 0.0)
+    cache.data_cache.check_external()
+    article_index.load()
+    other = sqlite3.connect(db)
+    yield other
+    other.close()
+
+
+def versions():
+    return {topic: cache.data_cache.version(topic) for topic in cache.DataCache.DATA_TOPICS}
+
+
+def test_other_process_client_write_leaves_items_alone(polled):
+    before = versions()
+
+    polled.execute("INSERT INTO clients(company, street, zip_code, city, country) VALUES ('ACME', 'Rue 1', '1000', 'Lausanne', 'CH')")
+    polled.commit()
+
+    after = versions()
+    assert after[events.CLIENTS] > before[events.CLIENTS]
+    assert after[events.ITEMS] == before[events.ITEMS]
+    assert after[events.INVOICES] == before[events.INVOICES]
+    assert article_index.ready()
+
+
+def test_other_process_item_write_reloads_the_index(polled):
+    storage.save_item(Item(None, "VIS-1", "Vis", 1.0))
+    assert cache.count_items() == 1
+
+    polled.execute("UPDATE items SET unit_price = 2.0 WHERE reference = 'VIS-1'")
+    polled.execute("INSERT INTO items(reference, description, unit_price, default_quantity) VALUES ('VIS-2', 'Vis', 1.5, 1)")
+    polled.commit()
+
+    assert cache.count_items() == 2
+    assert not article_index.ready()
+    article_index.load()
+    assert article_index.get("vis-1").unit_price == 2.0
+    assert [item.reference for item in article_index.complete("vis")] == ["VIS-1", "VIS-2"]
+
+
+def test_writes_in_this_process_still_invalidate_through_events(polled):
+    before = cache.data_cache.version(events.CLIENTS)
+    storage.save_client(Client(None, "ACME", "Rue 1", "1000", "Lausanne"))
+    assert cache.data_cache.version(events.CLIENTS) > before
@@ -0,0 +1,57 @@
+"""The ledger export honours date and client filters the same way the invoice lists do."""
+
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from app.database import storage
+from app.database.export import INVOICE_COLUMNS, LINE_COLUMNS, export_ledger
+
+FILTER = {"date_from": date(2025, 1, 10), "date_to": date(2025, 2, 5)}
+
+
+def expected_invoices(client_id):
+    # The export is in date order; list_invoices has its own.
+    invoices = storage.list_invoices(client_id=client_id, **FILTER)
+    return sorted(invoices, key=lambda invoice: (invoice.invoice_date, invoice.id))
+
+
+def test_line_export_for_a_date_range_and_client(sample_invoices):
+    client_id = sample_invoices[0].client.id
+    expected = expected_invoices(client_id)
+    assert expected
+
+    stream = io.StringIO()
+    written = export_ledger(stream, fmt="csv", per="line", client_id=client_id, **FILTER)
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+
+    assert list(rows[0]) == LINE_COLUMNS
+    assert written == len(rows) == sum(len(invoice.lines) for invoice in expected)
+    assert [row["invoice_number"] for row in rows[::3]] == [invoice.number for invoice in expected]
+    assert {row["client_id"] for row in rows} == {str(client_id)}
+    assert all(FILTER["date_from"].isoformat() <= row["invoice_date"] <= FILTER["date_to"].isoformat() for row in rows)
+    line_totals = [Decimal(line.total_cents).scaleb(-2) for invoice in expected for line in invoice.lines]
+    assert [Decimal(row["line_total"]) for row in rows] == line_totals
+
+
+def test_invoice_export_keeps_exact_amounts(sample_invoices):
+    client_id = sample_invoices[1].client.id
+    expected = expected_invoices(client_id)
+
+    stream = io.StringIO()
+    written = export_ledger(stream, fmt="jsonl", per="invoice", client_id=client_id, **FILTER)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert written == len(records) == len(expected)
+    assert list(records[0]) == INVOICE_COLUMNS
+    for record, invoice in zip(records, expected):
+        assert record["invoice_number"] == invoice.number
+        assert record["total"] == str(Decimal(invoice.total_cents).scaleb(-2))
+        assert record["line_count"] == len(invoice.lines)
+
+
+def test_unfiltered_export_covers_every_invoice(sample_invoices):
+    stream = io.StringIO()
+    assert export_ledger(stream, per="invoice") == len(sample_invoices)
@@ -0,0 +1,83 @@
+"""Saving an edited invoice rewrites only the lines that changed, keeping their ids and order."""
+
+from dataclasses import replace
+from datetime import date
+
+from app.database import storage
+from app.logic.models import Client, Invoice, InvoiceLine
+
+
+def saved_invoice():
+    client = storage.save_client(Client(None, "ACME", "Rue 1", "1000", "Lausanne"))
+    lines = [InvoiceLine(None, f"A{n}", f"Ligne {n}", n + 1, 10.0) for n in range(4)]
+    return storage.save_invoice(Invoice(None, "", date(2025, 4, 1), client, lines))
+
+
+def line_writes(work):
+    """Row writes to invoice_lines made by ``work``, recorded by temporary triggers."""
+    with storage.connection() as conn:
+        conn.execute("CREATE TEMP TABLE line_writes(kind TEXT)")
+        for kind in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TEMP TRIGGER log_{kind.lower()} AFTER {kind} ON main.invoice_lines "
+                f"BEGIN INSERT INTO line_writes VALUES ('{kind}'); END"
+            )
+        try:
+            work()
+            return [row[0] for row in conn.execute("SELECT kind FROM line_writes ORDER BY rowid")]
+        finally:
+            conn.execute("DROP TABLE temp.line_writes")
+            for kind in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER temp.log_{kind}")
+
+
+def stored_lines(invoice_id):
+    with storage.connection() as conn:
+        return conn.execute(
+            "SELECT id, position, description FROM invoice_lines WHERE invoice_id = ? ORDER BY position",
+            (invoice_id,),
+        ).fetchall()
+
+
+def test_new_lines_get_their_ids(db):
+    invoice = saved_invoice()
+    assert all(line_id is not None for line_id in invoice.lines.ids)
+    assert [row[0] for row in stored_lines(invoice.id)] == invoice.lines.ids
+
+
+def test_unchanged_invoice_writes_no_line(db):
+    invoice = storage.load_invoice(saved_invoice().id)
+    assert line_writes(lambda: storage.save_invoice(invoice)) == []
+
+
+def test_edits_keep_ids_and_positions(db):
+    invoice = storage.load_invoice(saved_invoice().id)
+    first, second, third, fourth = invoice.lines.ids
+
+    del invoice.lines[1]
+    invoice.lines[1] = replace(invoice.lines[1], description="Modifiée")
+    invoice.lines.insert(0, InvoiceLine(None, "N", "Nouvelle", 1, 5.0))
+    writes = line_writes(lambda: storage.save_invoice(invoice))
+
+    rows = stored_lines(invoice.id)
+    assert [row[2] for row in rows] == ["Nouvelle", "Ligne 0", "Modifiée", "Ligne 3"]
+    assert [row[1] for row in rows] == [0, 1, 2, 3]
+    assert [row[0] for row in rows[1:]] == [first, third, fourth]
+    assert rows[0][0] not in (first, second, third, fourth)
+    assert invoice.lines.ids == [row[0] for row in rows]
+    # "Ligne 0" moved and "Modifiée" changed; "Ligne 3" kept its position and is not rewritten.
+    assert sorted(writes) == ["DELETE", "INSERT", "UPDATE", "UPDATE"]
+
+    reloaded = storage.load_invoice(invoice.id)
+    assert reloaded.lines == invoice.lines
+    assert reloaded.lines.ids == invoice.lines.ids
+
+
+def test_reordering_only_updates_positions(db):
+    invoice = storage.load_invoice(saved_invoice().id)
+    ids = list(invoice.lines.ids)
+    invoice.lines[0], invoice.lines[3] = invoice.lines[3], invoice.lines[0]
+    writes = line_writes(lambda: storage.save_invoice(invoice))
+
+    assert writes == ["UPDATE", "UPDATE"]
+    assert [row[0] for row in stored_lines(invoice.id)] == [ids[3], ids[1], ids[2], ids[0]]
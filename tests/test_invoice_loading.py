@@ -0,0 +1,37 @@
+"""list_invoices must load any number of invoices with a fixed number of queries."""
+
+from datetime import date
+
+from app.database import storage
+from app.logic.models import Client, Invoice, InvoiceLine, Item
+
+
+def count_statements(work):
+    statements = []
+    with storage.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            result = work()
+        finally:
+            conn.set_trace_callback(None)
+    return len(statements), result
+
+
+def add_invoices(count):
+    client = storage.save_client(Client(None, "ACME", "Rue 1", "1000", "Lausanne"))
+    item = storage.save_item(Item(None, f"REF-{count}", "Article", 4.0))
+    for _ in range(count):
+        lines = [InvoiceLine(item, item.reference, "Ligne", 2, 4.0), InvoiceLine(None, "", "Libre", 1, 10.0)]
+        storage.save_invoice(Invoice(None, "", date(2025, 2, 1), client, lines))
+
+
+def test_list_invoices_query_count_does_not_grow(db):
+    add_invoices(5)
+    few, invoices = count_statements(storage.list_invoices)
+    assert len(invoices) == 5
+
+    add_invoices(50)
+    many, invoices = count_statements(storage.list_invoices)
+    assert len(invoices) == 55
+    assert many == few
+    assert all(len(invoice.lines) == 2 and invoice.lines[0].item is not None for invoice in invoices)
@@ -0,0 +1,58 @@
+"""Automatic invoice numbers stay unique next to explicit ones and across connections."""
+
+import threading
+from datetime import date
+
+from app.database import storage
+from app.logic.models import Client, Invoice, InvoiceLine
+
+
+def new_invoice(client, number=""):
+    return Invoice(None, number, date(2025, 3, 1), client, [InvoiceLine(None, "", "Prestation", 1, 100.0)])
+
+
+def test_auto_numbering_skips_explicit_numbers(db):
+    client = storage.save_client(Client(None, "ACME", "Rue 1", "1000", "Lausanne"))
+    storage.save_invoice(new_invoice(client, "2025-002"))
+
+    assert storage.peek_invoice_number() == "2025-001"
+    assert storage.save_invoice(new_invoice(client)).number == "2025-001"
+    assert storage.peek_invoice_number() == "2025-003"
+    assert storage.save_invoice(new_invoice(client)).number == "2025-003"
+    assert storage.reserve_invoice_numbers(2) == ["2025-004", "2025-005"]
+
+
+def test_auto_numbering_after_lowering_next_number(db):
+    client = storage.save_client(Client(None, "ACME", "Rue 1", "1000", "Lausanne"))
+    for _ in range(3):
+        storage.save_invoice(new_invoice(client))
+    storage.set_next_invoice_number(2)
+
+    assert storage.save_invoice(new_invoice(client)).number == "2025-004"
+    assert storage.save_invoice(new_invoice(client)).number == "2025-005"
+
+
+def test_concurrent_allocation_across_connections(db):
+    client = storage.save_client(Client(None, "ACME", "Rue 1", "1000", "Lausanne"))
+    storage.save_invoice(new_invoice(client, "2025-010"))
+    numbers, errors = [], []
+    start = threading.Barrier(2)
+
+    def save_many():
+        # Each thread writes through its own connection.
+        start.wait()
+        try:
+            for _ in range(25):
+                numbers.append(storage.save_invoice(new_invoice(client)).number)
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    threads = [threading.Thread(target=save_many) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(numbers) == 50
+    assert sorted(numbers) == [f"2025-{value:03d}" for value in range(1, 52) if value != 10]
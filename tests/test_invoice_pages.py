@@ -0,0 +1,63 @@
+"""Keyset pages walk every matching invoice exactly once, even across equal dates."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.database import storage
+from app.logic.models import Client, Invoice, InvoiceLine
+
+
+@pytest.fixture
+def same_day_invoices(db):
+    """Forty invoices over eight days, five per day, alternating between two clients."""
+    clients = [storage.save_client(Client(None, f"Client {n}", "Rue 1", "1000", "Lausanne")) for n in range(2)]
+    invoices = []
+    for n in range(40):
+        lines = [InvoiceLine(None, "", "Prestation", 1, 10.0 * (n + 1))]
+        day = date(2025, 5, 1) + timedelta(days=n // 5)
+        invoices.append(storage.save_invoice(Invoice(None, "", day, clients[n % 2], lines)))
+    return clients, invoices
+
+
+def all_pages(limit, after=None, **filters):
+    ids, pages = [], 0
+    while True:
+        page = storage.query_invoices(after=after, limit=limit, **filters)
+        ids.extend(summary.id for summary in page.invoices)
+        pages += 1
+        if page.next_cursor is None:
+            return ids, pages
+        after = page.next_cursor
+
+
+def newest_first(invoices):
+    return [invoice.id for invoice in sorted(invoices, key=lambda invoice: (invoice.invoice_date, invoice.id), reverse=True)]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5, 7, 40, 100])
+def test_pages_have_no_gap_or_duplicate(same_day_invoices, limit):
+    _, invoices = same_day_invoices
+    ids, pages = all_pages(limit)
+    assert ids == newest_first(invoices)
+    assert pages == max(1, -(-len(invoices) // limit))
+
+
+def test_pages_with_filters(same_day_invoices):
+    clients, invoices = same_day_invoices
+    ids, _ = all_pages(3, client_id=clients[1].id, date_from=date(2025, 5, 2), min_total=100.0)
+    expected = [
+        invoice
+        for invoice in invoices
+        if invoice.client.id == clients[1].id and invoice.invoice_date >= date(2025, 5, 2) and invoice.total >= 100.0
+    ]
+    assert expected and ids == newest_first(expected)
+
+
+def test_inserts_between_pages_do_not_shift_results(same_day_invoices):
+    clients, invoices = same_day_invoices
+    first = storage.query_invoices(limit=6)
+    # A new invoice on the newest day lands before the cursor and must not reappear.
+    storage.save_invoice(Invoice(None, "", invoices[-1].invoice_date, clients[0], [InvoiceLine(None, "", "Tard", 1, 1.0)]))
+    rest, _ = all_pages(6, after=first.next_cursor)
+    assert [summary.id for summary in first.invoices] + rest == newest_first(invoices)
@@ -0,0 +1,92 @@
+"""Running cent totals agree with rounding every line as printed, through any edit."""
+
+import random
+from datetime import date
+
+from app.logic.models import Client, Invoice, InvoiceLine, InvoiceLines, to_cents
+
+
+def printed_total(line):
+    # The amount printed on the line: rounded to the cent on its own.
+    return round(line.quantity * line.unit_price * (1 - line.discount_percent / 100.0), 2)
+
+
+def printed_subtotal_cents(lines):
+    return to_cents(round(sum(printed_total(line) for line in lines), 2))
+
+
+def random_lines(rng, count):
+    return [
+        InvoiceLine(
+            None,
+            "",
+            f"Ligne {n}",
+            rng.choice([1, 2, 3, 0.5, 1.25, 7.333, 12]),
+            rng.choice([0.05, 0.35, 1.15, 2.675, 19.99, 104.5, 1234.565]),
+            rng.choice([0.0, 0.0, 5.0, 12.5, 33.333]),
+        )
+        for n in range(count)
+    ]
+
+
+def test_running_cents_match_per_line_rounding():
+    rng = random.Random(9)
+    for _ in range(200):
+        lines = random_lines(rng, rng.randint(0, 12))
+        assert [line.total_cents for line in lines] == [to_cents(printed_total(line)) for line in lines]
+        assert InvoiceLines(lines).total_cents == printed_subtotal_cents(lines)
+
+
+def test_running_cents_follow_edits():
+    rng = random.Random(17)
+    expected = random_lines(rng, 10)
+    lines = InvoiceLines(expected)
+    for _ in range(300):
+        action = rng.choice(["set", "delete", "insert", "append", "slice"])
+        if action == "set" and expected:
+            index = rng.randrange(len(expected))
+            expected[index] = lines[index] = random_lines(rng, 1)[0]
+        elif action == "delete" and expected:
+            index = rng.randrange(len(expected))
+            del expected[index]
+            del lines[index]
+        elif action == "insert":
+            index = rng.randint(0, len(expected))
+            line = random_lines(rng, 1)[0]
+            expected.insert(index, line)
+            lines.insert(index, line)
+        elif action == "append":
+            line = random_lines(rng, 1)[0]
+            expected.append(line)
+            lines.append(line)
+        elif action == "slice" and len(expected) > 2:
+            del expected[1:3]
+            del lines[1:3]
+        assert lines.total_cents == printed_subtotal_cents(expected)
+        assert list(lines) == expected
+
+
+def test_columnar_construction_matches_line_by_line():
+    lines = random_lines(random.Random(23), 50)
+    columns = InvoiceLines.from_columns(
+        [line.item for line in lines],
+        [line.article_number for line in lines],
+        [line.description for line in lines],
+        [line.quantity for line in lines],
+        [line.unit_price for line in lines],
+        [line.discount_percent for line in lines],
+    )
+    assert columns.total_cents == InvoiceLines(lines).total_cents
+    assert list(columns.line_totals_cents) == [line.total_cents for line in lines]
+
+
+def test_vat_and_total_match_the_printed_amounts():
+    rng = random.Random(31)
+    client = Client(1, "ACME", "Rue 1", "1000", "Lausanne")
+    for vat_rate in (0.0, 0.025, 0.077, 0.081):
+        lines = random_lines(rng, 8)
+        invoice = Invoice(None, "", date(2025, 1, 1), client, lines, vat_rate=vat_rate)
+        subtotal = round(sum(printed_total(line) for line in lines), 2)
+        vat = round(subtotal * vat_rate, 2) if vat_rate else 0.0
+        assert invoice.vat_cents == to_cents(vat)
+        assert invoice.total_cents == to_cents(round(subtotal + vat, 2))
@@ -0,0 +1,55 @@
+"""Migrations that add unique indexes stop on duplicates, and the offered repair unblocks them."""
+
+import sqlite3
+
+import pytest
+
+from app.database import migrations
+
+
+def database_at(version, tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    for migration in migrations.MIGRATIONS[:version]:
+        migration(conn.cursor())
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    return conn
+
+
+def test_case_only_duplicate_references_are_listed_then_renamed(tmp_path):
+    conn = database_at(1, tmp_path)
+    conn.executemany(
+        "INSERT INTO items(reference, description, unit_price, default_quantity) VALUES (?, ?, ?, 1)",
+        [("Vis-10", "Vis", 1.0), ("VIS-10", "Vis", 1.2), ("vis-10-2", "Autre", 3.0), ("Ecrou", "Ecrou", 0.5)],
+    )
+    conn.commit()
+
+    with pytest.raises(migrations.DuplicateRecordsError) as raised:
+        migrations.migrate(conn)
+    assert raised.value.table == "items"
+    assert len(raised.value.duplicates) == 1 and "VIS-10" in raised.value.duplicates[0]
+    assert migrations.schema_version(conn) == 1
+
+    # "-2" already exists in another case, so the copy becomes "-3".
+    assert migrations.rename_duplicates(conn, "items") == [("VIS-10", "VIS-10-3")]
+    assert migrations.migrate(conn) == migrations.SCHEMA_VERSION
+    references = [row[0] for row in conn.execute("SELECT reference FROM items ORDER BY id")]
+    assert references == ["Vis-10", "VIS-10-3", "vis-10-2", "Ecrou"]
+
+
+def test_duplicate_invoice_numbers_are_listed_then_renamed(tmp_path):
+    conn = database_at(8, tmp_path)
+    conn.execute("INSERT INTO clients(company, street, zip_code, city, country) VALUES ('ACME', 'Rue 1', '1000', 'Lausanne', 'CH')")
+    conn.executemany(
+        "INSERT INTO invoices(number, invoice_date, client_id, vat_rate) VALUES (?, '2025-01-01', 1, 0.0)",
+        [("2025-001",), ("2025-001",), ("2025-002",)],
+    )
+    conn.commit()
+
+    with pytest.raises(migrations.DuplicateRecordsError) as raised:
+        migrations.migrate(conn)
+    assert raised.value.table == "invoices"
+    assert raised.value.duplicates == ["2025-001"]
+
+    assert migrations.rename_duplicates(conn, "invoices") == [("2025-001", "2025-001-2")]
+    assert migrations.migrate(conn) == migrations.SCHEMA_VERSION
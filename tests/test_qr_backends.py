@@ -0,0 +1,51 @@
+import pytest
+
+from app.qr.backends import BACKENDS, QRBackend
+
+bench = pytest.importorskip("tests.bench_qr_backends")
+
+
+def test_backends_must_implement_render_png():
+    class Incomplete(QRBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_every_backend_describes_its_output():
+    assert all(backend.description for backend in BACKENDS.values())
+
+
+def test_pillow_symbol_encodes_the_bill():
+    pytest.importorskip("qrbill")
+    pytest.importorskip("qrcode")
+    bill = bench.sample_bill()
+    png = BACKENDS["pillow"].render_png(bill, 300)
+    assert bench.symbol_mismatches(png, bill, 300) == 0
+
+
+class PlacedImages:
+    """Stands in for the FPDF page and records where images are placed."""
+
+    def __init__(self):
+        self.placed = []
+
+    def image(self, data, x, y, w, h):  # pylint: disable=unused-argument
+        self.placed.append((x, y, w, h))
+
+
+def test_pillow_symbol_is_placed_at_its_specified_size(tmp_path, monkeypatch):
+    pytest.importorskip("fpdf")
+    pytest.importorskip("qrbill")
+    pytest.importorskip("qrcode")
+    from app.pdf.invoice_pdf import _embed_qr_bill
+    from app.qr.backends import QR_SYMBOL_MM
+    from app.qr.cache import qr_cache
+
+    monkeypatch.setattr(qr_cache, "directory", tmp_path)
+    invoice, settings = bench.sample_invoice()
+    settings.qr_backend = "pillow"
+    page = PlacedImages()
+    _embed_qr_bill(page, invoice, settings, 100, 150, 70)
+    assert page.placed == [(124, 174, QR_SYMBOL_MM, QR_SYMBOL_MM)]
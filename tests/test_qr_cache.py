@@ -0,0 +1,24 @@
+"""Cached QR images are keyed by exactly the payload they encode."""
+
+from dataclasses import replace
+
+import pytest
+
+from app.qr.swiss_qr import _cache_key, build_qr_bill
+
+bench = pytest.importorskip("tests.bench_qr_backends")
+
+
+def test_key_changes_whenever_the_encoded_payload_does():
+    pytest.importorskip("qrbill")
+    invoice, settings = bench.sample_invoice()
+    spaced = replace(invoice, client=replace(invoice.client, company="Pia-Maria  Rutschmann-Schnyder"))
+
+    assert build_qr_bill(invoice, settings).qr_data() != build_qr_bill(spaced, settings).qr_data()
+    assert _cache_key(invoice, settings, None, "png:pillow", 300) != _cache_key(spaced, settings, None, "png:pillow", 300)
+
+
+def test_same_invoice_content_shares_the_key():
+    invoice, settings = bench.sample_invoice()
+    copy = replace(invoice, id=2, number="2025-002")
+    assert _cache_key(invoice, settings, None, "svg") == _cache_key(copy, settings, None, "svg")
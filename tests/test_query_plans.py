@@ -0,0 +1,50 @@
+"""The hot lookups must be served by indexes, never by a full table scan."""
+
+from datetime import date
+
+import pytest
+
+from app.database import storage
+
+TABLES = ("clients", "items", "invoices", "invoice_lines")
+
+
+def traced_statements(work):
+    """Run ``work()`` and return every SQL statement it executed."""
+    statements = []
+    with storage.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            work()
+        finally:
+            conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def table_scans(sql):
+    with storage.connection() as conn:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    return [step for step in plan if step.startswith("SCAN ") and step.split()[1] in TABLES]
+
+
+@pytest.mark.parametrize(
+    "work",
+    [
+        pytest.param(lambda invoices: storage.load_invoice(invoices[10].id), id="invoice-lines"),
+        pytest.param(lambda invoices: storage.get_item_by_reference("art-007"), id="item-reference"),
+        pytest.param(lambda invoices: storage.list_invoices(client_id=invoices[3].client.id), id="client-filter"),
+        pytest.param(
+            lambda invoices: storage.list_invoices(date_from=date(2025, 1, 10), date_to=date(2025, 1, 20)),
+            id="date-filter",
+        ),
+        pytest.param(
+            lambda invoices: storage.query_invoices(client_id=invoices[3].client.id, limit=10), id="client-history"
+        ),
+        pytest.param(lambda invoices: storage.list_invoices(number_from="2025-010", number_to="2025-020"), id="numbers"),
+    ],
+)
+def test_hot_queries_use_indexes(sample_invoices, work):
+    statements = traced_statements(lambda: work(sample_invoices))
+    assert statements
+    for sql in statements:
+        assert table_scans(sql) == [], sql
@@ -0,0 +1,50 @@
+"""Aggregates kept up to date by save_invoice equal a rebuild from the invoices."""
+
+from dataclasses import replace
+from datetime import date
+
+from app.database import storage
+
+
+def snapshot():
+    return storage.revenue_by_period(), storage.revenue_by_client(), storage.revenue_by_vat_rate()
+
+
+def test_incremental_aggregates_match_a_rebuild(sample_invoices):
+    clients = [storage.load_client(invoice.client.id) for invoice in sample_invoices[:5]]
+    edits = sample_invoices[::7]
+    for n, invoice in enumerate(edits):
+        invoice = storage.load_invoice(invoice.id)
+        if n % 4 == 0:
+            # Moved to a month of its own: the old period row may empty out.
+            invoice.invoice_date = date(2024, 12, 31 - n)
+        if n % 4 == 1:
+            invoice.client = clients[(clients.index(invoice.client) + 1) % 5]
+        if n % 4 == 2:
+            invoice.vat_rate = 0.025
+        # Line deletes and edits change the subtotal.
+        del invoice.lines[0]
+        invoice.lines[0] = replace(invoice.lines[0], quantity=invoice.lines[0].quantity + 3)
+        storage.save_invoice(invoice)
+
+    incremental = snapshot()
+    assert storage.rebuild_reports() == len(sample_invoices)
+    assert snapshot() == incremental
+    assert sum(row.invoice_count for row in incremental[0]) == len(sample_invoices)
+    assert sum(row.total_cents for row in incremental[0]) == sum(
+        storage.load_invoice(invoice.id).total_cents for invoice in sample_invoices
+    )
+
+
+def test_emptied_groups_disappear(sample_invoices):
+    january = [invoice for invoice in sample_invoices if invoice.invoice_date.month == 1]
+    for invoice in january:
+        invoice = storage.load_invoice(invoice.id)
+        invoice.invoice_date = date(2025, 6, 1)
+        storage.save_invoice(invoice)
+
+    periods = [row.key for row in storage.revenue_by_period()]
+    assert "2025-01" not in periods
+    incremental = snapshot()
+    storage.rebuild_reports()
+    assert snapshot() == incremental
@@ -0,0 +1,44 @@
+"""Full-text search ranks every client and article match, and saves reindex only changed text."""
+
+from app.database import storage
+from app.logic.models import Client, Item
+
+CROWD = 1200  # more matches than storage.SEARCH_CANDIDATES
+
+
+def test_best_client_match_is_found_among_many_newer_ones(db):
+    storage.save_client(Client(None, "Dupont", "Rue 1", "1000", "Lausanne"))
+    with storage.connection() as conn:
+        conn.executemany(
+            "INSERT INTO clients(company, street, zip_code, city, country) VALUES (?, 'Rue 2', '1950', 'Sion', 'CH')",
+            [(f"Garage du Centre et Dupont associés {n}",) for n in range(CROWD)],
+        )
+        conn.commit()
+
+    matches = storage.search_clients("dupont", limit=5)
+    assert len(matches) == 5
+    assert matches[0].company == "Dupont"
+
+
+def test_best_item_match_is_found_among_many_newer_ones(db):
+    storage.save_item(Item(None, "VIS", "Vis", 0.1))
+    storage.import_items([(f"VIS-{n:05d}", "Vis à bois tête fraisée zinguée", 0.2) for n in range(CROWD)])
+
+    matches = storage.search_items("vis", limit=3)
+    assert [item.reference for item in matches][:1] == ["VIS"]
+
+
+def test_saves_that_keep_the_text_do_not_reindex(sample_invoices):
+    invoice = storage.load_invoice(sample_invoices[0].id)
+    invoice.lines[0], invoice.lines[2] = invoice.lines[2], invoice.lines[0]
+    statements = []
+    with storage.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            storage.save_invoice(invoice)
+        finally:
+            conn.set_trace_callback(None)
+
+    assert any("UPDATE invoice_lines" in statement for statement in statements)
+    assert not [statement for statement in statements if "_fts" in statement]
+    assert [hit.id for hit in storage.search_invoices(invoice.number)] == [invoice.id]
@@ -0,0 +1,96 @@
+"""The HTTP service: CRUD round-trips and the status codes clients rely on."""
+
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from app.service.server import create_server
+
+
+@pytest.fixture
+def api(db):
+    server = create_server(port=0, readers=4, pdf_workers=1, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def call(method, path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = Request(base + path, data=data, method=method, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as exc:
+            return exc.code, json.loads(exc.read())
+
+    yield call
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+CLIENT = {"company": "ACME SA", "street": "Rue 1", "zip_code": "1000", "city": "Lausanne"}
+
+
+def test_client_and_item_crud(api):
+    status, client = api("POST", "/clients", CLIENT)
+    assert status == 201 and client["id"]
+    status, client = api("PUT", f"/clients/{client['id']}", {**CLIENT, "city": "Sion"})
+    assert status == 200 and client["city"] == "Sion"
+    assert api("GET", f"/clients/{client['id']}") == (200, client)
+    assert api("GET", "/clients?q=acme")[1]["clients"] == [client]
+
+    status, item = api("POST", "/items", {"reference": "VIS-1", "description": "Vis", "unit_price": 0.5})
+    assert status == 201
+    status, item = api("PUT", f"/items/{item['id']}", {**item, "unit_price": 0.75})
+    assert status == 200 and api("GET", f"/items/{item['id']}")[1]["unit_price"] == 0.75
+
+
+def test_invoice_crud_and_numbering(api):
+    client = api("POST", "/clients", CLIENT)[1]
+    item = api("POST", "/items", {"reference": "VIS-1", "description": "Vis", "unit_price": 0.5})[1]
+    body = {
+        "client_id": client["id"],
+        "invoice_date": "2025-03-01",
+        "vat_rate": 0.081,
+        "lines": [{"item_id": item["id"], "description": "Vis", "quantity": 10, "unit_price": 0.5}],
+    }
+    status, invoice = api("POST", "/invoices", body)
+    assert status == 201
+    assert invoice["number"] == "2025-001" and invoice["subtotal_cents"] == 500 and invoice["vat_cents"] == 41
+
+    # An update without a number keeps the stored one and its VAT rate.
+    update = {"client_id": client["id"], "invoice_date": "2025-03-02", "lines": invoice["lines"][:1]}
+    status, updated = api("PUT", f"/invoices/{invoice['id']}", update)
+    assert status == 200
+    assert (updated["number"], updated["vat_rate"], updated["invoice_date"]) == ("2025-001", 0.081, "2025-03-02")
+    assert updated["lines"][0]["id"] == invoice["lines"][0]["id"]
+
+    page = api("GET", f"/invoices?client_id={client['id']}")[1]
+    assert [summary["number"] for summary in page["invoices"]] == ["2025-001"]
+    assert api("POST", "/invoices", body)[1]["number"] == "2025-002"
+
+
+def test_duplicate_number_is_a_conflict(api):
+    client = api("POST", "/clients", CLIENT)[1]
+    body = {
+        "client_id": client["id"],
+        "invoice_date": "2025-03-01",
+        "number": "2025-010",
+        "lines": [{"description": "Forfait", "quantity": 1, "unit_price": 100}],
+    }
+    assert api("POST", "/invoices", body)[0] == 201
+    status, error = api("POST", "/invoices", body)
+    assert status == 409 and "2025-010" in error["error"]
+
+
+def test_error_statuses(api):
+    assert api("GET", "/clients/999")[0] == 404
+    assert api("GET", "/nowhere")[0] == 404
+    assert api("POST", "/clients", {"company": "Sans adresse"})[0] == 400
+    assert api("POST", "/invoices", {"client_id": 999, "invoice_date": "2025-03-01"})[0] == 400
+    assert api("GET", "/invoices?limit=0")[0] == 400
+    assert api("DELETE", "/clients")[0] == 405
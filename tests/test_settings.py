@@ -0,0 +1,66 @@
+"""Settings round-trip through their typed rows, and the cached snapshot follows every save."""
+
+import sqlite3
+from dataclasses import replace
+
+from app.database import storage
+from app.database.cache import SettingsCache
+from app.logic.models import Settings
+
+
+def custom_settings():
+    return replace(
+        Settings(),
+        company_name="Atelier Test",
+        vat_enabled=False,
+        vat_rate=0.081,
+        qr_backend="pillow",
+        invoice_prefix="T-",
+    )
+
+
+def test_round_trip_keeps_values_and_types(db):
+    settings = custom_settings()
+    storage.save_settings(settings)
+    storage.set_next_invoice_number(42)
+
+    loaded = storage.load_settings()
+    assert loaded == replace(settings, next_number=42)
+    assert type(loaded.vat_enabled) is bool and type(loaded.vat_rate) is float
+    assert storage.peek_invoice_number() == "T-042"
+
+
+def test_version_moves_only_when_something_changed(db):
+    before = storage.settings_version()
+    storage.save_settings(custom_settings())
+    saved = storage.settings_version()
+    storage.save_settings(custom_settings())
+    assert before < saved == storage.settings_version()
+
+
+def test_cache_follows_saves_in_this_process(db):
+    cache = SettingsCache(check_interval=3600)
+    assert cache.get() == storage.load_settings()
+    copy = cache.get()
+    copy.company_name = "Modifiée sans enregistrer"
+    assert cache.get().company_name != copy.company_name
+
+    storage.save_settings(custom_settings())
+    assert cache.get().company_name == "Atelier Test"
+
+
+def test_cache_sees_saves_from_another_process_through_the_version(db):
+    cache = SettingsCache(check_interval=3600)
+    assert cache.get().company_name == Settings().company_name
+
+    other = sqlite3.connect(db)
+    other.execute("INSERT OR REPLACE INTO settings_values(key, value) VALUES ('company_name', 'Autre poste')")
+    other.execute("UPDATE sequences SET next_value = next_value + 1 WHERE name = 'settings_version'")
+    other.commit()
+    other.close()
+
+    # Within the check interval the snapshot is served without a query...
+    assert cache.get().company_name == Settings().company_name
+    # ...and once it has elapsed the version check picks up the other save.
+    cache.check_interval = 0.0
+    assert cache.get().company_name == "Autre poste"
@@ -0,0 +1,30 @@
+"""Cold-start guards: the UI module stays light and init_db is cheap on a current schema.
+
+Timings are measured by ``python -m tests.bench_startup``.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from app.database import storage
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("fpdf", "PIL", "qrbill", "cairosvg", "app.pdf.invoice_pdf")
+
+
+def test_main_window_import_does_not_load_the_pdf_stack():
+    code = f"import sys, app.ui.main_window; print(*[name for name in {HEAVY_MODULES!r} if name in sys.modules])"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == []
+
+
+def test_init_db_on_current_schema_is_one_pragma(db):
+    statements = []
+    with storage.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            storage.init_db()
+        finally:
+            conn.set_trace_callback(None)
+    assert statements == ["PRAGMA user_version"]